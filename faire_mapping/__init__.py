@@ -6,4 +6,4 @@ from .mapping_builders.extraction_blank_mapping_dict_builder import ExtractionBl
 from .mapping_builders.sample_extract_mapping_dict_builder import SampleExtractionMappingDictBuilder
 from .mapping_builders.nc_mapping_dict_builder import NcMappingDictBuilder
 
-from .scrapers import extract_insdc_geographic_locations
\ No newline at end of file
+from .scrapers import extract_insdc_geographic_locations, get_insdc_geographic_locations
\ No newline at end of file
@@ -0,0 +1,72 @@
+import warnings
+import pandas as pd
+
+
+class ControlledVocabIndex:
+    """
+    Controlled vocabulary of each FAIRe term from the FAIRe template 'Drop-down values' sheet, built once so
+    values can be checked with set lookups instead of filtering the sheet for every value.
+    """
+
+    TERM_NAME_COL = 'term_name'
+
+    def __init__(self, drop_down_value_df: pd.DataFrame, faire_missing_values: list):
+
+        self.faire_missing_values = frozenset(faire_missing_values)
+        # Columns that have the vocabulary in them (e.g. vocab1, vocab2 but not vocab_ref)
+        vocab_columns = [col for col in drop_down_value_df.columns if ('vocab' in col and '_' not in col)]
+
+        # term_name: vocab words in sheet order (for the warning messages)
+        self.vocab_lists = {}
+        for term_name, vocab_words in zip(drop_down_value_df[self.TERM_NAME_COL], drop_down_value_df[vocab_columns].values):
+            self.vocab_lists.setdefault(term_name, []).extend(word for word in vocab_words if pd.notna(word))
+        # term_name: frozenset of vocab words (for the lookups)
+        self.vocab_sets = {term_name: frozenset(vocab_words) for term_name, vocab_words in self.vocab_lists.items()}
+
+    def __contains__(self, faire_attribute: str) -> bool:
+        return faire_attribute in self.vocab_sets
+
+    def get_vocab(self, faire_attribute: str) -> list:
+        return list(self.vocab_lists.get(faire_attribute, []))
+
+    def is_allowed_word(self, word: str, faire_attribute: str) -> bool:
+        return word in self.vocab_sets.get(faire_attribute, ()) or word in self.faire_missing_values or 'other:' in word
+
+    def check_value(self, value: str, faire_attribute: str) -> tuple:
+        """
+        Checks a (possibly ' | ' separated) value. Returns (checked_value, invalid_words) where checked_value is
+        the value if any of its words are in the vocabulary and None otherwise, and invalid_words are the words
+        that were not allowed before the first allowed one (same as OmeFaireMapper.check_cv_word).
+        """
+        words = value.split(' | ') if '|' in value else [value]
+
+        invalid_words = []
+        for word in words:
+            if not self.is_allowed_word(word=word, faire_attribute=faire_attribute):
+                invalid_words.append(word)
+            else:
+                return ' | '.join(words), invalid_words
+        return None, invalid_words
+
+    def validate_column(self, values: pd.Series, faire_attribute: str) -> pd.Series:
+        """
+        Checks a whole column against the vocabulary of faire_attribute. Each distinct value is only checked once,
+        and all of the words that are not in the vocabulary are reported in one warning. Values that are not strings
+        (e.g. NaN) are left as they are.
+        """
+        checked_values = {}
+        invalid_word_counts = {}
+        value_counts = values.value_counts(dropna=True)
+        for value, count in value_counts.items():
+            if not isinstance(value, str):
+                checked_values[value] = value
+                continue
+            checked_values[value], invalid_words = self.check_value(value=value, faire_attribute=faire_attribute)
+            for word in invalid_words:
+                invalid_word_counts[word] = invalid_word_counts.get(word, 0) + count
+
+        if invalid_word_counts:
+            invalid_report = ', '.join(f"{word} ({count} rows)" for word, count in invalid_word_counts.items())
+            warnings.warn(f'The following {faire_attribute} values do not exist in the FAIRe standard controlled vocabulary: {invalid_report}, the allowed values are {self.get_vocab(faire_attribute)}')
+
+        return values.map(checked_values)
@@ -1,6 +1,8 @@
 import pandas as pd
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-from faire_mapping.utils import load_google_sheet_as_df, str_replace_for_samps, fix_cruise_code_in_samp_names, convert_mdy_date_to_iso8061
+from faire_mapping.utils import load_google_sheets_as_dfs, str_replace_for_samps_series, fix_cruise_code_in_samp_names, convert_mdy_date_to_iso8061
 from faire_mapping.mapping_builders.sample_extract_mapping_dict_builder import SampleExtractionMappingDictBuilder
 
 # TODO: update extraction_mapping_dict in sample_mapper part
@@ -38,10 +40,14 @@ class ExtractionMetadataBuilder:
     EXTRACT_ID_COL = "extract_id"
     EXTRACT_METHOD_ADDITIONAL_COL = "extraction_method_additional"
     EXTRACT_POOL_NUM_COL = "pool_num"
+    EXTRACT_BLANK_COL = "extraction_blank" # column of the extraction_blank_rel_cont_df with the blank sample name
 
     # Below Range standard value
     BELOW_RANGE_STD_VAL = "BDL"
 
+    # Extraction spreadsheets downloaded at the same time (the Google Sheets session also limits requests in flight and backs off on quota errors)
+    EXTRACTION_SHEET_MAX_WORKERS = 4
+
     def __init__(self, extractions_info: list, 
                  google_sheet_json_cred: str, 
                  sample_extract_mapping_builder: SampleExtractionMappingDictBuilder = None, # Required unless update_mapping_dict is False
@@ -64,6 +70,7 @@ class ExtractionMetadataBuilder:
         self.extract_new_old_col_mapping_dict = self.create_extract_old_new_col_master_mapping_dict() # Creates a dictionary with new extraction column names as keys and a set of old extraction column names as values
         self.extraction_df = self.create_finalized_extraction_df() # the standardized extraction_df that will be joined with the sample metadata df in other modules
         self.extraction_blank_rel_cont_dict = {} # Will get filled out in get_extraction_blanks_applicable_to_cruise_samps
+        self.extraction_blank_rel_cont_df = pd.DataFrame(columns=[self.EXTRACT_BLANK_COL, self.EXTRACT_SAMP_NAME_COL]) # blank -> sample rows behind extraction_blank_rel_cont_dict
         self.extraction_blanks_df = self.get_extraction_blanks_applicable_to_cruise_samps()
         
         if update_mapping_dict: # update_mapping_dict will always be False unless I am Frankensteingin code and don't need this (orphan samples)
@@ -87,21 +94,44 @@ class ExtractionMetadataBuilder:
             pool_num_extract_df = concat_extraction_df
 
         # Step 3. Fix sample names (# update samp name for DY2012 cruises (from DY20) and remove E numbers from any NC samples) and cruise codes
-        pool_num_extract_df[self.EXTRACT_SAMP_NAME_COL] = pool_num_extract_df[self.EXTRACT_SAMP_NAME_COL].apply(str_replace_for_samps)
+        pool_num_extract_df[self.EXTRACT_SAMP_NAME_COL] = str_replace_for_samps_series(pool_num_extract_df[self.EXTRACT_SAMP_NAME_COL])
 
         # Step 4. update dates to iso8601 TODO: may need to adjust this for ones that are already in this format
         pool_num_extract_df[self.EXTRACT_DATE_COL] = pool_num_extract_df[self.EXTRACT_DATE_COL].apply(convert_mdy_date_to_iso8061)
 
         return pool_num_extract_df
     
+    def load_extraction_sheets(self) -> dict:
+        """
+        Downloads every extraction sheet in extractions_info. Sheets of the same spreadsheet are read with one request and
+        the different spreadsheets are downloaded concurrently. Returns {(google_sheet_id, sheet_name): df}
+        """
+        spreadsheet_sheet_names = {}
+        for extraction in self.extractions_info:
+            sheet_names = spreadsheet_sheet_names.setdefault(extraction[self.EXTRACT_METADATA_GOOGLE_SHEET_ID_KEY], [])
+            if extraction[self.EXTRACT_METADATA_SHEET_NAME_KEY] not in sheet_names:
+                sheet_names.append(extraction[self.EXTRACT_METADATA_SHEET_NAME_KEY])
+
+        def load_spreadsheet(google_sheet_id: str) -> dict:
+            return load_google_sheets_as_dfs(google_sheet_id=google_sheet_id, sheet_headers={sheet_name: 0 for sheet_name in spreadsheet_sheet_names[google_sheet_id]},
+                                             google_sheet_json_cred=self.google_sheet_json_cred)
+
+        with ThreadPoolExecutor(max_workers=max(min(self.EXTRACTION_SHEET_MAX_WORKERS, len(spreadsheet_sheet_names)), 1)) as executor:
+            spreadsheet_dfs = dict(zip(spreadsheet_sheet_names, executor.map(load_spreadsheet, spreadsheet_sheet_names)))
+
+        return {(google_sheet_id, sheet_name): df for google_sheet_id, dfs in spreadsheet_dfs.items() for sheet_name, df in dfs.items()}
+
     def create_concat_extraction_df(self) -> pd.DataFrame:
         # Concatenate extractions together and create common column names
 
+        extraction_sheet_dfs = self.load_extraction_sheets()
+
         extraction_dfs = []
         # loop through extractions and append extraction dfs to list
         for extraction in self.extractions_info:
 
-            extraction_df = load_google_sheet_as_df(google_sheet_id=extraction[self.EXTRACT_METADATA_GOOGLE_SHEET_ID_KEY], sheet_name=extraction[self.EXTRACT_METADATA_SHEET_NAME_KEY], header=0, google_sheet_json_cred=self.google_sheet_json_cred)
+            # copy in case more than one extraction uses the same sheet
+            extraction_df = extraction_sheet_dfs[(extraction[self.EXTRACT_METADATA_GOOGLE_SHEET_ID_KEY], extraction[self.EXTRACT_METADATA_SHEET_NAME_KEY])].copy()
            
             # Update column names
             extraction_df = self.standardize_extraction_df_col_names(df=extraction_df)
@@ -158,110 +188,97 @@ class ExtractionMetadataBuilder:
   
         return df
     
-    def extraction_avg_aggregation(self, extractions_df: pd.DataFrame):
+    def get_below_range_mask(self, concs: pd.Series) -> pd.Series:
         """
-        Calculates the mean if more than one concentration per sample name.
+        True for the concentrations recorded as below the detection range ("Below Range", "BR" or "BDL", any case).
+        Values that aren't strings are never below range.
         """
+        try:
+            lower_concs = concs.str.lower()
+        except AttributeError: # no strings in the column
+            return pd.Series(False, index=concs.index)
+        below_range_mask = lower_concs.str.contains('below range', regex=False) | lower_concs.eq('br') | lower_concs.eq('bdl')
+        return below_range_mask.fillna(False).astype(bool)
 
-        # Keep Below Range
-        if all(isinstance(conc, str) and ("below range" in conc.lower() or "br" == conc.lower() or "bdl" == conc.lower()) for conc in extractions_df):
-            return self.BELOW_RANGE_STD_VAL
-
-        # For everything else, convert to numeric and calculate mean
-        numeric_series = pd.to_numeric(
-            extractions_df, errors='coerce')  # Non numeric becomes NaN
-
-        mean_value = numeric_series.mean()
-
-        return round(mean_value, 2)
-    
     def filter_cruise_avg_extraction_conc(self, concated_extraction_df: pd.DataFrame) -> pd.DataFrame:
         """
         If extractions have multiple measurements for extraction concentrations, calculates the avg.
         and creates a column called pool_num to show the number of samples pooled
         First filter extractions df for samples that contain the cruise key in their sample name.
         extract_method_additional_col is hard coded here. TODO: unhardcode if this may differ when being used.
+        A sample's concentration is BDL if all of its concentrations were below range, otherwise the mean of the numeric ones rounded to 2 places.
         """
-        cruise_key_mask = concated_extraction_df.apply(
-            lambda row: (
-                # Check for blank first (case-insensitive, handles whitespace)
-                ("blank" in str(row[self.EXTRACT_SAMP_NAME_COL]).lower().strip() 
-                 if pd.notna(row[self.EXTRACT_SAMP_NAME_COL]) else False)
-                or 
-                # Original cruise key logic (added strip for safety)
-                (str(row[self.EXTRACT_CRUISE_KEY_COL]).strip() in str(row[self.EXTRACT_SAMP_NAME_COL]).strip()
-                 if pd.notna(row[self.EXTRACT_CRUISE_KEY_COL]) and pd.notna(row[self.EXTRACT_SAMP_NAME_COL])
-                 else False)
-            ),
-            axis=1
-        )
-        
+        samp_names = concated_extraction_df[self.EXTRACT_SAMP_NAME_COL]
+        cruise_keys = concated_extraction_df[self.EXTRACT_CRUISE_KEY_COL]
+
+        # Blanks (case-insensitive) or samples with the cruise key in their name
+        stripped_samp_names = samp_names.astype(str).str.strip()
+        blank_mask = samp_names.notna() & stripped_samp_names.str.lower().str.contains('blank', regex=False)
+        cruise_key_mask = samp_names.notna() & cruise_keys.notna() & pd.Series(
+            [cruise_key in samp_name for cruise_key, samp_name in zip(cruise_keys.astype(str).str.strip(), stripped_samp_names)],
+            index=concated_extraction_df.index, dtype=bool)
+
         # Remove empty columns that will cause code to crash 
         concated_extraction_df = concated_extraction_df.drop(columns=[col for col in concated_extraction_df.columns if col == ''])
-       
-        # Then calculate average concentration
-        extract_avg_df = concated_extraction_df[cruise_key_mask].groupby(
-            self.EXTRACT_SAMP_NAME_COL).agg({
-                self.EXTRACT_CONC_COL: self.extraction_avg_aggregation,
-                **{col: 'first' for col in concated_extraction_df.columns if col != self.EXTRACT_SAMP_NAME_COL and col != self.EXTRACT_CONC_COL}
-            }).reset_index()
-
-        # Add pool_num column that shows how many samples were averaged for each group
-        sample_counts = concated_extraction_df[cruise_key_mask].groupby(
-            self.EXTRACT_SAMP_NAME_COL).size().reset_index(name=self.EXTRACT_POOL_NUM_COL)
-
-        # merge sample_counts into dataframe
-        extract_avg_df = extract_avg_df.merge(
-            sample_counts, on=self.EXTRACT_SAMP_NAME_COL, how='left')
+        cruise_extraction_df = concated_extraction_df[blank_mask | cruise_key_mask]
+
+        # Then calculate average concentration and how many samples were pooled (averaged) in one pass
+        other_cols = [col for col in cruise_extraction_df.columns if col != self.EXTRACT_SAMP_NAME_COL and col != self.EXTRACT_CONC_COL]
+        agg_df = cruise_extraction_df[[self.EXTRACT_SAMP_NAME_COL]].assign(
+            numeric_conc=pd.to_numeric(cruise_extraction_df[self.EXTRACT_CONC_COL], errors='coerce'), # Non numeric becomes NaN
+            below_range=self.get_below_range_mask(cruise_extraction_df[self.EXTRACT_CONC_COL]))
+        conc_df = agg_df.groupby(self.EXTRACT_SAMP_NAME_COL).agg(
+            mean_conc=('numeric_conc', 'mean'),
+            all_below_range=('below_range', 'all'),
+            **{self.EXTRACT_POOL_NUM_COL: ('below_range', 'size')})
+        first_df = cruise_extraction_df.groupby(self.EXTRACT_SAMP_NAME_COL)[other_cols].first()
+
+        avg_concs = conc_df['mean_conc'].round(2)
+        # Keep Below Range
+        if conc_df['all_below_range'].any():
+            avg_concs = avg_concs.astype(object).where(~conc_df['all_below_range'], self.BELOW_RANGE_STD_VAL)
+        extract_avg_df = pd.concat([avg_concs.rename(self.EXTRACT_CONC_COL), first_df, conc_df[[self.EXTRACT_POOL_NUM_COL]]], axis=1).reset_index()
 
         # Add extraction_method_additional for samples that pooled more than one extract
-        extract_avg_df[self.EXTRACT_METHOD_ADDITIONAL_COL] = extract_avg_df[self.EXTRACT_POOL_NUM_COL].apply(
-            lambda x: "One sample, but two filters were used because sample clogged. Two extractions were pooled together and average concentration calculated." if x > 1 else "missing: not provided")
+        extract_avg_df[self.EXTRACT_METHOD_ADDITIONAL_COL] = np.where(
+            extract_avg_df[self.EXTRACT_POOL_NUM_COL] > 1,
+            "One sample, but two filters were used because sample clogged. Two extractions were pooled together and average concentration calculated.",
+            "missing: not provided")
         
         return extract_avg_df
     
     def get_extraction_blanks_applicable_to_cruise_samps(self):
         """
         Get extraction blank df (applicable to RC0083 cruise). Should be applicable to 
+        any cruise. Blanks are taken from the extraction sets that have at least one sample with the set's cruise key in its name. Also fills
+        in extraction_blank_rel_cont_df (one row per blank and other sample in its extraction set, with a NaN sample if the blank
+        was extracted alone) and the extraction_blank_rel_cont_dict built from it ({blank: [other samples in the set]}).
         """
         self.extraction_blank_rel_cont_dict = {} # clear before buildilng - ran into caching issue from previous runs
-        blank_df = pd.DataFrame(columns=self.extraction_df.columns)
-
-        grouped = self.extraction_df.groupby(
-            self.EXTRACT_SET_COL
-        )
+        extraction_df = self.extraction_df
 
         try:
-            for extraction_set, group_df in grouped:
-                # Check if any in the group contains the extraction cruise key
-                has_cruise_samps = group_df.apply(
-                    lambda row: str(row[self.EXTRACT_CRUISE_KEY_COL]) in str(row[self.EXTRACT_SAMP_NAME_COL]),
-                    axis = 1
-                ).any()
-                
-                if has_cruise_samps:
-
-                    # find blank samples in this group ('Larson NC are extraction blanks for the SKQ23 cruise)
-                    extraction_blank_samps = group_df[
-                        (group_df[self.EXTRACT_SAMP_NAME_COL].str.contains('blank', case=False, na=False)) | 
-                        (group_df[self.EXTRACT_SAMP_NAME_COL].str.contains('Larson NC', case=False, na=False))]
-                    
-                    try:
-                        # get list of samples associated with blanks and put into dict for rel_cont_id
-                        valid_samples = group_df[self.EXTRACT_SAMP_NAME_COL].tolist()
-                        for sample in valid_samples:
-                            if 'blank' in sample.lower() or 'Larson NC' in sample:
-                                other_samples = [samp for samp in valid_samples if samp != sample]
-                                # update cruise codes in sample names
-                                if self.unwanted_cruise_code and self.desired_cruise_code:
-                                    sample = sample.replace(self.unwanted_cruise_code, self.desired_cruise_code)
-                                    other_samples = [samp.replace(self.unwanted_cruise_code, self.desired_cruise_code) for samp in other_samples]
-                                self.extraction_blank_rel_cont_dict[sample] = other_samples
-                    except:
-                        raise ValueError("blank dictionary mapping not working!")
-
-
-                    blank_df = pd.concat([blank_df, extraction_blank_samps])
+            samp_names = extraction_df[self.EXTRACT_SAMP_NAME_COL].astype(object)
+
+            # Extraction sets with any samples from the cruise
+            cruise_samp_mask = pd.Series([cruise_key in samp_name for cruise_key, samp_name in
+                                          zip(extraction_df[self.EXTRACT_CRUISE_KEY_COL].astype(str), samp_names.astype(str))],
+                                         index=extraction_df.index, dtype=bool)
+            cruise_set_mask = cruise_samp_mask.groupby(extraction_df[self.EXTRACT_SET_COL]).transform('any').eq(True)
+
+            # blank samples in those sets ('Larson NC are extraction blanks for the SKQ23 cruise)
+            blank_mask = (samp_names.str.contains('blank', case=False, na=False, regex=False) |
+                          samp_names.str.contains('Larson NC', case=False, na=False, regex=False))
+            cruise_set_df = extraction_df[cruise_set_mask]
+            set_nums = cruise_set_df.groupby(self.EXTRACT_SET_COL).ngroup().to_numpy()
+            cruise_set_blank_mask = blank_mask[cruise_set_mask].to_numpy()
+            # blanks ordered by extraction set
+            blank_df = pd.concat([pd.DataFrame(columns=extraction_df.columns),
+                                  cruise_set_df[cruise_set_blank_mask].iloc[np.argsort(set_nums[cruise_set_blank_mask], kind='stable')]])
+
+            self.extraction_blank_rel_cont_df = self.create_extraction_blank_rel_cont_df(cruise_set_df=cruise_set_df, set_nums=set_nums)
+            self.extraction_blank_rel_cont_dict = {blank: group[self.EXTRACT_SAMP_NAME_COL].dropna().tolist() for blank, group in
+                                                   self.extraction_blank_rel_cont_df.groupby(self.EXTRACT_BLANK_COL, sort=False)}
 
             blank_df[self.EXTRACT_CONC_COL] = blank_df[self.EXTRACT_CONC_COL].replace(
                 "BR", self.BELOW_RANGE_STD_VAL).replace("Below Range", self.BELOW_RANGE_STD_VAL).replace("br", self.BELOW_RANGE_STD_VAL)
@@ -270,6 +287,49 @@ class ExtractionMetadataBuilder:
                 "Warning: Extraction samples are not grouped, double check this")
         
         return blank_df
+
+    def create_extraction_blank_rel_cont_df(self, cruise_set_df: pd.DataFrame, set_nums: np.ndarray) -> pd.DataFrame:
+        """
+        Creates the blank -> sample relation for the extraction sets with cruise samples (cruise_set_df, set_nums is the extraction set
+        number of each row): one row per blank and every other sample in its set, with a NaN sample for a blank that is alone in its set.
+        Cruise codes are updated in both columns. If a blank is in more than one set, the last set is used.
+        """
+        samp_names = cruise_set_df[self.EXTRACT_SAMP_NAME_COL].astype(object)
+        if samp_names.isna().any():
+            raise ValueError("blank dictionary mapping not working!")
+
+        members_df = pd.DataFrame({'set_num': set_nums, 'position': np.arange(len(cruise_set_df)), self.EXTRACT_SAMP_NAME_COL: samp_names.to_numpy()})
+        is_blank = (samp_names.str.lower().str.contains('blank', regex=False) | samp_names.str.contains('Larson NC', regex=False)).to_numpy()
+        blanks_df = members_df[is_blank].rename(columns={'position': 'blank_position', self.EXTRACT_SAMP_NAME_COL: self.EXTRACT_BLANK_COL})
+
+        rel_cont_df = blanks_df.merge(members_df, on='set_num')
+        rel_cont_df = rel_cont_df[rel_cont_df[self.EXTRACT_BLANK_COL] != rel_cont_df[self.EXTRACT_SAMP_NAME_COL]]
+        # blanks that were extracted alone
+        alone_blanks_df = blanks_df[~blanks_df['blank_position'].isin(rel_cont_df['blank_position'])]
+        rel_cont_df = pd.concat([rel_cont_df, alone_blanks_df.assign(position=-1, **{self.EXTRACT_SAMP_NAME_COL: np.nan})])
+        rel_cont_df = rel_cont_df.sort_values(['set_num', 'blank_position', 'position'], kind='stable').reset_index(drop=True)
+
+        # update cruise codes in sample names
+        if self.unwanted_cruise_code and self.desired_cruise_code:
+            for col in [self.EXTRACT_BLANK_COL, self.EXTRACT_SAMP_NAME_COL]:
+                rel_cont_df[col] = rel_cont_df[col].astype(object).str.replace(self.unwanted_cruise_code, self.desired_cruise_code, regex=False)
+
+        # Keep the samples of the last occurrence of each blank, listed in the order the blanks first occur
+        occurrence = rel_cont_df.groupby(['set_num', 'blank_position'], sort=False).ngroup()
+        last_occurrence = occurrence.groupby(rel_cont_df[self.EXTRACT_BLANK_COL]).transform('max')
+        blank_order = pd.Series(np.arange(len(rel_cont_df)), index=rel_cont_df.index).groupby(rel_cont_df[self.EXTRACT_BLANK_COL]).transform('min').to_numpy()
+        last_occurrence_mask = (occurrence == last_occurrence).to_numpy()
+        rel_cont_df = rel_cont_df[last_occurrence_mask].iloc[np.argsort(blank_order[last_occurrence_mask], kind='stable')]
+
+        return rel_cont_df[[self.EXTRACT_BLANK_COL, self.EXTRACT_SAMP_NAME_COL]].reset_index(drop=True)
+
+    def get_extraction_blanks_by_samp(self) -> dict:
+        """
+        Inverse of extraction_blank_rel_cont_dict: {samp_name: [blanks the sample was extracted with]}, blanks in dict order
+        """
+        rel_cont_df = self.extraction_blank_rel_cont_df.dropna().drop_duplicates()
+        return {samp_name: group[self.EXTRACT_BLANK_COL].tolist() for samp_name, group in
+                rel_cont_df.groupby(self.EXTRACT_SAMP_NAME_COL, sort=False)}
     
     def update_mapping_dictionary_col_names(self):
         """
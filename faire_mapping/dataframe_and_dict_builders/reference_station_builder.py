@@ -1,5 +1,6 @@
 import pandas as pd
 from faire_mapping.dataframe_and_dict_builders.base_df_builder import BaseDfBuilder
+from faire_mapping.spatial.station_proximity_index import StationProximityIndex
 
 class ReferenceStationBuilder(BaseDfBuilder):
     """
@@ -20,7 +21,9 @@ class ReferenceStationBuilder(BaseDfBuilder):
 
         self.station_lat_lon_ref_dict = self.create_station_lat_lon_ref_dict(station_ref_df=self.df) # e.g. {'BF2': {'lat': '71.75076', 'lon': -154.4567}, 'DBO1.1': {'lat': '62.01', 'lon': -175.06}}
         self.station_standardized_name_dict = self.create_standardized_station_name_ref_dict(station_ref_df=self.df) # e.g {standard_station_name: [non_standard_station_name]}
+        self.station_synonym_index = self.create_station_synonym_index(station_standardized_name_dict=self.station_standardized_name_dict) # e.g. {normalized non_standard_station_name: standard_station_name}
         self.station_line_dict = self.create_station_line_id_ref_dict(station_ref_df=self.df) # e.g. {standard_station_name: line_id_name}
+        self.station_proximity_index = StationProximityIndex(station_lat_lon_ref_dict=self.station_lat_lon_ref_dict) # KD-tree of station_lat_lon_ref_dict for radius queries
 
     def create_station_lat_lon_ref_dict(self, station_ref_df: pd.DataFrame) -> dict:
         station_lat_lon_ref_dict = {}
@@ -54,6 +57,27 @@ class ReferenceStationBuilder(BaseDfBuilder):
 
         return station_standardized_name_dict
     
+    @staticmethod
+    def normalize_station_name(station_name) -> str:
+        # Case and whitespace insensitive version of a station name for lookups (e.g. ' dbo1.9 ' -> 'dbo1.9')
+        if not isinstance(station_name, str):
+            return station_name
+        return ' '.join(station_name.split()).casefold()
+
+    def create_station_synonym_index(self, station_standardized_name_dict: dict) -> dict:
+        # Flattens station_standardized_name_dict into normalized synonym -> standardized name (standardized names map to themselves).
+        # If a name is listed for more than one station, the first station in the reference sheet wins.
+        station_synonym_index = {}
+        for standardized_name, non_standardized_names in station_standardized_name_dict.items():
+            for station_name in [standardized_name] + non_standardized_names:
+                station_synonym_index.setdefault(self.normalize_station_name(station_name), standardized_name)
+
+        return station_synonym_index
+
+    def standardize_station_names(self, station_names: pd.Series) -> pd.Series:
+        # Maps a column of station names to their standardized names, NaN where there is no match
+        return station_names.map(self.normalize_station_name).map(self.station_synonym_index)
+    
     def create_station_line_id_ref_dict(self, station_ref_df: pd.DataFrame) -> dict:
         # create reference dict where station name is key and line id is value
         station_line_dict = dict(zip(station_ref_df[self.STATION_NAME_COL_NAME], station_ref_df[self.LINE_ID_COL_NAME]))
@@ -1,6 +1,7 @@
 import pandas as pd
 from faire_mapping.dataframe_and_dict_builders.base_df_builder import BaseDfBuilder
 from faire_mapping.utils import fix_cruise_code_in_samp_names
+from faire_mapping.sample_name_rewrites import sample_metadata_samp_name_rewriter
 
 pd.set_option('future.no_silent_downcasting', True)
 
@@ -108,8 +109,7 @@ class SampleMetadataBuilder(BaseDfBuilder):
             axis=1)
 
         # Fix sample names that have _ with -. For SKQ23 cruises where run and extraction metadata has -, and sample metadata has _
-        self.df[self.sample_name_metadata_col_name] = self.df[self.sample_name_metadata_col_name].apply(
-            self._fix_samp_names)
+        self.df[self.sample_name_metadata_col_name] = sample_metadata_samp_name_rewriter.rewrite_series(self.df[self.sample_name_metadata_col_name])
 
         # Remove 'CTD' from Cast_No. value if present
         self.df[self.sample_metadata_cast_no_col_name] = self.df[self.sample_metadata_cast_no_col_name].apply(
@@ -138,14 +138,8 @@ class SampleMetadataBuilder(BaseDfBuilder):
         
     def _fix_samp_names(self, sample_name: str) -> str:
         # Fixes samples names (really just for SKQ23 sample names to replace _ with -. As the extraction and run sheets use -)
-        if '_' in sample_name:
-            sample_name = sample_name.replace('_', '-')
-        if '.DY23-06' in sample_name:
-            sample_name = sample_name.replace('-', '')
-        if '.SKQ2021' in sample_name: 
-            sample_name = sample_name.replace('.SKQ2021', '.SKQ21-15S')
-
-        return sample_name
+        # The rewrites are in sample_name_rewrites.SAMPLE_METADATA_SAMP_NAME_REWRITES
+        return sample_metadata_samp_name_rewriter.rewrite(sample_name)
     
     def remove_extraneous_cast_no_chars(self, cast_no: str) -> int:
         # If Cast_No. is in the format of CTD001, then returns just the int
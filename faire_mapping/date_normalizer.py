@@ -0,0 +1,220 @@
+from datetime import datetime
+import logging
+import re
+import numpy as np
+import pandas as pd
+from dateutil import parser as dateutil_parser
+
+logger = logging.getLogger(__name__)
+
+# Values that mean there is no date
+EMPTY_DATE_VALUES = ['None', 'nan', 'missing: not collected', '', 'missing: not provided']
+ISO8601_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+ISO8601_DATE_FORMAT = "%Y-%m-%d"
+
+# (name, pattern, strptime format, has_time_component) for the formats convert_date_to_iso8601 handles most.
+# Values that match a pattern are parsed together with one pd.to_datetime call. Anything that doesn't
+# match (or doesn't parse) goes through convert_date_to_iso8601 one at a time. Seconds are limited
+# to 0-59 because pandas rolls 60/61 over to the next minute where strptime raises.
+DATE_FORMAT_PATTERNS = [
+    ('iso8601_z', re.compile(r'^\d{4}-\d{1,2}-\d{1,2}T\d{1,2}:\d{1,2}:[0-5]?\dZ$'), "%Y-%m-%dT%H:%M:%SZ", True),
+    ('slash_ymd_time', re.compile(r'^\d{4}/\d{1,2}/\d{1,2} \d{1,2}:\d{1,2}:[0-5]?\d$'), "%Y/%m/%d %H:%M:%S", True),
+    ('slash_mdy', re.compile(r'^\d{1,2}/\d{1,2}/\d{4}$'), "%m/%d/%Y", False),
+    ('slash_mdy_short', re.compile(r'^\d{1,2}/\d{1,2}/\d{2}$'), "%m/%d/%y", False),
+    ('dash_ymd_t_time', re.compile(r'^\d{4}-\d{1,2}-\d{1,2}T\d{1,2}:\d{1,2}:[0-5]?\d$'), "%Y-%m-%dT%H:%M:%S", True),
+    ('dash_ymd_time', re.compile(r'^\d{4}-\d{1,2}-\d{1,2} \d{1,2}:\d{1,2}:[0-5]?\d$'), "%Y-%m-%d %H:%M:%S", True),
+    ('dash_ymd', re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$'), "%Y-%m-%d", False),
+]
+
+
+def convert_date_to_iso8601(date: str) -> str:
+    # converts strings from 2021/11/08 00:00:00 to iso8601 format  to 2021-11-08T00:00:00Z
+    # also converts strings from 5/1/2024 to 2024-01-05T00:00:00Z
+    # And coverts 2024-05-01 to 2024-01-05T00:00:00Z
+    # Also handles years like 0022 and corrects them to 2022
+    has_time_component = False
+
+    date = str(date)
+
+    if date in EMPTY_DATE_VALUES:
+        return "missing: not provided"
+
+    # 1. Handle full ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ) and return immediately
+    try:
+        # Use the correct format including T and Z
+        datetime.strptime(date, "%Y-%m-%dT%H:%M:%SZ")
+        return date
+    except ValueError:
+        pass # Not that format, continue to check others
+
+    # 2. Check for other supported formats
+
+    # Format 2021/11/08 00:00:00
+    if "/" in date and ":" in date:
+        dt_obj = datetime.strptime(date, "%Y/%m/%d %H:%M:%S")
+        has_time_component = True
+
+    # Format 5/1/2024 or 5/1/24
+    elif "/" in date and ":" not in date:
+        try: # 5/1/2024 format
+            dt_obj = datetime.strptime(date, "%m/%d/%Y")
+        except ValueError:
+            try: # foramt 5/1/24
+                dt_obj = datetime.strptime(date, "%m/%d/%y")
+            except ValueError:
+                raise ValueError(f"Unsupported slash-separated dae format: {date}")
+
+    # --- FIX APPLIED HERE: Handle all dash-separated formats gracefully ---
+    elif "-" in date:
+        if ':' in date:
+            # 2.1. Try ISO-like T-separated time (e.g., 2023-04-24T08:51:00)
+            try:
+                dt_obj = datetime.strptime(date, "%Y-%m-%dT%H:%M:%S")
+                has_time_component = True
+            except ValueError:
+                # 2.2. Fallback: Try space-separated time (e.g., 2023-04-24 08:51:00)
+                try:
+                    dt_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+                    has_time_component = True
+                except ValueError:
+                    try:
+                        # %z handles the +00:00 or +0000 part
+                        dt_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S%z")
+                        has_time_component = True
+                    except ValueError:
+                        try:
+                        # Try usin dateutil library
+                            dt_obj = dateutil_parser.parse(date)
+                            return dt_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
+                        except ValueError:
+                            # Failed both time formats, raise error
+                            raise ValueError(f"Unsupported dash-separated date/time format: {date}")
+        else:
+            # 2.3. Date-only format (e.g., 2024-04-10)
+            dt_obj = datetime.strptime(date, "%Y-%m-%d")
+    # ---------------------------------------------------------------------
+
+    else:
+        raise ValueError(f"Unsupported date format: {date}")
+
+    # Correct years that are clearly wrong (like 0022 -> 2022)
+    if dt_obj.year < 100:
+        corrected_year = 2000 + dt_obj.year
+        dt_obj = dt_obj.replace(year=corrected_year)
+
+    # Only add time component if it was in the original string
+    if has_time_component:
+        return dt_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
+    else:
+        return dt_obj.strftime("%Y-%m-%d")
+
+
+class DateNormalizer:
+    """
+    Column level version of convert_date_to_iso8601. Only converts each distinct date string once (results
+    are memoized for the life of the normalizer), sorts the new strings into format groups with regexes and
+    parses each group with a single pd.to_datetime call. Results are the same as convert_date_to_iso8601.
+    """
+
+    def __init__(self):
+
+        self._memo = {} # date string: iso8601 string
+
+    def convert(self, date) -> str:
+        # Memoized convert_date_to_iso8601 for a single value
+        date = str(date)
+        if date not in self._memo:
+            self._memo[date] = convert_date_to_iso8601(date)
+        return self._memo[date]
+
+    def normalize(self, dates: pd.Series) -> pd.Series:
+        """
+        Converts a column of dates to ISO 8601 strings. Raises the same ValueErrors as convert_date_to_iso8601
+        for dates in formats it can't handle.
+        """
+        date_strs = dates.map(str)
+        new_dates = [date for date in date_strs.unique() if date not in self._memo]
+
+        for date in new_dates:
+            if date in EMPTY_DATE_VALUES:
+                self._memo[date] = "missing: not provided"
+
+        # Group the remaining dates by format
+        not_parsed = []
+        format_groups = {name: [] for name, _, _, _ in DATE_FORMAT_PATTERNS}
+        for date in new_dates:
+            if date in self._memo:
+                continue
+            for name, pattern, _, _ in DATE_FORMAT_PATTERNS:
+                if pattern.match(date):
+                    format_groups[name].append(date)
+                    break
+            else:
+                not_parsed.append(date)
+
+        for name, _, date_format, has_time_component in DATE_FORMAT_PATTERNS:
+            group = pd.Series(format_groups[name], dtype=object)
+            if group.empty:
+                continue
+            parsed = pd.to_datetime(group, format=date_format, errors='coerce')
+            # Years like 0022 are out of range for pandas and go to the single value path to get fixed
+            ok = parsed.notna() & (parsed.dt.year >= 100)
+            if name == 'iso8601_z':
+                # Already in the right format, returned as is
+                converted = group[ok]
+            else:
+                converted = parsed[ok].dt.strftime(ISO8601_DATETIME_FORMAT if has_time_component else ISO8601_DATE_FORMAT)
+            self._memo.update(zip(group[ok], converted))
+            not_parsed.extend(group[~ok])
+
+        for date in not_parsed:
+            self._memo[date] = convert_date_to_iso8601(date)
+
+        return date_strs.map(self._memo)
+
+
+def format_timedeltas_iso8601(durations: pd.Series) -> pd.Series:
+    """
+    Formats a timedelta64 column as ISO 8601 durations, the same strings as isodate.duration_isoformat
+    (e.g. P1DT2H3M4S, PT30M, P0D, -P1D) built with array math instead of one call per row. NaT stays NaN.
+    """
+    if durations.empty:
+        return pd.Series(index=durations.index, dtype=object)
+
+    is_nat = durations.isna().to_numpy()
+    total_usecs = durations.fillna(pd.Timedelta(0)).to_numpy(dtype='timedelta64[us]').astype(np.int64)
+
+    is_negative = total_usecs < 0
+    seconds, usecs = np.divmod(np.abs(total_usecs), 1_000_000)
+    minutes, seconds = np.divmod(seconds, 60)
+    hours, minutes = np.divmod(minutes, 60)
+    days, hours = np.divmod(hours, 24)
+
+    def part(values: np.ndarray, designator: str) -> np.ndarray:
+        return np.where(values > 0, np.char.add(values.astype(str), designator), '')
+
+    # Seconds are written as 4S or 4.5S (trailing zeros of the microseconds dropped)
+    fractions = np.char.rstrip(np.char.zfill(usecs.astype(str), 6), '0')
+    second_values = np.where(usecs > 0, np.char.add(np.char.add(seconds.astype(str), '.'), fractions), seconds.astype(str))
+    has_seconds = (seconds > 0) | (usecs > 0)
+    second_part = np.where(has_seconds, np.char.add(second_values, 'S'), '')
+
+    has_time = (hours > 0) | (minutes > 0) | has_seconds
+    time_part = np.where(has_time, 'T', '')
+    for time_component in (part(hours, 'H'), part(minutes, 'M'), second_part):
+        time_part = np.char.add(time_part, time_component)
+
+    body = np.char.add(part(days, 'D'), time_part)
+    body = np.where(body == '', '0D', body)
+    iso_durations = np.char.add(np.where(is_negative, '-P', 'P'), body).astype(object)
+    iso_durations[is_nat] = np.nan
+
+    return pd.Series(iso_durations, index=durations.index)
+
+
+# One normalizer (and memo) shared by all of the mappers in the process
+_date_normalizer = DateNormalizer()
+
+
+def get_date_normalizer() -> DateNormalizer:
+    return _date_normalizer
@@ -1,8 +1,9 @@
 from .faire_mapper import OmeFaireMapper
-from faire_mapping.constants import marker_to_assay_mapping, marker_to_shorthand_mapping, mismatch_sample_names_metadata_to_raw_data_files_dict, update_cruise_codes
+from faire_mapping.constants import marker_to_assay_mapping, marker_to_shorthand_mapping, mismatch_sample_names_metadata_to_raw_data_files_dict
 from .custom_exception import NoAcceptableAssayMatch
 from pathlib import Path
-from faire_mapping.utils import str_replace_for_samps
+from faire_mapping.utils import str_replace_for_samps_series
+from faire_mapping.sample_name_rewrites import asv_samp_name_rewriter, cruise_code_rewriter, raw_data_lookup_samp_name_rewriter
 import yaml
 import pandas as pd
 import os
@@ -12,6 +13,7 @@ import hashlib
 import shutil 
 from faire_mapping.e_num_samps_to_update import wcoa_samp_e_nums, chaba_enums, OC0722_enums, QiAVATest_enums, oc0919_enums
 from faire_mapping.utils import load_google_sheet_as_df
+from faire_mapping.mapping_builders.mapping_registry import get_mapping_registry
 
 # TODO: update for PCR replicates? - MAke sample name the same, change lib_id?
 # TODO: add associatedSequences functionlity after submittting to NCBI
@@ -130,18 +132,9 @@ class ExperimentRunMetadataMapper(OmeFaireMapper):
 
     def _create_experiment_run_mapping_dict(self):
 
-        experiment_mapping_df = load_google_sheet_as_df(google_sheet_id=self.google_sheet_mapping_file_id, sheet_name=self.experiment_run_mapping_sheet_name, header=1, google_sheet_json_cred=self.json_creds)
-
-        # Group by the mapping type
-        group_by_mapping = experiment_mapping_df.groupby(self.mapping_file_mapped_type_column)
-
-        # Create nested dictionary {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.}
-        mapping_dict = {}
-        for mapping_value, group in group_by_mapping:
-            column_map_dict = {k: v for k, v in zip(group[self.mapping_file_FAIRe_column], group[self.mapping_file_metadata_column]) if pd.notna(v)}
-            mapping_dict[mapping_value] = column_map_dict
-        
-        return mapping_dict
+        # Nested dictionary {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.}, loaded once per process by the mapping registry
+        return get_mapping_registry().get_mapping_dict(google_sheet_mapping_file_id=self.google_sheet_mapping_file_id, sheet_name=self.experiment_run_mapping_sheet_name,
+                                                       header=1, google_sheet_json_cred=self.json_creds)
     
     def transform_pos_samp_name_in_metadata(self, metadata_row: pd.Series) -> str:
         # update positive sample names
@@ -164,7 +157,7 @@ class ExperimentRunMetadataMapper(OmeFaireMapper):
             exp_df = exp_df[~exp_df[self.run_metadata_marker_col_name].str.contains(pattern, case=True, na=False)]
       
         # Fix sample names that mismatch from sequencing metatdata, to raw files, to asv counts in the metadata file
-        exp_df[self.run_metadata_sample_name_column] = exp_df[self.run_metadata_sample_name_column].apply(str_replace_for_samps)
+        exp_df[self.run_metadata_sample_name_column] = str_replace_for_samps_series(exp_df[self.run_metadata_sample_name_column])
 
         # Change positive control sample names
         exp_df[self.run_metadata_sample_name_column] = exp_df.apply(
@@ -490,9 +483,7 @@ class ExperimentRunMetadataMapper(OmeFaireMapper):
                 sample_name = f'{self.run_name}.{marker}.POSITIVE.{sample_name}'
                 return sample_name
             else: # For regular samples
-                sample_name =  sample_name.replace('MP_', '').replace('_', '.').replace('.12S', '-12S').replace('Mid', 'MID').replace('DY2306', 'DY23-06').replace('DY2209', 'DY22-09').replace('DY2206', 'DY22-06') # replace .12S to -12S for SKQ23-12S samples.
-                for old, new in update_cruise_codes.items():
-                    sample_name = sample_name.replace(old, new)
+                sample_name = asv_samp_name_rewriter.rewrite(sample_name) # see sample_name_rewrites.ASV_SAMP_NAME_REWRITES
                 # update based on E number
                 sample_name = self._clean_asv_samp_names_by_e_num(sample_name=sample_name)
                 return sample_name
@@ -506,28 +497,11 @@ class ExperimentRunMetadataMapper(OmeFaireMapper):
             sample_name = sample_name.replace('POSITIVE', '')
             if 'ferret' in sample_name.lower():
                 sample_name = sample_name.replace('Ferret', 'Ferett')
-        # try diffierent (old cruise code) cruise code because it may have been updated
-        if '.DY20-12' in sample_name:
-            sample_name = sample_name.replace('.DY20-12', '.DY20')
-
-        if '.WCOA21' in sample_name:
-            sample_name = sample_name.replace('.WCOA21', '')
-
-        if '.SKQ21-15S' in sample_name:
-            sample_name = sample_name.replace('.SKQ21-15S', '.SKQ2021')
-        
-        else:
-            for old, new in update_cruise_codes.items():
-                sample_name = sample_name.replace(new, old)
-                sample_name = sample_name.replace('.OC1021_ce', '.OC1021') # Needs to be added because same old cruise code as a different batch of samples that got different new name
-     
-   
-        return sample_name
+        # try diffierent (old cruise code) cruise code because it may have been updated (see sample_name_rewrites.RAW_DATA_LOOKUP_SAMP_NAME_REWRITES)
+        return raw_data_lookup_samp_name_rewriter.rewrite(sample_name)
     
     def _fix_sample_names_for_asv_lookup(self, sample_name: str) -> str:
-        for old, new in update_cruise_codes.items():
-            sample_name = sample_name.replace(old, new)
-        return sample_name
+        return cruise_code_rewriter.rewrite(sample_name)
 
     def _read_asv_counts_tsv(self, asv_tsv_file: str) -> pd.DataFrame:
         # Reads the asv counts tsv and returns a df
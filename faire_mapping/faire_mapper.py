@@ -11,6 +11,9 @@ import yaml
 import re
 import numpy as np
 from .custom_exception import ControlledVocabDoesNotExistError
+from .controlled_vocab_index import ControlledVocabIndex
+from .faire_template_cache import get_faire_template_cache
+from .date_normalizer import get_date_normalizer
 from faire_mapping.constants import faire_int_cols
 import gspread #library that makes it easy for us to interact with the sheet
 from google.oauth2.service_account import Credentials
@@ -61,6 +64,7 @@ class OmeFaireMapper:
                                      "missing: restricted access: human-identifiable", 
                                      "missing: restricted access"
                                      ]
+        self.controlled_vocab_index = ControlledVocabIndex(drop_down_value_df=self.drop_down_value_df, faire_missing_values=self.faire_missing_values)
 
     def load_config(self, config_path):
         # Load configuration yaml file
@@ -70,8 +74,9 @@ class OmeFaireMapper:
             
     def load_faire_template_as_df(self, file_path: Path, sheet_name: str, header: int) -> pd.DataFrame:
         # Load FAIRe excel template as a data frame based on the specified template sheet name
+        # Each sheet is only parsed once per workbook version (cached in memory and on disk)
         
-        return pd.read_excel(file_path, sheet_name=sheet_name, header=header)
+        return get_faire_template_cache().load_sheet(file_path=file_path, sheet_name=sheet_name, header=header)
     
     # def load_csv_as_df(self, file_path: Path, header=0, sep=',') -> pd. DataFrame:
     #     # Load csv files as a data frame
@@ -86,41 +91,26 @@ class OmeFaireMapper:
     
     def extract_controlled_vocab(self, faire_attribute: str) -> list:
         
-        # filter dataframe by the FAIRe attribute and get all allowable terms
-        filtered_row = self.drop_down_value_df[self.drop_down_value_df['term_name'] == faire_attribute]
-        # Get a list of columns that have the vocabulary in them
-        vocab_columns = [col for col in filtered_row.columns if ('vocab' in col and '_' not in col)]
         # Get a list of the controlled vocabulary by FAIRe attribute term name
-        controlled_vocab = [vocab_word for vocab_word in filtered_row[vocab_columns].values.flatten() if pd.notna(vocab_word)]
-
-        return controlled_vocab
+        return self.controlled_vocab_index.get_vocab(faire_attribute=faire_attribute)
      
     def check_cv_word(self, value: str, faire_attribute: str) -> dict:
         # Check a word in a list of the controlled voabulary for a FAIRe attribute to see if it exists (accounts for any updates)
         # and if it does, will add to the new row.
         
-        controlled_vocab = self.extract_controlled_vocab(faire_attribute=faire_attribute)
-        # make static_value a list (to account for more than one value as the static_value)
+        new_value, invalid_words = self.controlled_vocab_index.check_value(value=value, faire_attribute=faire_attribute)
 
-        value = value.split(' | ') if '|' in value else [value]
+        for word in invalid_words:
+            warnings.warn(f'The following {faire_attribute} does not exist in the FAIRe standard controlled vocabulary: {word}, the allowed values are {self.extract_controlled_vocab(faire_attribute=faire_attribute)}')
 
-        for word in value:
-            if word not in controlled_vocab and word not in self.faire_missing_values and 'other:' not in word:
-                warnings.warn(f'The following {faire_attribute} does not exist in the FAIRe standard controlled vocabulary: {word}, the allowed values are {controlled_vocab}')
-            else:
-                new_value = ' | '.join(value)
-                return new_value
+        return new_value
     
     def apply_exact_mappings(self, df: pd.DataFrame, faire_col: str, metadata_col: str) -> pd.Series:
         ## Updated for new structure
 
-        if faire_col in self.drop_down_value_df['term_name'].values:
-            return df[metadata_col].apply(
-                lambda value: self.check_cv_word(
-                    value=value,
-                    faire_attribute=faire_col
-                )
-            )
+        if faire_col in self.controlled_vocab_index:
+            # checks each distinct value once and warns once for the whole column
+            return self.controlled_vocab_index.validate_column(values=df[metadata_col], faire_attribute=faire_col)
         else:
             return df[metadata_col]
     
@@ -128,7 +118,7 @@ class OmeFaireMapper:
         # Updated for new structure
 
         # check controlled vocabulary if column uses controlled vocabulary
-        if faire_col in self.drop_down_value_df['term_name'].values:
+        if faire_col in self.controlled_vocab_index:
             checked_value = self.check_cv_word(value=static_value, faire_attribute=faire_col)
         else:
             checked_value = static_value
@@ -175,7 +165,34 @@ class OmeFaireMapper:
                     return ''
             else:
                 return ''
-            
+
+    def map_using_fallback_cols(self, desired_values: pd.Series, use_if_na_values: pd.Series,
+                                use_if_second_na_values: pd.Series = None, transform_use_col_to_date_format=False) -> pd.Series:
+        # Column version of map_using_two_or_three_cols_if_one_is_na_use_other. Takes the first value that isn't NA or ''
+        # from the desired, use if na, then use if second na columns (use_if_second_na_values is None if there isn't a third col)
+        has_desired = desired_values.notna() & (desired_values != '')
+        has_use_if_na = use_if_na_values.notna() & (use_if_na_values != '')
+
+        if not transform_use_col_to_date_format:
+            # the third column is used as is, even if it is empty
+            last_resort = use_if_second_na_values if use_if_second_na_values is not None else ''
+            return desired_values.where(has_desired, use_if_na_values.where(has_use_if_na, last_resort))
+
+        chosen_values = desired_values.where(has_desired, use_if_na_values)
+        has_chosen = has_desired | has_use_if_na
+        if use_if_second_na_values is not None:
+            has_second = use_if_second_na_values.notna() & (use_if_second_na_values != '')
+            chosen_values = chosen_values.where(has_chosen, use_if_second_na_values)
+            has_chosen = has_chosen | has_second
+            # nothing is returned (None) if all three are empty
+            mapped_values = pd.Series([None] * len(desired_values), index=desired_values.index, dtype=object)
+        else:
+            mapped_values = pd.Series('', index=desired_values.index, dtype=object)
+
+        has_chosen = has_chosen.to_numpy()
+        mapped_values[has_chosen] = self.convert_dates_to_iso8601(chosen_values[has_chosen]).to_numpy()
+        return mapped_values
+
     def map_constant_based_on_presence_of_cols(self, metadata_row: pd.Series, primary_col_name: str,
                                                primary_col_present_constant_val: str, secondary_col_name: str, 
                                                secondary_col_present_constant_val: str) -> str:
@@ -198,82 +215,12 @@ class OmeFaireMapper:
         # also converts strings from 5/1/2024 to 2024-01-05T00:00:00Z
         # And coverts 2024-05-01 to 2024-01-05T00:00:00Z
         # Also handles years like 0022 and corrects them to 2022
-        has_time_component = False
+        # Memoized, so repeated dates (e.g. the same cast timestamp) are only converted once
+        return get_date_normalizer().convert(date)
 
-        date = str(date)
-        
-        if date in  ['None', 'nan', 'missing: not collected', '', 'missing: not provided']:
-            return "missing: not provided"
-
-        # 1. Handle full ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ) and return immediately
-        try: 
-            # Use the correct format including T and Z
-            datetime.strptime(date, "%Y-%m-%dT%H:%M:%SZ")
-            return date
-        except ValueError: 
-            pass # Not that format, continue to check others
-
-        # 2. Check for other supported formats
-        
-        # Format 2021/11/08 00:00:00
-        if "/" in date and ":" in date: 
-            dt_obj = datetime.strptime(date, "%Y/%m/%d %H:%M:%S")
-            has_time_component = True
-            
-        # Format 5/1/2024 or 5/1/24
-        elif "/" in date and ":" not in date: 
-            try: # 5/1/2024 format
-                dt_obj = datetime.strptime(date, "%m/%d/%Y")
-            except ValueError:
-                try: # foramt 5/1/24
-                    dt_obj = datetime.strptime(date, "%m/%d/%y")
-                except ValueError:
-                    raise ValueError(f"Unsupported slash-separated dae format: {date}")
-        
-        # --- FIX APPLIED HERE: Handle all dash-separated formats gracefully ---
-        elif "-" in date:
-            if ':' in date:
-                # 2.1. Try ISO-like T-separated time (e.g., 2023-04-24T08:51:00)
-                try:
-                    dt_obj = datetime.strptime(date, "%Y-%m-%dT%H:%M:%S")
-                    has_time_component = True
-                except ValueError:
-                    # 2.2. Fallback: Try space-separated time (e.g., 2023-04-24 08:51:00)
-                    try:
-                        dt_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
-                        has_time_component = True
-                    except ValueError:
-                        try:
-                            # %z handles the +00:00 or +0000 part
-                            dt_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S%z")
-                            has_time_component = True
-                        except ValueError:
-                            try:
-                            # Try usin dateutil library
-                                from dateutil import parser
-                                dt_obj=parser.parse(date)
-                                return dt_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
-                            except ValueError:
-                                # Failed both time formats, raise error
-                                raise ValueError(f"Unsupported dash-separated date/time format: {date}")
-            else:
-                # 2.3. Date-only format (e.g., 2024-04-10)
-                dt_obj = datetime.strptime(date, "%Y-%m-%d")
-        # ---------------------------------------------------------------------
-
-        else:
-            raise ValueError(f"Unsupported date format: {date}")
-        
-        # Correct years that are clearly wrong (like 0022 -> 2022)
-        if dt_obj.year < 100:
-            corrected_year = 2000 + dt_obj.year
-            dt_obj = dt_obj.replace(year=corrected_year)
-
-        # Only add time component if it was in the original string
-        if has_time_component:
-            return dt_obj.strftime("%Y-%m-%dT%H:%M:%SZ")
-        else:
-            return dt_obj.strftime("%Y-%m-%d")
+    def convert_dates_to_iso8601(self, dates: pd.Series) -> pd.Series:
+        # Column version of convert_date_to_iso8601, converts each distinct date once and parses by format group
+        return get_date_normalizer().normalize(dates)
 
     def fix_int_cols(self, df:pd.DataFrame) -> pd.DataFrame:
         # converts columns that are int to so will not save as float. May need to update list in .lists
@@ -0,0 +1,87 @@
+from pathlib import Path
+import hashlib
+import logging
+import os
+import pickle
+import re
+import pandas as pd
+from faire_mapping.utils import FAIRE_MAPPING_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# One cache per cache_dir for the life of the process
+_template_cache = {}
+
+
+class FaireTemplateCache:
+    """
+    Serves sheets of the FAIRe excel template without re-parsing the workbook with openpyxl every time.
+    Each sheet is parsed once and kept in memory for the process, and pickled to cache_dir keyed by the
+    workbook's content hash so other runs can skip the parse as well. Editing the workbook changes the
+    hash, so stale sheets are never served.
+    """
+
+    def __init__(self, cache_dir: str = None):
+
+        self.cache_dir = Path(cache_dir) if cache_dir else FAIRE_MAPPING_CACHE_DIR / "faire_templates"
+        self._sheets = {} # (content_hash, sheet_name, header): df
+        self._hashes = {} # (path, mtime, size): content_hash
+
+    def content_hash(self, file_path: str) -> str:
+        # Hashes the workbook bytes, only re-hashing if the file was modified
+        file_path = Path(file_path).resolve()
+        stat = file_path.stat()
+        stat_key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        if stat_key not in self._hashes:
+            with open(file_path, 'rb') as f:
+                self._hashes[stat_key] = hashlib.sha256(f.read()).hexdigest()
+        return self._hashes[stat_key]
+
+    def _sheet_cache_path(self, content_hash: str, sheet_name: str, header: int) -> Path:
+        safe_sheet_name = re.sub(r'[^A-Za-z0-9_-]+', '_', str(sheet_name))
+        return self.cache_dir / f"{content_hash[:16]}_{safe_sheet_name}_{header}.pkl"
+
+    def load_sheet(self, file_path: str, sheet_name: str, header: int) -> pd.DataFrame:
+        """
+        Returns the sheet as a DataFrame (same as pd.read_excel(file_path, sheet_name=sheet_name, header=header)).
+        A copy is returned so callers can modify it without changing the cached sheet.
+        """
+        content_hash = self.content_hash(file_path)
+        key = (content_hash, sheet_name, header)
+
+        if key not in self._sheets:
+            cache_path = self._sheet_cache_path(content_hash, sheet_name, header)
+            df = None
+            if cache_path.exists():
+                try:
+                    with open(cache_path, 'rb') as f:
+                        df = pickle.load(f)
+                except Exception as e:
+                    logger.warning(f"Could not read cached FAIRe template sheet {cache_path} ({e}), re-parsing {file_path}")
+            if df is None:
+                df = pd.read_excel(file_path, sheet_name=sheet_name, header=header)
+                self._write_sheet(df=df, cache_path=cache_path)
+            self._sheets[key] = df
+
+        return self._sheets[key].copy()
+
+    def _write_sheet(self, df: pd.DataFrame, cache_path: Path) -> None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            # The cache is only an optimization, keep going with the parsed sheet
+            logger.warning(f"Could not write FAIRe template sheet cache {cache_path}: {e}")
+
+
+def get_faire_template_cache(cache_dir: str = None) -> FaireTemplateCache:
+    """
+    Returns the process wide FaireTemplateCache for cache_dir, creating it on first use.
+    """
+    key = str(cache_dir)
+    if key not in _template_cache:
+        _template_cache[key] = FaireTemplateCache(cache_dir=cache_dir)
+    return _template_cache[key]
@@ -0,0 +1,158 @@
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import pandas as pd
+from faire_mapping.google_sheets_session import GoogleSheetsSession
+
+logger = logging.getLogger(__name__)
+
+# Set to 1/true/yes to only use the local snapshots (no Google API requests)
+OFFLINE_ENV_VAR = "FAIRE_MAPPING_OFFLINE"
+
+# One store per cache_dir for the life of the process
+_snapshot_stores = {}
+_snapshot_stores_lock = threading.Lock()
+# Set by set_offline_mode (e.g. from a --offline command line flag), overrides the environment variable
+_offline_mode = None
+
+
+def set_offline_mode(offline: bool = True) -> None:
+    global _offline_mode
+    _offline_mode = offline
+
+
+def offline_mode_enabled() -> bool:
+    """
+    Offline if set_offline_mode(True) was called or FAIRE_MAPPING_OFFLINE is set
+    """
+    if _offline_mode is not None:
+        return _offline_mode
+    return os.environ.get(OFFLINE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+class GoogleSheetSnapshotStore:
+    """
+    Local mirror of the Google Sheets the mappers read. Each worksheet (google_sheet_id, sheet_name, header) is
+    stored as a parquet file next to a json file with the spreadsheet's Drive modifiedTime when it was downloaded.
+    A worksheet is only downloaded again when the spreadsheet's modifiedTime changed, which is one cheap Drive
+    metadata request per spreadsheet per process. In offline mode only the snapshots are used.
+    """
+
+    def __init__(self, cache_dir: str):
+
+        self.cache_dir = Path(cache_dir)
+        self._revisions = {} # google_sheet_id: modifiedTime (None if it could not be looked up)
+        self._lock = threading.Lock()
+
+    def _snapshot_paths(self, google_sheet_id: str, sheet_name: str, header: int):
+        sheet_hash = hashlib.sha256(f"{sheet_name}\x1f{header}".encode()).hexdigest()[:16]
+        snapshot_path = self.cache_dir / google_sheet_id / f"{sheet_hash}.parquet"
+        return snapshot_path, snapshot_path.with_suffix('.json')
+
+    def revision(self, session: GoogleSheetsSession, google_sheet_id: str) -> Optional[str]:
+        """
+        Returns the spreadsheet's Drive modifiedTime, looked up once per process. None if it could not be looked up
+        (e.g. the Drive API is not enabled for the service account), then the worksheets are always downloaded.
+        """
+        with self._lock:
+            if google_sheet_id in self._revisions:
+                return self._revisions[google_sheet_id]
+        try:
+            revision = session.get_modified_time(google_sheet_id)
+        except Exception as e:
+            logger.warning(f"Could not look up the Drive revision of {google_sheet_id} ({e}), downloading it")
+            revision = None
+        with self._lock:
+            return self._revisions.setdefault(google_sheet_id, revision)
+
+    def load(self, google_sheet_id: str, sheet_name: str, header: int, revision: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Returns the snapshot of the worksheet, or None if there isn't one. If revision is given, the snapshot must
+        have been taken at that revision.
+        """
+        snapshot_path, meta_path = self._snapshot_paths(google_sheet_id, sheet_name, header)
+        if not snapshot_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if revision is not None and meta.get('revision') != revision:
+                return None
+            df = pd.read_parquet(snapshot_path)
+        except Exception as e:
+            logger.warning(f"Could not read the snapshot of {sheet_name} ({google_sheet_id}): {e}")
+            return None
+        # Sheet headers can be blank or repeated, so the columns are stored by position and named from the json
+        df.columns = meta['columns']
+        return df
+
+    def save(self, google_sheet_id: str, sheet_name: str, header: int, df: pd.DataFrame, revision: Optional[str]) -> None:
+        snapshot_path, meta_path = self._snapshot_paths(google_sheet_id, sheet_name, header)
+        meta = {'google_sheet_id': google_sheet_id, 'sheet_name': sheet_name, 'header': header,
+                'revision': revision, 'columns': [str(col) for col in df.columns]}
+        try:
+            snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = snapshot_path.with_suffix(f'.{os.getpid()}.tmp')
+            df.set_axis([str(i) for i in range(df.shape[1])], axis=1).to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, snapshot_path)
+            tmp_path = meta_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp_path, meta_path)
+        except Exception as e:
+            # The snapshot is only an optimization, the downloaded df is still used
+            logger.warning(f"Could not write the snapshot of {sheet_name} ({google_sheet_id}) to {snapshot_path}: {e}")
+
+    def load_sheets_as_dfs(self, session: GoogleSheetsSession, google_sheet_id: str, sheet_headers: Dict[str, int]) -> Dict[str, pd.DataFrame]:
+        """
+        Loads several worksheets of a spreadsheet as data frames, from the snapshots if the spreadsheet
+        has not changed since they were taken, otherwise downloads them (in one request) and updates the snapshots.
+        """
+        if offline_mode_enabled():
+            dfs = {}
+            for sheet_name, header in sheet_headers.items():
+                df = self.load(google_sheet_id=google_sheet_id, sheet_name=sheet_name, header=header)
+                if df is None:
+                    raise ValueError(f"Running offline but there is no snapshot of the {sheet_name} sheet of {google_sheet_id} "
+                                     f"in {self.cache_dir}. Run once without offline mode to download it.")
+                dfs[sheet_name] = df
+            return dfs
+
+        revision = self.revision(session=session, google_sheet_id=google_sheet_id)
+        dfs = {}
+        if revision is not None:
+            for sheet_name, header in sheet_headers.items():
+                df = self.load(google_sheet_id=google_sheet_id, sheet_name=sheet_name, header=header, revision=revision)
+                if df is not None:
+                    dfs[sheet_name] = df
+
+        changed_sheet_headers = {sheet_name: header for sheet_name, header in sheet_headers.items() if sheet_name not in dfs}
+        if changed_sheet_headers:
+            downloaded_dfs = session.load_sheets_as_dfs(google_sheet_id=google_sheet_id, sheet_headers=changed_sheet_headers)
+            for sheet_name, df in downloaded_dfs.items():
+                self.save(google_sheet_id=google_sheet_id, sheet_name=sheet_name, header=changed_sheet_headers[sheet_name],
+                          df=df, revision=revision)
+            dfs.update(downloaded_dfs)
+
+        return {sheet_name: dfs[sheet_name] for sheet_name in sheet_headers}
+
+    def clear(self) -> None:
+        for path in list(self.cache_dir.glob("*/*.parquet")) + list(self.cache_dir.glob("*/*.json")):
+            path.unlink()
+        with self._lock:
+            self._revisions = {}
+
+
+def get_google_sheet_snapshot_store(cache_dir: str) -> GoogleSheetSnapshotStore:
+    """
+    Returns the process wide GoogleSheetSnapshotStore for cache_dir, creating it on first use.
+    """
+    key = str(cache_dir)
+    with _snapshot_stores_lock:
+        if key not in _snapshot_stores:
+            _snapshot_stores[key] = GoogleSheetSnapshotStore(cache_dir=cache_dir)
+        return _snapshot_stores[key]
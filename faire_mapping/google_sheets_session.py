@@ -0,0 +1,119 @@
+from typing import Dict, List
+import logging
+import threading
+import time
+import pandas as pd
+import gspread
+from gspread.utils import absolute_range_name, fill_gaps
+from google.oauth2.service_account import Credentials
+
+logger = logging.getLogger(__name__)
+
+# drive.metadata.readonly is only used to look up when a spreadsheet was last modified (see google_sheet_snapshots)
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly', 'https://www.googleapis.com/auth/drive.metadata.readonly']
+
+# Sheets API requests in flight at once per session, so concurrent readers (e.g. the extraction sheets) stay
+# under the per minute read quota
+SHEETS_MAX_CONCURRENT_REQUESTS = 4
+# Retries (with exponential backoff starting at 2 seconds) when a request is rejected for exceeding the quota
+SHEETS_QUOTA_RETRIES = 5
+
+# One session per credentials file for the life of the process
+_sheets_sessions = {}
+_sheets_sessions_lock = threading.Lock()
+
+
+class GoogleSheetsSession:
+    """
+    Shared access to Google Sheets for one service account credentials file. The client is authorized once and
+    each spreadsheet is opened once (opening fetches the spreadsheet metadata), and several worksheets of the
+    same spreadsheet can be read with one values_batch_get request instead of one request per worksheet.
+    """
+
+    def __init__(self, google_sheet_json_cred: str):
+
+        self.google_sheet_json_cred = google_sheet_json_cred
+        self._client = None
+        self._spreadsheets = {} # google_sheet_id: gspread.Spreadsheet
+        self._lock = threading.Lock()
+        self._request_slots = threading.BoundedSemaphore(SHEETS_MAX_CONCURRENT_REQUESTS)
+
+    @property
+    def client(self) -> gspread.Client:
+        with self._lock:
+            if self._client is None:
+                creds = Credentials.from_service_account_file(self.google_sheet_json_cred, scopes=SHEETS_SCOPES)
+                self._client = gspread.authorize(creds)
+            return self._client
+
+    def request(self, request_fn, *args, **kwargs):
+        """
+        Runs a gspread call that makes an API request, waiting for one of the session's request slots and
+        backing off and retrying if the request was rejected for exceeding the quota (429)
+        """
+        for attempt in range(SHEETS_QUOTA_RETRIES + 1):
+            with self._request_slots:
+                try:
+                    return request_fn(*args, **kwargs)
+                except gspread.exceptions.APIError as e:
+                    if e.code != 429 or attempt == SHEETS_QUOTA_RETRIES:
+                        raise
+            wait_seconds = 2 ** (attempt + 1)
+            logger.warning(f"Google Sheets API quota exceeded, retrying in {wait_seconds} seconds")
+            time.sleep(wait_seconds)
+
+    def spreadsheet(self, google_sheet_id: str) -> gspread.Spreadsheet:
+        with self._lock:
+            spreadsheet = self._spreadsheets.get(google_sheet_id)
+        if spreadsheet is None:
+            # Opened outside of the lock so different spreadsheets can be opened at the same time
+            spreadsheet = self.request(self.client.open_by_key, google_sheet_id)
+            with self._lock:
+                spreadsheet = self._spreadsheets.setdefault(google_sheet_id, spreadsheet)
+        return spreadsheet
+
+    def get_modified_time(self, google_sheet_id: str) -> str:
+        """
+        Returns the spreadsheet's Drive modifiedTime (changes with every edit) without downloading any values
+        """
+        return self.request(self.client.http_client.get_file_drive_metadata, google_sheet_id)['modifiedTime']
+
+    def get_values(self, google_sheet_id: str, sheet_names: List[str]) -> Dict[str, List[List[str]]]:
+        """
+        Returns {sheet_name: all of the worksheet's values} (the same values as worksheet.get_all_values()) for
+        several worksheets of a spreadsheet in one request
+        """
+        spreadsheet = self.spreadsheet(google_sheet_id)
+        try:
+            response = self.request(spreadsheet.values_batch_get, [absolute_range_name(sheet_name) for sheet_name in sheet_names])
+        except gspread.exceptions.APIError as e:
+            # e.g. one of the worksheets doesn't exist, read them one at a time so the error names the worksheet
+            logger.warning(f"Could not batch read {sheet_names} from {google_sheet_id} ({e}), reading them one at a time")
+            return {sheet_name: self.request(lambda name: spreadsheet.worksheet(name).get_all_values(), sheet_name)
+                    for sheet_name in sheet_names}
+
+        return {sheet_name: fill_gaps(value_range.get('values', [[]]))
+                for sheet_name, value_range in zip(sheet_names, response['valueRanges'])}
+
+    def load_sheets_as_dfs(self, google_sheet_id: str, sheet_headers: Dict[str, int]) -> Dict[str, pd.DataFrame]:
+        """
+        Loads several worksheets of a spreadsheet as data frames with one request. sheet_headers is
+        {sheet_name: header row}.
+        """
+        sheet_values = self.get_values(google_sheet_id=google_sheet_id, sheet_names=list(sheet_headers))
+
+        dfs = {}
+        for sheet_name, header in sheet_headers.items():
+            values = sheet_values[sheet_name]
+            dfs[sheet_name] = pd.DataFrame(values[header+1:], columns=values[header])
+        return dfs
+
+
+def get_google_sheets_session(google_sheet_json_cred: str) -> GoogleSheetsSession:
+    """
+    Returns the process wide GoogleSheetsSession for the credentials file, creating it on first use.
+    """
+    with _sheets_sessions_lock:
+        if google_sheet_json_cred not in _sheets_sessions:
+            _sheets_sessions[google_sheet_json_cred] = GoogleSheetsSession(google_sheet_json_cred=google_sheet_json_cred)
+        return _sheets_sessions[google_sheet_json_cred]
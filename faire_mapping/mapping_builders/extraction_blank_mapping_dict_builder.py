@@ -1,6 +1,6 @@
 import pandas as pd
 from faire_mapping.mapping_builders.base_mapping_builder import BaseMappingBuilder
-from faire_mapping.utils import load_google_sheet_as_df
+from faire_mapping.mapping_builders.mapping_registry import get_mapping_registry
 
 class ExtractionBlankMappingDictBuilder(BaseMappingBuilder):
     """
@@ -17,18 +17,9 @@ class ExtractionBlankMappingDictBuilder(BaseMappingBuilder):
 
     def create_extraction_blank_mapping_dict(self) -> dict:
         # Creates a mapping dict for extraction blanks - mapping will be the same for only extractions faire attributes
-        extractions_mapping_df = load_google_sheet_as_df(
-            google_sheet_id=self.google_sheet_mapping_file_id, sheet_name=self.EXTRACT_MAPPING_SHEET_NAME, header=1, google_sheet_json_cred=self.google_sheet_json_cred)
-
-        group_by_mapping = extractions_mapping_df.groupby(
-            self.MAPPING_FILE_MAPPED_TYPE_COL)
-
-        # Create nested dictionary {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.}
-        mapping_dict = {}
-        for mapping_value, group in group_by_mapping:
-            column_map_dict = {k: v for k, v in zip(
-                group[self.MAPPING_FILE_FAIRE_FIELD_COL], group[self.MAPPING_FILE_METADATA_FIELD_NAME_COL]) if pd.notna(v)}
-            mapping_dict[mapping_value] = column_map_dict
+        # {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.} (a copy, so the overrides below don't change the shared one)
+        mapping_dict = get_mapping_registry().get_mapping_dict(
+            google_sheet_mapping_file_id=self.google_sheet_mapping_file_id, sheet_name=self.EXTRACT_MAPPING_SHEET_NAME, header=1, google_sheet_json_cred=self.google_sheet_json_cred)
 
         # If there is an exact mapping for samp_vol_we_dna_ext then remove and put constant value base on config file value
         if self.FAIRE_SAMP_VOL_WE_DNA_EXT_COL_NAME in mapping_dict[self.EXACT_MAPPING]:
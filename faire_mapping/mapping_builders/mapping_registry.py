@@ -0,0 +1,78 @@
+from typing import Dict
+import threading
+import pandas as pd
+from faire_mapping.mapping_builders.base_mapping_builder import BaseMappingBuilder
+from faire_mapping.utils import load_google_sheets_as_dfs
+
+# One registry for the life of the process, so every cruise of a project shares the mapping tabs
+_mapping_registry = None
+_mapping_registry_lock = threading.Lock()
+
+
+class MappingSheetRegistry:
+    """
+    Loads each tab of a mapping google sheet once per process and keeps it as the nested mapping dict
+    {mapping_type: {faire_col: source_name_or_constant}}, keyed by (google_sheet_mapping_file_id, sheet_name, header).
+    The builders get their own copy of the dict because they update it (e.g. the NC and extraction blank overrides,
+    the extraction column renames).
+    """
+
+    def __init__(self):
+
+        self._mapping_dicts = {} # (google_sheet_mapping_file_id, sheet_name, header): mapping dict
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create_mapping_dict(mapping_df: pd.DataFrame) -> dict:
+        # Create nested dictionary {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.}
+        mapping_dict = {}
+        for mapping_value, group in mapping_df.groupby(BaseMappingBuilder.MAPPING_FILE_MAPPED_TYPE_COL):
+            column_map_dict = {k: v for k, v in zip(
+                group[BaseMappingBuilder.MAPPING_FILE_FAIRE_FIELD_COL], group[BaseMappingBuilder.MAPPING_FILE_METADATA_FIELD_NAME_COL]) if pd.notna(v)}
+            mapping_dict[mapping_value] = column_map_dict
+        return mapping_dict
+
+    @staticmethod
+    def copy_mapping_dict(mapping_dict: dict) -> dict:
+        return {mapping_type: dict(col_dict) for mapping_type, col_dict in mapping_dict.items()}
+
+    def get_mapping_dicts(self, google_sheet_mapping_file_id: str, sheet_headers: Dict[str, int], google_sheet_json_cred: str) -> Dict[str, dict]:
+        """
+        Returns {sheet_name: mapping dict} for several tabs of the mapping google sheet (sheet_headers is {sheet_name: header}).
+        Tabs that haven't been loaded yet are read with one request.
+        """
+        with self._lock:
+            missing_sheet_headers = {sheet_name: header for sheet_name, header in sheet_headers.items()
+                                     if (google_sheet_mapping_file_id, sheet_name, header) not in self._mapping_dicts}
+        if missing_sheet_headers:
+            mapping_dfs = load_google_sheets_as_dfs(google_sheet_id=google_sheet_mapping_file_id, sheet_headers=missing_sheet_headers,
+                                                    google_sheet_json_cred=google_sheet_json_cred)
+            with self._lock:
+                for sheet_name, header in missing_sheet_headers.items():
+                    self._mapping_dicts.setdefault((google_sheet_mapping_file_id, sheet_name, header), self.create_mapping_dict(mapping_dfs[sheet_name]))
+
+        with self._lock:
+            return {sheet_name: self.copy_mapping_dict(self._mapping_dicts[(google_sheet_mapping_file_id, sheet_name, header)])
+                    for sheet_name, header in sheet_headers.items()}
+
+    def get_mapping_dict(self, google_sheet_mapping_file_id: str, sheet_name: str, header: int, google_sheet_json_cred: str) -> dict:
+        """
+        Returns a copy of the mapping dict for one tab of the mapping google sheet
+        """
+        return self.get_mapping_dicts(google_sheet_mapping_file_id=google_sheet_mapping_file_id, sheet_headers={sheet_name: header},
+                                      google_sheet_json_cred=google_sheet_json_cred)[sheet_name]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mapping_dicts = {}
+
+
+def get_mapping_registry() -> MappingSheetRegistry:
+    """
+    Returns the process wide MappingSheetRegistry, creating it on first use.
+    """
+    global _mapping_registry
+    with _mapping_registry_lock:
+        if _mapping_registry is None:
+            _mapping_registry = MappingSheetRegistry()
+        return _mapping_registry
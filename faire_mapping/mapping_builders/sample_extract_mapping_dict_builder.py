@@ -1,6 +1,6 @@
 import pandas as pd
 from faire_mapping.mapping_builders.base_mapping_builder import BaseMappingBuilder
-from faire_mapping.utils import load_google_sheet_as_df
+from faire_mapping.mapping_builders.mapping_registry import get_mapping_registry
 
 class SampleExtractionMappingDictBuilder(BaseMappingBuilder):
     """
@@ -20,24 +20,17 @@ class SampleExtractionMappingDictBuilder(BaseMappingBuilder):
         # extraction_sheet_separate used for orphan data where Sean made the mapping for extractions part of the same sheet.
         # Is usually separate for other mappings.
 
-        # First concat sample_mapping_df with extractions_mapping_df
-        sample_mapping_df = load_google_sheet_as_df(
-            google_sheet_id=self.google_sheet_mapping_file_id, sheet_name=self.SAMPLE_MAPPING_SHEET_NAME, header=0, google_sheet_json_cred=self.google_sheet_json_cred)
-        
-        extractions_mapping_df = load_google_sheet_as_df(
-            google_sheet_id=self.google_sheet_mapping_file_id, sheet_name=self.EXTRACT_MAPPING_SHEET_NAME, header=1, google_sheet_json_cred=self.google_sheet_json_cred)
-        
-        mapping_df = pd.concat([sample_mapping_df, extractions_mapping_df])
+        # Combine the sample mapping with the extractions mapping (extraction mappings win if a faire field is in both)
+        # Both tabs are loaded once per process by the mapping registry
+        mapping_dicts = get_mapping_registry().get_mapping_dicts(
+            google_sheet_mapping_file_id=self.google_sheet_mapping_file_id,
+            sheet_headers={self.SAMPLE_MAPPING_SHEET_NAME: 0, self.EXTRACT_MAPPING_SHEET_NAME: 1},
+            google_sheet_json_cred=self.google_sheet_json_cred)
+        sample_mapping_dict = mapping_dicts[self.SAMPLE_MAPPING_SHEET_NAME]
+        extractions_mapping_dict = mapping_dicts[self.EXTRACT_MAPPING_SHEET_NAME]
 
-        # Group by the mapping type
-        group_by_mapping = mapping_df.groupby(
-            self.MAPPING_FILE_MAPPED_TYPE_COL)
-
-        # Create nested dictionary {exact_mapping: {faire_col: metadata_col}, narrow_mapping: {faire_col: metadta_col}, etc.}
         mapping_dict = {}
-        for mapping_value, group in group_by_mapping:
-            column_map_dict = {k: v for k, v in zip(
-                group[self.MAPPING_FILE_FAIRE_FIELD_COL], group[self.MAPPING_FILE_METADATA_FIELD_NAME_COL]) if pd.notna(v)}
-            mapping_dict[mapping_value] = column_map_dict
+        for mapping_value in sorted(set(sample_mapping_dict) | set(extractions_mapping_dict)):
+            mapping_dict[mapping_value] = {**sample_mapping_dict.get(mapping_value, {}), **extractions_mapping_dict.get(mapping_value, {})}
 
-        return mapping_dict
\ No newline at end of file
+        return mapping_dict
@@ -1,19 +1,25 @@
 from .faire_mapper import OmeFaireMapper
 from pathlib import Path
 from datetime import datetime
+import hashlib
+import json
 import isodate
 import pandas as pd
 import yaml
 import requests
 import numpy as np
-import xarray as xr
-import geopandas as gpd
 import gsw
-from shapely.geometry import Point
+from typing import Callable
 # from geopy.distance import geodesic
 # from bs4 import BeautifulSoup
 from faire_mapping.custom_exception import NoInsdcGeoLocError
 from faire_mapping.constants import nc_faire_field_cols
+from faire_mapping.spatial import get_marine_region_index, get_gebco_bathymetry, gebco_fingerprint, marine_region_fingerprint
+from faire_mapping.scrapers import InsdcGeoLocationStore
+from faire_mapping.date_normalizer import EMPTY_DATE_VALUES, format_timedeltas_iso8601
+from faire_mapping.utils import values_to_ints, values_to_floats, round_floats
+from faire_mapping.transformers.rule_profiler import get_rule_profiler, profiling_enabled
+from faire_mapping.transformers.incremental_store import frame_fingerprint
 from geopy.distance import geodesic
 from faire_mapping import (ExtractionMetadataBuilder, 
                            SampleMetadataBuilder, 
@@ -22,7 +28,7 @@ from faire_mapping import (ExtractionMetadataBuilder,
                            ExtractionBlankMappingDictBuilder, 
                            SampleExtractionMappingDictBuilder,
                            NcMappingDictBuilder,
-                           extract_insdc_geographic_locations)
+                           get_insdc_geographic_locations)
 
 
 # TODO: nucl_acid_ext/modify for fill_nc_metadata and fill_blank_metadata is by keyword if it is related (will most of the time be exact, but may need to fix this in the future if its not by keyword rule)
@@ -52,8 +58,10 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
     not_applicable_to_samp_faire_col_dict = {"neg_cont_type": "not applicable: sample group",
                                              "pos_cont_type": "not applicable: sample group"}
     gebco_file = "/home/poseidon/zalmanek/FAIRe-Mapping/faire_mapping/GEBCO_2024.nc"
+    # Regional tiles of the gebco_file, build with python scripts/build_gebco_tiles/build_gebco_tiles.py. Falls back to gebco_file if not there.
+    gebco_tile_cache_dir = "/home/poseidon/zalmanek/FAIRe-Mapping/faire_mapping/GEBCO_2024_tiles"
 
-    def __init__(self, config_yaml: yaml, additiona_rules:list = None, ome_auto_setup=True):
+    def __init__(self, config_yaml: yaml, additiona_rules:list = None, ome_auto_setup=True, process_initializer: Callable = None):
         # TODO: used to have exp_metadata_df: pd.Series as init, but removed because of abstracting out sequencing yaml. See all associated commented out portions
         # May need to move this part into a separate class that combines after all sample_metadata is generated for each cruise
         super().__init__(config_yaml)
@@ -63,6 +71,7 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
 
         self.additional_rules = additiona_rules # list of SampleMetadataTransformer rules
         self.ome_auto_setup = ome_auto_setup # bool
+        self.process_initializer = process_initializer # called once in each worker process of the parallel() rules (see transformation_process_workers in the config)
 
         # Config file stuff
         self.sample_metadata_sample_name_column = self.config_file[
@@ -128,7 +137,8 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
         self.sample_faire_template_df = self.load_faire_template_as_df(
             file_path=self.config_file['faire_template_file'], sheet_name=self.sample_mapping_sheet_name, header=self.faire_sheet_header).dropna()
 
-        self.insdc_locations = extract_insdc_geographic_locations()
+        # frozenset from the on disk INSDC snapshot, only goes to the network if insdc_vocab_ttl_days is set and the snapshot is older than that
+        self.insdc_locations = get_insdc_geographic_locations(ttl_days=self.config_file.get('insdc_vocab_ttl_days'))
 
         # stations/reference stations stuff
         self.station_name_reference_google_sheet_id = self.config_file['station_name_reference_google_sheet_id'] if 'station_name_reference_google_sheet_id' in self.config_file else None # Some projects won't have reference stations (RC0083)
@@ -155,8 +165,33 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
         # 4. Add rel_cont_id
         final_faire_samp_df_with_rel_cont_id = self.add_rel_cont_id_to_final_df(final_samp_df=faire_sample_df)
 
+        # 5. Report how long each rule took if profiling is on (profile_transformations or FAIRE_MAPPING_PROFILE)
+        if profiling_enabled(self.config_file):
+            self.report_rule_profile()
+
         return final_faire_samp_df_with_rel_cont_id
+
+    def report_rule_profile(self) -> None:
+        # Prints the per rule profile of the sample, NC and extraction blank pipelines and writes it to
+        # transformation_profile_file (or the profiles cache dir), then starts a new profile and stops memory tracing
+        profiler = get_rule_profiler()
+        profiler.print_report()
+        profiler.write_json(self.config_file.get('transformation_profile_file'))
+        profiler.clear()
+        profiler.stop()
     
+    def reference_data_fingerprint(self) -> str:
+        # Fingerprint of the reference data rules look rows up in (the station reference sheet, the biological replicates,
+        # the INSDC vocabulary version, the GEBCO grid/tiles and the IHO regions shapefile), so incremental_remap transforms
+        # every row again when it changes (code_fingerprint only covers the .py files)
+        ref_station_builder = getattr(self, 'ref_station_builder', None)
+        parts = [frame_fingerprint(ref_station_builder.df if ref_station_builder is not None else None),
+                 json.dumps(self.sample_metadata_df_builder.replicates_dict, sort_keys=True, default=str),
+                 InsdcGeoLocationStore.vocab_version(self.insdc_locations),
+                 gebco_fingerprint(gebco_file=self.gebco_file, tile_cache_dir=self.gebco_tile_cache_dir),
+                 marine_region_fingerprint()]
+        return hashlib.sha256('\x1e'.join(parts).encode()).hexdigest()
+
     def transform(self):
         df = self.transformer.transform()
         return df  
@@ -233,6 +268,16 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
         material_sample_id = cruise_code + '_' + formatted_cast + formatted_btl
         return str(material_sample_id)
 
+    def add_material_sample_ids(self, casts: pd.Series, bottles: pd.Series, cruise_code) -> pd.Series:
+        # Column version of add_material_sample_id. cruise_code is the cruise code column or the hardcoded cruise code
+        if isinstance(cruise_code, pd.Series) and not cruise_code.map(lambda code: isinstance(code, str)).all():
+            raise TypeError(f"Cruise codes must be strings to create the materialSampleID")
+
+        formatted_cast = values_to_ints(casts).astype(str).str.zfill(2)
+        formatted_btl = values_to_ints(bottles).astype(str).str.zfill(2)
+
+        return cruise_code + '_' + formatted_cast + formatted_btl
+
     def add_material_samp_id_for_pps_samp(self, metadata_row: pd.Series, cast_or_event_col: str, prefix: str):
         # Creates a material sample id in the format of "M2-PPS-0423_Port1" Where the cruise name _ cast
         # "M2-PPS-0423" is the prefix and not the cruise name because tehcnically the PPs was part of a cruise (e.g. DY2306)
@@ -246,11 +291,24 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
         except KeyError:
             prefix=prefix
         return f"{prefix}_Port{port_num}"
+
+    def add_material_samp_ids_for_pps_samp(self, casts_or_events: pd.Series, prefix) -> pd.Series:
+        # Column version of add_material_samp_id_for_pps_samp. prefix is the prefix column or the hardcoded prefix
+        cast_vals = casts_or_events.astype(str).str.strip().str.replace('Event', '', regex=False)
+        port_nums = cast_vals.astype(float).astype(np.int64)
+
+        if isinstance(prefix, pd.Series):
+            prefix = prefix.astype(str)
+        return prefix + '_Port' + port_nums.astype(str)
     
     def add_material_samp_id_for_aquamonitor(self, station: str):
         """"Add the materialSampleID for aquamonitor which will be 'Aquamonitor_M18 (station)"""
         return f'Aquamonitor_{station}'
 
+    def add_material_samp_ids_for_aquamonitor(self, stations: pd.Series) -> pd.Series:
+        # Column version of add_material_samp_id_for_aquamonitor
+        return 'Aquamonitor_' + stations.astype(str)
+
     def get_well_number_from_well_field(self, metadata_row: pd.Series, well_col: str) -> int:
         # Gets the well number from a row that has a value like G1 -> 1
         try:
@@ -266,6 +324,23 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             return well[0]
         except:
             None
+
+    def get_well_numbers_from_well_field(self, wells: pd.Series) -> pd.Series:
+        # Column version of get_well_number_from_well_field (G1 -> 1), None for values that aren't well strings
+        return self._get_well_characters(wells=wells, position=-1)
+
+    def get_well_positions_from_well_field(self, wells: pd.Series) -> pd.Series:
+        # Column version of get_well_position_from_well_field (G1 -> G), None for values that aren't well strings
+        return self._get_well_characters(wells=wells, position=0)
+
+    def _get_well_characters(self, wells: pd.Series, position: int) -> pd.Series:
+        # [None] * len so the missing values are None like the row version (pd.Series(None, dtype=object) would be NaN)
+        well_characters = pd.Series([None] * len(wells), index=wells.index, dtype=object)
+        if wells.dtype != object:
+            return well_characters
+        is_well = wells.map(lambda well: isinstance(well, str) and well != '').to_numpy()
+        well_characters[is_well] = wells[is_well].str[position].to_numpy()
+        return well_characters
     
     def calculate_dna_yield(self, metadata_row: pd.Series, sample_vol_metadata_col: str, extraction_blank: bool = False) -> float:
         # calculate the dna yield based on the concentration (ng/uL) and the sample_volume (mL).
@@ -289,6 +364,30 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
                 return 'not applicable: control sample'
             return 'not applicable'
 
+    def calculate_dna_yields(self, concentrations: pd.Series, sample_vols: pd.Series, sample_names: pd.Series) -> pd.Series:
+        # Column version of calculate_dna_yield (concentrations are the extraction_conc column and sample_vols are the
+        # sample volume column, or the extraction blank volume column for extraction blanks).
+        concentration_strs = concentrations.astype(str)
+        concentration_vals, concentration_parsed = values_to_floats(concentration_strs)
+        sample_vol_vals, sample_vol_parsed = values_to_floats(sample_vols.astype(str).str.replace('~', '', regex=False))
+
+        no_concentration = concentration_strs.isin(['', 'nan'])
+        # float() failed or would divide by zero -> not applicable (or control sample)
+        failed = ~no_concentration & ~(concentration_parsed & sample_vol_parsed & (sample_vol_vals != 0))
+        calculated = ~no_concentration & ~failed
+
+        dna_yields = pd.Series('not applicable', index=concentrations.index, dtype=object)
+        if calculated.any():
+            dna_yields[calculated.to_numpy()] = round_floats(concentration_vals[calculated] * 100 / sample_vol_vals[calculated], 3).to_numpy(dtype=object)
+        if failed.any():
+            failed_names = sample_names[failed]
+            if not failed_names.map(lambda name: isinstance(name, str)).all():
+                raise AttributeError(f"Sample names have to be strings to check for controls, got: {failed_names.tolist()}")
+            is_control = failed_names.str.lower().str.contains('.nc', regex=False)
+            dna_yields[failed.to_numpy()] = np.where(is_control, 'not applicable: control sample', 'not applicable')
+
+        return dna_yields.infer_objects()
+
     def calculate_altitude(self, metadata_row: pd.Series, depth_col: str, tot_depth_col: str, exact_map_col: str = None) -> float:
 
         if exact_map_col is not None:
@@ -311,6 +410,13 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
 
         return round((tot_depth_water_col - depth), 2)
 
+    def calculate_altitudes(self, depths, tot_depths: pd.Series) -> pd.Series:
+        # Column version of calculate_altitude. depths is the depth column or a constant depth (for PPS)
+        altitudes = tot_depths - depths
+        if pd.api.types.is_numeric_dtype(altitudes):
+            return altitudes.round(2)
+        return altitudes.map(lambda altitude: round(altitude, 2))
+
     def get_line_id(self, station) -> str:
         # Get the line id by the referance station (must be standardized station name)
         if station in self.ref_station_builder.station_line_dict:
@@ -332,6 +438,17 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
 
             return direction_labels[ix % 16]
 
+    def convert_wind_degrees_to_directions(self, wind_degrees: pd.Series) -> pd.Series:
+        # Column version of convert_wind_degrees_to_direction
+        direction_labels = np.array(["N", "NNE", "NE", "ENE", "E", "ESE", "SE",
+                                     "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"], dtype=object)
+        has_degrees = wind_degrees.notna().to_numpy()
+
+        directions = pd.Series("missing: not collected", index=wind_degrees.index, dtype=object)
+        ix = np.round(wind_degrees[has_degrees].to_numpy(dtype=float) / (360. / len(direction_labels))).astype('i')
+        directions[has_degrees] = direction_labels[ix % 16]
+        return directions
+
     def convert_min_depth_from_minus_one_meter(self, metadata_row: pd.Series, max_depth_col_name: str):
         # Subtracts 1 from the max depth to calculate min depth (niskin bottle is ~1 m)
         max_depth = float(metadata_row[max_depth_col_name])
@@ -341,6 +458,11 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             min_depth = max_depth
         return round(min_depth, 2)
 
+    def convert_min_depths_from_minus_one_meter(self, max_depths: pd.Series) -> pd.Series:
+        # Column version of convert_min_depth_from_minus_one_meter
+        max_depths = max_depths.astype(float)
+        return round_floats(max_depths.where(~(max_depths > 0), max_depths - 1), 2)
+
     def format_geo_loc(self, metadata_row: str, geo_loc_metadata_col: str) -> dict:
         # TODO: add if statement for Arctic OCean? SKQ21-12S?
 
@@ -395,35 +517,54 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             # This catches cases where the data might be a string like "Unknown" or " "
             return ""
 
-        marine_regions = gpd.read_file(
-            "/home/poseidon/zalmanek/FAIRe-Mapping/faire_mapping/World_Seas_IHO_v3/World_Seas_IHO_v3.shp")
-        
-        # create a point object
-        point = Point(lon, lat)
+        # Check for which marine region contains this point
+        sea = get_marine_region_index().lookup(lon=pd.Series([lon]), lat=pd.Series([lat])).iloc[0]
 
-        # Check for which marin region contains this point
-        for idx, region in marine_regions.iterrows():
-            if region.geometry.contains(point):
-                sea = region.get('NAME')
-            
-                if sea == 'Arctic Ocean':
-                    geo_loc = sea
-                elif 'and British Columbia' in sea:
-                    geo_loc = f"USA: {sea.replace('and British Columbia', '')}"
-                else:
-                    geo_loc = f"USA: {sea}"
-
-                try:
-                    geo_loc_name = geo_loc.split(':')[0]
-                except:
-                    geo_loc_name = [geo_loc]
-                if geo_loc_name not in self.insdc_locations:
-                    raise NoInsdcGeoLocError(
-                        f'There is no geographic location in INSDC that matches {geo_loc_name}, check sea_name and try again')
-                else:
-                    return geo_loc
         # If no region contains the point return None
-        return None
+        if pd.isna(sea):
+            return None
+        return self.get_geo_loc_from_sea_name(sea)
+
+    def find_geo_loc_by_lat_lon_for_df(self, df: pd.DataFrame, metadata_cols: str) -> pd.Series:
+        """
+        Batch version of find_geo_loc_by_lat_lon that resolves the whole lon/lat columns in one spatial query.
+        metadata_cols is a pipe separated string e.g. 'lon | lat', where lon comes first, followed by lat.
+        Returns "" for missing or non numeric coordinates and None for points that are not in any region.
+        """
+        cols = [col.strip() for col in metadata_cols.split('|')]
+        if len(cols) != 2:
+            raise ValueError(f"Expected 2 columns separated by '|' with lat followed by lot, got: {metadata_cols}")
+
+        print(f"Getting geo_loc_name for {len(df)} samples")
+        lon = pd.to_numeric(df[cols[0]], errors='coerce') if cols[0] in df.columns else pd.Series(np.nan, index=df.index)
+        lat = pd.to_numeric(df[cols[1]], errors='coerce') if cols[1] in df.columns else pd.Series(np.nan, index=df.index)
+
+        seas = get_marine_region_index().lookup(lon=lon, lat=lat)
+
+        # Format and check each sea name once instead of once per sample
+        geo_locs = {sea: self.get_geo_loc_from_sea_name(sea) for sea in seas.dropna().unique()}
+
+        geo_loc_names = pd.Series(None, index=df.index, dtype=object)
+        geo_loc_names[seas.notna()] = seas[seas.notna()].map(geo_locs)
+        geo_loc_names[lon.isna() | lat.isna()] = ""
+        return geo_loc_names
+
+    def get_geo_loc_from_sea_name(self, sea: str) -> str:
+        """
+        Formats an IHO sea name as a geo_loc_name and checks the country/ocean part against the INSDC vocabulary.
+        """
+        if sea == 'Arctic Ocean':
+            geo_loc = sea
+        elif 'and British Columbia' in sea:
+            geo_loc = f"USA: {sea.replace('and British Columbia', '')}"
+        else:
+            geo_loc = f"USA: {sea}"
+
+        geo_loc_name = geo_loc.split(':')[0]
+        if geo_loc_name not in self.insdc_locations:
+            raise NoInsdcGeoLocError(
+                f'There is no geographic location in INSDC that matches {geo_loc_name}, check sea_name and try again')
+        return geo_loc
 
     def calculate_env_local_scale(self, depth: float) -> str:
         # uses the depth to assign env_local_scale
@@ -440,6 +581,15 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
         except UnboundLocalError:
             return ''
 
+    def calculate_env_local_scales(self, depths: pd.Series) -> pd.Series:
+        # Column version of calculate_env_local_scale ('' if there is no depth)
+        aphotic = "marine aphotic zone [ENVO:00000210]"
+        photic = "marine photic zone [ENVO:00000209]"
+
+        depths = depths.astype(float)
+        return pd.Series(np.select([depths <= 200, depths > 200], [photic, aphotic], default=''),
+                         index=depths.index, dtype=object)
+
     def format_dates_for_duration_calculation(self, date: str) -> datetime:
         if date in  [None, 'nan', 'missing: not collected', '', 'missing: not provided']:
             return "missing: not provided"
@@ -499,6 +649,43 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             # if start date or end date is NA will return missing: not collected
             return "missing: not collected"
 
+    def calculate_date_durations(self, df: pd.DataFrame, start_date_col: str, end_date_col: str) -> pd.Series:
+        """
+        Column version of calculate_date_duration. Both columns are normalized with convert_dates_to_iso8601,
+        parsed with one pd.to_datetime call per format, subtracted as whole columns and formatted with
+        format_timedeltas_iso8601. Dates that aren't plain YYYY-MM-DD or YYYY-MM-DDTHH:MM:SSZ after
+        normalizing go through calculate_date_duration's row logic so results are the same.
+        """
+        start_dates = self.convert_dates_to_iso8601(df[start_date_col])
+        end_dates = self.convert_dates_to_iso8601(df[end_date_col])
+
+        missing = start_dates.isin(EMPTY_DATE_VALUES) | end_dates.isin(EMPTY_DATE_VALUES)
+        durations = pd.Series("missing: not collected", index=df.index, dtype=object)
+        if missing.all():
+            return durations
+
+        def parse_dates(dates: pd.Series) -> pd.Series:
+            parsed = pd.Series(pd.NaT, index=dates.index, dtype='datetime64[ns]')
+            for pattern, date_format in ((r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$', "%Y-%m-%dT%H:%M:%SZ"),
+                                         (r'^\d{4}-\d{2}-\d{2}$', "%Y-%m-%d")):
+                matches = dates.str.match(pattern).to_numpy(dtype=bool)
+                if matches.any():
+                    parsed[matches] = pd.to_datetime(dates[matches], format=date_format, errors='coerce').to_numpy()
+            return parsed
+
+        start_parsed = parse_dates(start_dates)
+        end_parsed = parse_dates(end_dates)
+        parsed = (~missing & start_parsed.notna() & end_parsed.notna()).to_numpy()
+        durations[parsed] = format_timedeltas_iso8601(end_parsed[parsed] - start_parsed[parsed]).to_numpy()
+
+        # Dates pandas couldn't parse (out of bounds years, unusual formats) are calculated one row at a time
+        for pos in np.flatnonzero(~missing.to_numpy() & ~parsed):
+            duration = (self.format_dates_for_duration_calculation(date=end_dates.iloc[pos]) -
+                        self.format_dates_for_duration_calculation(date=start_dates.iloc[pos]))
+            durations.iloc[pos] = isodate.duration_isoformat(duration)
+
+        return durations
+
     def get_tot_depth_water_col_from_lat_lon(self, metadata_row: pd.Series, lat_col: float, lon_col: float, exact_map_col: str = None) -> float:
 
         try:
@@ -525,17 +712,42 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             lat = lat
             lon = lon
 
-        # open the gebco dataset
-        ds = xr.open_dataset(self.gebco_file)
+        # get the closest point in the gebco dataset to the coordinates and make positive value
+        return get_gebco_bathymetry(self.gebco_file, self.gebco_tile_cache_dir).depth_at(lat=[float(lat)], lon=[float(lon)])[0]
 
-        # get the closest point in the dataset to the coordinates
-        elevation = ds.elevation.sel(lat=lat, lon=lon, method='nearest').values
+    def get_tot_depth_water_col_for_df(self, df: pd.DataFrame, lat_col: str, lon_col: str, exact_map_col: str = None) -> pd.Series:
+        """
+        Column version of get_tot_depth_water_col_from_lat_lon. Uses the exact_map_col value where there is one,
+        otherwise looks up the GEBCO depth for all of the remaining lat/lon pairs at once.
+        """
+        if exact_map_col in df.columns:
+            has_exact = df[exact_map_col].notna()
+        else:
+            has_exact = pd.Series(False, index=df.index)
 
-        # close the dataset
-        ds.close()
+        lat = pd.to_numeric(df[lat_col], errors='coerce')
+        lon = pd.to_numeric(df[lon_col], errors='coerce')
 
-        # make positive value
-        return abs(elevation)
+        # Check if verbatim column and use to determin negative or positive sign
+        # pandas has a bug where it removes the negative using .apply()
+        # TODO: This is old. If any merges were updated with Brynn's merge script,
+        # this should no longer be needed.
+        if 'verbatimLatitude' in df.columns:
+            verbatim_lat_is_str = df['verbatimLatitude'].apply(lambda val: isinstance(val, str))
+            is_south = df['verbatimLatitude'].apply(lambda val: isinstance(val, str) and 'S' in val)
+            lat = lat.mask(is_south, -lat.abs())
+            # Longitude is only checked when the latitude could be (same as the row version)
+            if 'verbatimLongitude' in df.columns:
+                is_west = df['verbatimLongitude'].apply(lambda val: isinstance(val, str) and 'W' in val)
+                lon = lon.mask(verbatim_lat_is_str & is_west, -lon.abs())
+
+        tot_depths = pd.Series(np.nan, index=df.index, dtype=object)
+        to_look_up = ~has_exact
+        if to_look_up.any():
+            tot_depths[to_look_up] = get_gebco_bathymetry(self.gebco_file, self.gebco_tile_cache_dir).depth_at(lat=lat[to_look_up], lon=lon[to_look_up])
+        if has_exact.any():
+            tot_depths[has_exact] = df.loc[has_exact, exact_map_col]
+        return tot_depths
 
     def get_samp_store_dur(self, sample_name: pd.Series) -> str:
         # Get the samp_store_dur based on the sample name
@@ -593,16 +805,37 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
 
         if 'NC' not in sample_name or 'blank' not in sample_name.lower():
             # Standardizes station ids to be from the reference station sheet
-            for standard_station_name, unstandardized_station_list in self.ref_station_builder.station_standardized_name_dict.items():
-                if station_name in unstandardized_station_list or station_name == standard_station_name:
-                    return standard_station_name
+            standard_station_name = self.ref_station_builder.station_synonym_index.get(
+                self.ref_station_builder.normalize_station_name(station_name))
+            if standard_station_name is not None:
+                return standard_station_name
         
-            # only print if no match was found after whole iteration
             print(f"\033[33m{station_name} listed for sample {sample_name} is missing from station reference dictionary as an ome_station. Please check\033[0m]")
             return station_name
         else:
             return station_name
 
+    def get_station_ids_from_unstandardized_station_names(self, df: pd.DataFrame, unstandardized_station_name_col: str) -> pd.Series:
+        """
+        Column version of get_station_id_from_unstandardized_station_name that maps the whole station column through
+        the reference station synonym index. Stations that aren't in the reference sheet keep their listed name and are
+        reported once at the end instead of once per sample.
+        """
+        station_names = df[unstandardized_station_name_col]
+        sample_names = df[self.sample_metadata_sample_name_column]
+        is_control = sample_names.apply(lambda sample_name: not ('NC' not in sample_name or 'blank' not in sample_name.lower()))
+
+        standardized_names = self.ref_station_builder.standardize_station_names(station_names)
+        unmatched = standardized_names.isna() & ~is_control
+        standardized_names = standardized_names.where(standardized_names.notna() & ~is_control, station_names)
+
+        if unmatched.any():
+            unmatched_samps = sample_names[unmatched].groupby(station_names[unmatched].astype(str)).agg(list)
+            unmatched_report = '\n'.join(f"    {station_name}: {', '.join(map(str, samps))}" for station_name, samps in unmatched_samps.items())
+            print(f"\033[33m{len(unmatched_samps)} station(s) listed are missing from station reference dictionary as an ome_station. Please check (station: samples):\n{unmatched_report}\033[0m")
+
+        return standardized_names
+
     def calculate_distance_btwn_lat_lon_points(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
             # Calculates the surface distance between two points in lat/lon using the great_circle package of GeoPy
             return geodesic((lat1, lon1), (lat2, lon2)).kilometers   
@@ -662,6 +895,54 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
             print(ValueError(f"\033[31m Could not get distance to stations for {sample_name}!\033[0m]"))
             return ''
     
+    def get_stations_within_5km_for_df(self, df: pd.DataFrame, station_name_col: str, lat_col: str, lon_col: str) -> pd.DataFrame:
+        """
+        Column version of get_stations_within_5km that queries the reference station KD-tree for all samples at once.
+        Returns a DataFrame (indexed like df) with the columns:
+            station_ids_within_5km - ' | ' joined stations sorted by distance, None if there are none, 
+                'not applicable: control sample' for controls and '' if the lat/lon is unusable
+            closest_station, closest_station_distance_km - the nearest reference station (for the QC messages)
+            reported_station_within_5km - whether the listed station is one of the stations within 5 km
+        """
+        sample_names = df[self.sample_metadata_sample_name_column]
+        is_control = sample_names.apply(lambda sample_name: not ('NC' not in sample_name or 'blank' not in sample_name.lower()))
+
+        lat = pd.to_numeric(df[lat_col], errors='coerce')
+        lon = pd.to_numeric(df[lon_col], errors='coerce')
+        nearby = self.ref_station_builder.station_proximity_index.query(lat=lat, lon=lon)
+
+        stations_within = nearby['stations_within'].where(nearby['stations_within'] != '', None)
+        stations_within[nearby['stations_within'].isna()] = ''
+        stations_within[is_control] = 'not applicable: control sample'
+
+        reported_station_within = pd.Series(
+            [station in str(within).split(' | ') for station, within in zip(df[station_name_col], stations_within)], index=df.index)
+
+        results_df = pd.DataFrame({
+            'station_ids_within_5km': stations_within,
+            'closest_station': nearby['closest_station'],
+            'closest_station_distance_km': nearby['closest_station_distance_km'],
+            'reported_station_within_5km': reported_station_within
+        }, index=df.index)
+
+        # QC messages, only for the samples that need them
+        for idx in results_df.index[~is_control]:
+            sample_name = sample_names[idx]
+            listed_station = df.at[idx, station_name_col]
+            if stations_within[idx] == '':
+                print(ValueError(f"\033[31m Could not get distance to stations for {sample_name}!\033[0m]"))
+            elif stations_within[idx] is None:
+                closest_station = nearby.at[idx, 'closest_station']
+                closest_miss = {'station': closest_station,
+                                'distance_km': float(nearby.at[idx, 'closest_station_distance_km']),
+                                'coords': self.ref_station_builder.station_lat_lon_ref_dict[closest_station]}
+                print(ValueError(f"\033[31m{sample_name} listed station {listed_station}, but it is not picking up on any stations with 5 km based on its lat/lon {float(lat[idx]), float(lon[idx])}. Closest station is {closest_miss}!\033[0m]"))
+            elif not reported_station_within[idx]:
+                closest_alt_station = stations_within[idx].split(' | ')[0]
+                print(f"\033[36m{sample_name}'s reported station ({listed_station}) is not found within 5 km, the closest station found to it's lat/lon coords is {closest_alt_station} with a distance of {float(nearby.at[idx, 'station_distances_km'][0])}\033[0m")
+
+        return results_df
+
     def check_station_is_in_stations_in_5_km(self, alt_station_names: str, reported_station: str, samp_name:str, distances: dict) -> None:
         # Check that reported station showed up in the stations within 5 km
         alt_stations = alt_station_names.split(' | ')
@@ -885,6 +1166,8 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
    
         # Get all Negative control samples
         nc_samples = final_samp_df[final_samp_df[self.faire_sample_name_col].str.contains('.NC', na=False, regex=False)][self.faire_sample_name_col].unique().tolist()
+        # {samp_name: [extraction blanks the sample was extracted with]}
+        extraction_blanks_by_samp = self.extraction_metadata_builder.get_extraction_blanks_by_samp()
 
         for idx, row in final_samp_df.iterrows():
             if 'NC' not in row[self.faire_sample_name_col] and 'blank' not in row[self.faire_sample_name_col].lower():
@@ -894,9 +1177,7 @@ class FaireSampleMetadataMapper(OmeFaireMapper):
                 related_blanks = []
                 related_blanks.extend(nc_samples)
 
-                for extraction_blank, associated_samples in self.extraction_metadata_builder.extraction_blank_rel_cont_dict.items():
-                    if current_samp in associated_samples:
-                        related_blanks.append(extraction_blank)
+                related_blanks.extend(extraction_blanks_by_samp.get(current_samp, []))
                 
                 # remove any "not applicable" if there are other ids in all_related_ids
                 final_samp_df.at[idx, self.faire_rel_cont_id_col_name] = ' | '.join(related_blanks)
@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+from typing import List, Tuple, Union
+import re
+import numpy as np
+import pandas as pd
+from faire_mapping.constants import update_cruise_codes
+
+# TODO: most of these rewrites are specific to OME cruises with sample name mismatches. Can remove after data for these cruises has been submitted and sample naming becomes standardized.
+
+
+@dataclass(frozen=True)
+class SampleNameRewrite:
+    """
+    One step of a sample name rewrite table. Steps are applied in order, each to the output of the step before it.
+    """
+    find: str
+    replace: str
+    when: str = None # the step only runs if this is in the name (defaults to find)
+    unless: Tuple[str, ...] = () # the step is skipped if any of these are in the name
+    exact: bool = False # the whole name has to be find (instead of containing it)
+    stop: bool = False # names changed by this step aren't rewritten by the steps after it
+
+    @property
+    def trigger(self) -> str:
+        return self.when if self.when is not None else self.find
+
+
+class SampleNameRewriter:
+    """
+    Compiles a rewrite table into one regex of every substring that can trigger a step (names that don't match it are
+    left as they are) and dictionaries for runs of exact match steps. Rewrites are memoized per unique name, and
+    rewrite_series applies the steps to all of the new unique names of a Series at once with pandas string methods.
+    """
+
+    def __init__(self, rewrites: List[SampleNameRewrite]):
+
+        self.rewrites = list(rewrites)
+        self._trigger_pattern = re.compile('|'.join(re.escape(rewrite.trigger) for rewrite in self.rewrites)) if self.rewrites else None
+        self._steps: List[Union[SampleNameRewrite, dict]] = []
+        for rewrite in self.rewrites:
+            if rewrite.exact and rewrite.stop:
+                raise ValueError(f"Exact sample name rewrites can't stop the rewriting ({rewrite.find})")
+            if rewrite.exact:
+                # consecutive exact steps are looked up in one dictionary, unless one would rewrite the output of another
+                if self._steps and isinstance(self._steps[-1], dict) and rewrite.find not in self._steps[-1].values():
+                    self._steps[-1].setdefault(rewrite.find, rewrite.replace)
+                else:
+                    self._steps.append({rewrite.find: rewrite.replace})
+            else:
+                self._steps.append(rewrite)
+        self._cache = {} # samp_name: rewritten samp_name
+
+    def _rewrite_uncached(self, samp_name: str) -> str:
+        if self._trigger_pattern is None or not self._trigger_pattern.search(samp_name):
+            return samp_name
+        for step in self._steps:
+            if isinstance(step, dict):
+                samp_name = step.get(samp_name, samp_name)
+            elif step.trigger in samp_name and not any(unless in samp_name for unless in step.unless):
+                samp_name = samp_name.replace(step.find, step.replace)
+                if step.stop:
+                    break
+        return samp_name
+
+    def rewrite(self, samp_name: str) -> str:
+        """
+        Rewrites one sample name
+        """
+        if samp_name not in self._cache:
+            self._cache[samp_name] = self._rewrite_uncached(samp_name)
+        return self._cache[samp_name]
+
+    def _rewrite_new_names(self, samp_names: List[str]) -> List[str]:
+        # Runs every step over all of the names that contain a trigger with pandas string methods
+        names = pd.Series(samp_names, dtype=object)
+        if self._trigger_pattern is None:
+            return names.tolist()
+        candidates = names[names.str.contains(self._trigger_pattern)]
+        stopped = pd.Series(False, index=candidates.index)
+        for step in self._steps:
+            if isinstance(step, dict):
+                mask = ~stopped & candidates.isin(step.keys())
+                candidates[mask] = candidates[mask].map(step)
+                continue
+            mask = ~stopped & candidates.str.contains(step.trigger, regex=False)
+            for unless in step.unless:
+                mask &= ~candidates.str.contains(unless, regex=False)
+            candidates[mask] = candidates[mask].str.replace(step.find, step.replace, regex=False)
+            if step.stop:
+                stopped |= mask
+        names[candidates.index] = candidates
+        return names.tolist()
+
+    def rewrite_series(self, samp_names: pd.Series) -> pd.Series:
+        """
+        Rewrites every sample name in a Series. Values that aren't strings (e.g. NaN) are left as they are.
+        """
+        codes, uniques = pd.factorize(samp_names)
+        if len(uniques) == 0:
+            return samp_names.copy()
+        uniques = np.asarray(uniques, dtype=object)
+        new_names = [name for name in dict.fromkeys(uniques) if isinstance(name, str) and name not in self._cache]
+        if new_names:
+            self._cache.update(zip(new_names, self._rewrite_new_names(new_names)))
+        rewritten_uniques = np.array([self._cache[name] if isinstance(name, str) else name for name in uniques], dtype=object)
+        rewritten = np.where(codes == -1, samp_names.to_numpy(dtype=object), rewritten_uniques.take(codes))
+        return pd.Series(rewritten, index=samp_names.index, name=samp_names.name)
+
+
+# Extraction and experiment run sample names (see utils.str_replace_for_samps)
+OME_SAMP_NAME_REWRITES = [
+    SampleNameRewrite('_', '.', unless=('pool',)), # osu samp names have _ that needs to be . For example, E62_1B_DY20. Pooled samples keep the underscore
+    SampleNameRewrite('.DY20', '.DY20-12'), # if sample is part of the DY2012 cruise, will replace any str of DY20 with DY2012
+    SampleNameRewrite(' (P10 D2)', '', when='(P10 D2)'), # for E1875.OC0723 (P10 D2) in Run2
+    SampleNameRewrite('.IB.NO20', '.1B.NO20-01', stop=True), # for E265.1B.NO20 sample - in metadata was E265.1B.NO20
+    SampleNameRewrite('E.2139.', 'E2139.', stop=True), # For E239 QiavacTest, had a . between E and number in metadata
+    SampleNameRewrite('E687', 'E687.WCOA21', unless=('.WCOA21',), stop=True),
+    SampleNameRewrite('E.', '', when='.NC'), # If an E was put in front of an NC sample (this happends in some of the extractions e.g. the SKQ21 extractions), will remove the E
+    SampleNameRewrite('*', ''),
+    SampleNameRewrite('.SKQ2021', '.SKQ21-15S'),
+    SampleNameRewrite('.NO20', '.NO20-01', unless=('.NO20-01',)),
+    SampleNameRewrite('Mid.NC.SKQ21', 'MID.NC.SKQ21-15S'),
+    SampleNameRewrite('.DY2206', '.DY22-06'),
+    SampleNameRewrite('.DY2209', '.DY22-09'),
+    SampleNameRewrite('.DY2306', '.DY23-06'),
+    SampleNameRewrite('E2030.NC', 'E2030.NC.SKQ23-12S', exact=True),
+    SampleNameRewrite('Blank1C.QiavacTest', 'Blank1C.QIAvacTest', exact=True),
+    SampleNameRewrite('Blank3Q.QiavacTest', 'Blank3Q.QIAvacTest', exact=True),
+]
+
+# Sample metadata sample names (see SampleMetadataBuilder._fix_samp_names)
+SAMPLE_METADATA_SAMP_NAME_REWRITES = [
+    SampleNameRewrite('_', '-'), # For SKQ23 cruises where run and extraction metadata has -, and sample metadata has _
+    SampleNameRewrite('-', '', when='.DY23-06'),
+    SampleNameRewrite('.SKQ2021', '.SKQ21-15S'),
+]
+
+# Old cruise codes in the asv tables and experiment run metadata to the desired cruise codes
+CRUISE_CODE_REWRITES = [SampleNameRewrite(old, new) for old, new in update_cruise_codes.items()]
+
+# Regular (not positive or pooled) sample names in the asv tables (see ExperimentRunMetadataMapper._clean_asv_samp_names)
+ASV_SAMP_NAME_REWRITES = [
+    SampleNameRewrite('MP_', ''),
+    SampleNameRewrite('_', '.'),
+    SampleNameRewrite('.12S', '-12S'), # replace .12S to -12S for SKQ23-12S samples.
+    SampleNameRewrite('Mid', 'MID'),
+    SampleNameRewrite('DY2306', 'DY23-06'),
+    SampleNameRewrite('DY2209', 'DY22-09'),
+    SampleNameRewrite('DY2206', 'DY22-06'),
+    *CRUISE_CODE_REWRITES,
+]
+
+# Back to the old cruise codes used in the raw data file names (see ExperimentRunMetadataMapper._try_diff_sample_name_for_raw_data_lookup)
+RAW_DATA_LOOKUP_SAMP_NAME_REWRITES = [
+    SampleNameRewrite('.DY20-12', '.DY20'),
+    SampleNameRewrite('.WCOA21', ''),
+    SampleNameRewrite('.SKQ21-15S', '.SKQ2021', stop=True),
+    *[rewrite for old, new in update_cruise_codes.items()
+      for rewrite in (SampleNameRewrite(new, old),
+                      SampleNameRewrite('.OC1021_ce', '.OC1021'))], # Needs to be added because same old cruise code as a different batch of samples that got different new name
+]
+
+ome_samp_name_rewriter = SampleNameRewriter(OME_SAMP_NAME_REWRITES)
+sample_metadata_samp_name_rewriter = SampleNameRewriter(SAMPLE_METADATA_SAMP_NAME_REWRITES)
+cruise_code_rewriter = SampleNameRewriter(CRUISE_CODE_REWRITES)
+asv_samp_name_rewriter = SampleNameRewriter(ASV_SAMP_NAME_REWRITES)
+raw_data_lookup_samp_name_rewriter = SampleNameRewriter(RAW_DATA_LOOKUP_SAMP_NAME_REWRITES)
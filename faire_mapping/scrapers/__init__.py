@@ -1 +1,2 @@
-from .insdc_geo_locations import extract_insdc_geographic_locations
\ No newline at end of file
+from .insdc_geo_locations import extract_insdc_geographic_locations
+from .insdc_vocab_store import InsdcGeoLocationStore, get_insdc_geographic_locations
@@ -1,11 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
 
+INSDC_GEO_LOC_URL = 'https://www.insdc.org/submitting-standards/geo_loc_name-qualifier-vocabulary/'
+
 def extract_insdc_geographic_locations() -> list:
 
-        url = 'https://www.insdc.org/submitting-standards/geo_loc_name-qualifier-vocabulary/'
+        url = INSDC_GEO_LOC_URL
 
-        response = requests.get(url)
+        response = requests.get(url, timeout=30)
         response.raise_for_status()  # Raise an exception for HTTP errors
         html_content = response.text
 
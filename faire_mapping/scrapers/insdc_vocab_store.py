@@ -0,0 +1,103 @@
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+import hashlib
+import json
+import logging
+import os
+from .insdc_geo_locations import extract_insdc_geographic_locations, INSDC_GEO_LOC_URL
+from faire_mapping.utils import FAIRE_MAPPING_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Snapshot shipped with the package, used until a refreshed copy exists in the cache dir
+BUNDLED_SNAPSHOT = Path(__file__).resolve().parent / "data" / "insdc_geo_locations.json"
+# Refreshed snapshots are written here so the package directory is never written to
+DEFAULT_CACHE_DIR = FAIRE_MAPPING_CACHE_DIR
+
+# One vocabulary per (cache_dir) for the life of the process
+_vocab_cache = {}
+
+
+class InsdcGeoLocationStore:
+    """
+    Versioned on disk copy of the INSDC geo_loc_name vocabulary. Reads the cached snapshot (or the bundled
+    one if nothing has been cached yet) and only scrapes the INSDC page when asked to refresh or when the
+    snapshot is older than ttl_days. If a refresh fails, the snapshot on disk is used.
+    """
+
+    snapshot_file_name = "insdc_geo_locations.json"
+
+    def __init__(self, cache_dir: str = None, ttl_days: float = None):
+
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_snapshot = self.cache_dir / self.snapshot_file_name
+        self.ttl_days = ttl_days
+
+    @staticmethod
+    def vocab_version(locations) -> str:
+        # Content hash of the vocabulary so snapshots can be compared
+        return hashlib.sha256('\n'.join(sorted(locations)).encode()).hexdigest()[:12]
+
+    def read_snapshot(self) -> dict:
+        snapshot_path = self.cache_snapshot if self.cache_snapshot.exists() else BUNDLED_SNAPSHOT
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+        snapshot['path'] = str(snapshot_path)
+        return snapshot
+
+    def write_snapshot(self, locations: list, snapshot_path: Path = None) -> dict:
+        snapshot_path = Path(snapshot_path or self.cache_snapshot)
+        snapshot = {
+            "source": INSDC_GEO_LOC_URL,
+            "retrieved_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "version": self.vocab_version(locations),
+            "locations": sorted(set(locations)),
+        }
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        os.replace(tmp_path, snapshot_path)
+        return snapshot
+
+    def is_stale(self, snapshot: dict) -> bool:
+        if self.ttl_days is None:
+            return False
+        if not snapshot.get('retrieved_at'):
+            return True
+        retrieved_at = datetime.fromisoformat(snapshot['retrieved_at'])
+        return datetime.now(timezone.utc) - retrieved_at > timedelta(days=self.ttl_days)
+
+    def refresh(self) -> dict:
+        """
+        Scrapes the INSDC page and writes a new snapshot to the cache dir.
+        """
+        locations = extract_insdc_geographic_locations()
+        if not locations:
+            raise ValueError(f"No geographic locations were found at {INSDC_GEO_LOC_URL}, the page layout may have changed")
+        snapshot = self.write_snapshot(locations=locations)
+        logger.info(f"Refreshed INSDC geo_loc_name vocabulary, version {snapshot['version']} ({len(locations)} locations)")
+        return snapshot
+
+    def load(self, refresh: bool = False) -> frozenset:
+        """
+        Returns the vocabulary as a frozenset, refreshing it first if refresh is True or the snapshot is stale.
+        """
+        snapshot = self.read_snapshot()
+        if refresh or self.is_stale(snapshot):
+            try:
+                snapshot = self.refresh()
+            except Exception as e:
+                logger.warning(f"Could not refresh the INSDC geo_loc_name vocabulary ({e}), using snapshot {snapshot['version']} from {snapshot['path']}")
+        return frozenset(snapshot['locations'])
+
+
+def get_insdc_geographic_locations(refresh: bool = False, ttl_days: float = None, cache_dir: str = None) -> frozenset:
+    """
+    Returns the INSDC geo_loc_name vocabulary as a frozenset without going to the network unless
+    refresh is True or the snapshot is older than ttl_days. Loaded once per process.
+    """
+    key = str(cache_dir or DEFAULT_CACHE_DIR)
+    if refresh or key not in _vocab_cache:
+        _vocab_cache[key] = InsdcGeoLocationStore(cache_dir=cache_dir, ttl_days=ttl_days).load(refresh=refresh)
+    return _vocab_cache[key]
@@ -0,0 +1,4 @@
+from .marine_region_index import MarineRegionIndex, get_marine_region_index, marine_region_fingerprint
+from .gebco_bathymetry import GebcoBathymetry, get_gebco_bathymetry, gebco_fingerprint
+from .gebco_tile_cache import GebcoTileCache, build_gebco_tile_cache, bounding_box_from_lat_lon, split_at_antimeridian, DEFAULT_GEBCO_REGIONS
+from .station_proximity_index import StationProximityIndex
@@ -0,0 +1,143 @@
+from pathlib import Path
+import hashlib
+import logging
+import os
+import numpy as np
+import xarray as xr
+from faire_mapping.spatial.gebco_tile_cache import GebcoTileCache, TILE_INDEX_FILE
+
+logger = logging.getLogger(__name__)
+
+# One sampler per GEBCO file for the life of the process
+_bathymetry_cache = {}
+
+
+class GebcoBathymetry:
+    """
+    Samples GEBCO elevations for whole arrays of lat/lon points. The netCDF is opened lazily the first
+    time it is needed and kept open, so only the grid cells that are asked for are read from disk.
+    If tile_cache_dir has regional tiles (see build_gebco_tile_cache) they are read first, and
+    the full netCDF is only opened for points outside of the tiles.
+    """
+
+    elevation_var = "elevation"
+
+    def __init__(self, gebco_file: str, tile_cache_dir: str = None):
+
+        self.gebco_file = gebco_file
+        self._ds = None
+        self._lat_axis = None
+        self._lon_axis = None
+
+        self.tile_cache = GebcoTileCache.load(tile_cache_dir)
+        if self.tile_cache is not None and not self.tile_cache.matches(gebco_file):
+            logger.warning(f"GEBCO tiles in {tile_cache_dir} were cut from {self.tile_cache.gebco_file}, not {gebco_file}. Ignoring the tiles.")
+            self.tile_cache = None
+
+    @property
+    def dataset(self) -> xr.Dataset:
+        if self._ds is None:
+            logger.info(f"Opening GEBCO grid {self.gebco_file}")
+            self._ds = xr.open_dataset(self.gebco_file)
+            self._lat_axis = self._axis_info(self._ds['lat'].values)
+            self._lon_axis = self._axis_info(self._ds['lon'].values)
+        return self._ds
+
+    def close(self) -> None:
+        if self._ds is not None:
+            self._ds.close()
+            self._ds = None
+
+    @staticmethod
+    def _axis_info(coords: np.ndarray) -> tuple:
+        """
+        Returns (first coordinate, step, number of cells) for a regularly spaced grid axis
+        """
+        return float(coords[0]), float(coords[1] - coords[0]), len(coords)
+
+    @staticmethod
+    def nearest_index(values: np.ndarray, axis_info: tuple) -> np.ndarray:
+        """
+        Index of the nearest grid cell on a regular axis, the same cell .sel(method='nearest') picks.
+        Points past the edge of the grid are snapped to the edge.
+        """
+        start, step, size = axis_info
+        idx = np.rint((values - start) / step)
+        return np.clip(idx, 0, size - 1).astype(np.int64)
+
+    def elevation_at(self, lat, lon) -> np.ndarray:
+        """
+        Returns the GEBCO elevation (m, negative below sea level) for each lat/lon pair as floats.
+        Pairs with a missing lat or lon are NaN.
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        elevations = np.full(lat.shape, np.nan)
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        if not valid.any():
+            return elevations
+
+        lat, lon = lat[valid], lon[valid]
+        values = np.full(lat.shape, np.nan)
+        missing = np.ones(lat.shape, dtype=bool)
+
+        if self.tile_cache is not None:
+            values, hits = self.tile_cache.lookup(
+                lat_idx=self.nearest_index(lat, self.tile_cache.lat_axis),
+                lon_idx=self.nearest_index(lon, self.tile_cache.lon_axis)
+            )
+            missing = ~hits
+
+        if missing.any():
+            ds = self.dataset
+            lat_idx = self.nearest_index(lat[missing], self._lat_axis)
+            lon_idx = self.nearest_index(lon[missing], self._lon_axis)
+
+            # One pointwise selection for all of the points not in a tile
+            values[missing] = ds[self.elevation_var].isel(
+                lat=xr.DataArray(lat_idx, dims='points'),
+                lon=xr.DataArray(lon_idx, dims='points')
+            ).values
+
+        elevations[valid] = values
+        return elevations
+
+    def depth_at(self, lat, lon) -> np.ndarray:
+        """
+        Returns the total water column depth (positive meters) for each lat/lon pair.
+        """
+        return np.abs(self.elevation_at(lat=lat, lon=lon))
+
+
+def _forget_gebco_handles_after_fork() -> None:
+    # A forked process (e.g. a parallel rule worker) can't share the parent's open netCDF handle, so each
+    # process opens the grid again the first time it needs it and keeps it open for the rest of its life
+    for bathymetry in _bathymetry_cache.values():
+        bathymetry._ds = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_gebco_handles_after_fork)
+
+
+def get_gebco_bathymetry(gebco_file: str, tile_cache_dir: str = None) -> GebcoBathymetry:
+    """
+    Returns the process wide GebcoBathymetry for the gebco_file (and tile cache), creating it on first use.
+    """
+    key = (gebco_file, tile_cache_dir)
+    if key not in _bathymetry_cache:
+        _bathymetry_cache[key] = GebcoBathymetry(gebco_file=gebco_file, tile_cache_dir=tile_cache_dir)
+    return _bathymetry_cache[key]
+
+
+def gebco_fingerprint(gebco_file: str, tile_cache_dir: str = None) -> str:
+    """
+    Identity of the GEBCO grid and tiles depths are sampled from (path, size and modification time of the
+    netCDF and of the tile index), without opening them
+    """
+    parts = [str(gebco_file), str(tile_cache_dir)]
+    for path in [Path(gebco_file), Path(tile_cache_dir) / TILE_INDEX_FILE if tile_cache_dir else None]:
+        if path is not None and path.exists():
+            parts += [str(path.stat().st_size), str(path.stat().st_mtime_ns)]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
@@ -0,0 +1,161 @@
+from pathlib import Path
+import json
+import logging
+import numpy as np
+import xarray as xr
+
+logger = logging.getLogger(__name__)
+
+TILE_INDEX_FILE = "index.json"
+
+# (lat_min, lat_max, lon_min, lon_max) of the regions our cruises sample in. A region with lon_min > lon_max
+# crosses the antimeridian (e.g. the Bering Sea from 160E to 155W) and is cut into a tile on each side of it.
+DEFAULT_GEBCO_REGIONS = {
+    "bering_chukchi": (50.0, 75.0, 160.0, -155.0),
+    "gulf_of_alaska": (50.0, 62.0, -160.0, -130.0),
+    "california_current": (30.0, 50.0, -135.0, -115.0),
+}
+
+
+def bounding_box_from_lat_lon(lat, lon, pad: float = 0.5) -> tuple:
+    """
+    Returns the (lat_min, lat_max, lon_min, lon_max) box around a cruise's sample positions,
+    padded by pad degrees. Missing positions are ignored. If the positions are closer together going
+    across the antimeridian, the box goes across it and lon_min > lon_max.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    if np.isnan(lat).all() or np.isnan(lon).all():
+        raise ValueError("Can't make a bounding box without any lat/lon values")
+    lat_min, lat_max = max(float(np.nanmin(lat)) - pad, -90.0), min(float(np.nanmax(lat)) + pad, 90.0)
+
+    # The box leaves out the widest gap between the longitudes, which is across the antimeridian for cruises in the Bering Sea
+    lons = np.unique(lon[~np.isnan(lon)])
+    gaps = np.append(np.diff(lons), lons[0] + 360.0 - lons[-1])
+    widest_gap = int(np.argmax(gaps))
+    if widest_gap == len(lons) - 1:
+        return lat_min, lat_max, max(float(lons[0]) - pad, -180.0), min(float(lons[-1]) + pad, 180.0)
+    lon_min, lon_max = float(lons[widest_gap + 1]) - pad, float(lons[widest_gap]) + pad
+    return lat_min, lat_max, lon_min if lon_min >= -180.0 else lon_min + 360.0, lon_max if lon_max <= 180.0 else lon_max - 360.0
+
+
+def split_at_antimeridian(regions: dict) -> dict:
+    """
+    Splits the regions that cross the antimeridian (lon_min > lon_max) into a {name}_west region up to 180
+    and a {name}_east region from -180, so each half is a tile of its own. Other regions are kept as they are.
+    """
+    split_regions = {}
+    for name, (lat_min, lat_max, lon_min, lon_max) in regions.items():
+        if lon_min > lon_max:
+            split_regions[f"{name}_west"] = (lat_min, lat_max, lon_min, 180.0)
+            split_regions[f"{name}_east"] = (lat_min, lat_max, -180.0, lon_max)
+        else:
+            split_regions[name] = (lat_min, lat_max, lon_min, lon_max)
+    return split_regions
+
+
+def build_gebco_tile_cache(gebco_file: str, cache_dir: str, regions: dict = None, elevation_var: str = "elevation") -> dict:
+    """
+    Cuts the GEBCO grid into one int16 .npy tile per region and writes an index.json next to them
+    with where each tile sits in the full grid. regions is a dict of name: (lat_min, lat_max, lon_min, lon_max),
+    and defaults to DEFAULT_GEBCO_REGIONS. Regions that cross the antimeridian get a tile on each side of it
+    (see split_at_antimeridian). Returns the index that was written.
+    """
+    regions = split_at_antimeridian(regions or DEFAULT_GEBCO_REGIONS)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    with xr.open_dataset(gebco_file) as ds:
+        lat_coords = ds['lat'].values
+        lon_coords = ds['lon'].values
+        index = {
+            "gebco_file": str(gebco_file),
+            "gebco_file_size": Path(gebco_file).stat().st_size,
+            "lat_axis": [float(lat_coords[0]), float(lat_coords[1] - lat_coords[0]), len(lat_coords)],
+            "lon_axis": [float(lon_coords[0]), float(lon_coords[1] - lon_coords[0]), len(lon_coords)],
+            "tiles": {}
+        }
+
+        for name, (lat_min, lat_max, lon_min, lon_max) in regions.items():
+            lat_start, lat_stop = np.searchsorted(lat_coords, [lat_min, lat_max], side='left')
+            lon_start, lon_stop = np.searchsorted(lon_coords, [lon_min, lon_max], side='left')
+            # include the cell on each side so nearest lookups on the edge of the box are still hits
+            lat_start, lat_stop = max(int(lat_start) - 1, 0), min(int(lat_stop) + 1, len(lat_coords))
+            lon_start, lon_stop = max(int(lon_start) - 1, 0), min(int(lon_stop) + 1, len(lon_coords))
+
+            tile = ds[elevation_var].isel(lat=slice(lat_start, lat_stop), lon=slice(lon_start, lon_stop)).values
+            tile_file = f"{name}.npy"
+            np.save(cache_dir / tile_file, tile.astype(np.int16))
+            index["tiles"][name] = {
+                "file": tile_file,
+                "lat_start": lat_start,
+                "lon_start": lon_start,
+                "shape": [int(tile.shape[0]), int(tile.shape[1])],
+            }
+            logger.info(f"Wrote GEBCO tile {name} {tile.shape} to {cache_dir / tile_file}")
+
+    with open(cache_dir / TILE_INDEX_FILE, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    return index
+
+
+class GebcoTileCache:
+    """
+    Reads the regional tiles written by build_gebco_tile_cache. Tiles are memory mapped the first
+    time a point falls in them, so a lookup only touches the pages of the tiles it needs.
+    """
+
+    def __init__(self, cache_dir: str):
+
+        self.cache_dir = Path(cache_dir)
+        with open(self.cache_dir / TILE_INDEX_FILE) as f:
+            self.index = json.load(f)
+
+        self.gebco_file = self.index['gebco_file']
+        self.lat_axis = tuple(self.index['lat_axis'])
+        self.lon_axis = tuple(self.index['lon_axis'])
+        self._tiles = {}
+
+    @classmethod
+    def load(cls, cache_dir: str):
+        """
+        Returns the GebcoTileCache in cache_dir, or None if there is no tile cache there.
+        """
+        if cache_dir is None or not (Path(cache_dir) / TILE_INDEX_FILE).exists():
+            return None
+        return cls(cache_dir=cache_dir)
+
+    def matches(self, gebco_file: str) -> bool:
+        """
+        Checks that the tiles were cut from this gebco_file (same name and size)
+        """
+        gebco_path = Path(gebco_file)
+        if gebco_path.name != Path(self.gebco_file).name:
+            return False
+        # Only compare sizes when the full grid is available locally
+        return not gebco_path.exists() or gebco_path.stat().st_size == self.index['gebco_file_size']
+
+    def _tile(self, name: str) -> np.ndarray:
+        if name not in self._tiles:
+            self._tiles[name] = np.load(self.cache_dir / self.index['tiles'][name]['file'], mmap_mode='r')
+        return self._tiles[name]
+
+    def lookup(self, lat_idx: np.ndarray, lon_idx: np.ndarray) -> tuple:
+        """
+        Takes full grid indices and returns (elevations, hits). elevations is NaN where hits is False,
+        i.e. where the point is not in any tile.
+        """
+        elevations = np.full(lat_idx.shape, np.nan)
+        hits = np.zeros(lat_idx.shape, dtype=bool)
+
+        for name, tile_info in self.index['tiles'].items():
+            rows = lat_idx - tile_info['lat_start']
+            cols = lon_idx - tile_info['lon_start']
+            in_tile = (~hits & (rows >= 0) & (rows < tile_info['shape'][0]) &
+                       (cols >= 0) & (cols < tile_info['shape'][1]))
+            if in_tile.any():
+                elevations[in_tile] = self._tile(name)[rows[in_tile], cols[in_tile]]
+                hits |= in_tile
+
+        return elevations, hits
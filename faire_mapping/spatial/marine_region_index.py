@@ -0,0 +1,90 @@
+from pathlib import Path
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+
+logger = logging.getLogger(__name__)
+
+# World Seas IHO downloaded from: https://marineregions.org/downloads.php
+IHO_SHAPEFILE = Path(__file__).resolve().parent.parent / "World_Seas_IHO_v3" / "World_Seas_IHO_v3.shp"
+
+# One index per shapefile path for the life of the process
+_region_index_cache = {}
+
+
+class MarineRegionIndex:
+    """
+    Loads the IHO World Seas polygons once and resolves lon/lat points to the name of the
+    sea that contains them with a spatial index (STRtree) instead of scanning every polygon.
+    """
+
+    region_name_col = "NAME"
+
+    def __init__(self, shapefile_path: str = None):
+
+        self.shapefile_path = str(shapefile_path or IHO_SHAPEFILE)
+        logger.info(f"Loading marine regions from {self.shapefile_path}")
+        regions = gpd.read_file(self.shapefile_path)
+
+        # Keep the shapefile order, the first region that contains a point is the one that is used.
+        self.regions = regions[[self.region_name_col, 'geometry']].reset_index(drop=True)
+        self.regions.sindex  # build the STRtree up front so the first lookup does not pay for it
+
+    def lookup(self, lon: pd.Series, lat: pd.Series) -> pd.Series:
+        """
+        Returns the name of the region that contains each (lon, lat) point, indexed like lon.
+        Points that are missing or not in any region are NaN. lon and lat must already be floats.
+        """
+        lon = pd.Series(lon)
+        lat = pd.Series(lat, index=lon.index)
+        region_names = pd.Series(np.nan, index=lon.index, dtype=object)
+
+        valid = lon.notna() & lat.notna()
+        if not valid.any():
+            return region_names
+
+        # Only query each distinct coordinate once, bottles from the same cast share a position
+        unique_points = pd.DataFrame({'lon': lon[valid], 'lat': lat[valid]}).drop_duplicates()
+        points = gpd.GeoDataFrame(geometry=gpd.points_from_xy(unique_points['lon'], unique_points['lat']),
+                                  crs=self.regions.crs)
+
+        point_pos, region_pos = self.regions.sindex.query(points.geometry, predicate='within')
+
+        # A point on a shared boundary can fall in more than one region, keep the first in shapefile order
+        matches = (pd.DataFrame({'point': point_pos, 'region': region_pos})
+                   .sort_values(['point', 'region'])
+                   .drop_duplicates('point'))
+        point_region_names = np.full(len(unique_points), np.nan, dtype=object)
+        point_region_names[matches['point'].to_numpy()] = \
+            self.regions[self.region_name_col].to_numpy()[matches['region'].to_numpy()]
+        unique_points['region_name'] = point_region_names
+
+        looked_up = pd.DataFrame({'lon': lon[valid], 'lat': lat[valid]}).merge(
+            unique_points, on=['lon', 'lat'], how='left')
+        region_names[valid] = looked_up['region_name'].to_numpy()
+
+        return region_names
+
+
+def get_marine_region_index(shapefile_path: str = None) -> MarineRegionIndex:
+    """
+    Returns the process wide MarineRegionIndex for the shapefile, building it on first use.
+    """
+    key = str(shapefile_path or IHO_SHAPEFILE)
+    if key not in _region_index_cache:
+        _region_index_cache[key] = MarineRegionIndex(shapefile_path=key)
+    return _region_index_cache[key]
+
+
+def marine_region_fingerprint(shapefile_path: str = None) -> str:
+    """
+    Identity of the IHO regions shapefile geo_loc_name is looked up in (path, size and modification time of the
+    shapefile and its sidecar files), without reading it
+    """
+    shapefile_path = Path(shapefile_path or IHO_SHAPEFILE)
+    parts = [str(shapefile_path)]
+    for path in sorted(shapefile_path.parent.glob(f"{shapefile_path.stem}.*")):
+        parts += [path.name, str(path.stat().st_size), str(path.stat().st_mtime_ns)]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
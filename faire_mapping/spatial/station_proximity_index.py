@@ -0,0 +1,99 @@
+import logging
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from geopy.distance import geodesic
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def lat_lon_to_unit_vectors(lat, lon) -> np.ndarray:
+    """
+    Converts lat/lon degrees to 3-D points on the unit sphere so straight line (chord) distances
+    can be used in a KD-tree without worrying about the antimeridian.
+    """
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def km_to_chord(distance_km: float) -> float:
+    return 2 * np.sin(distance_km / (2 * EARTH_RADIUS_KM))
+
+
+class StationProximityIndex:
+    """
+    KD-tree of the reference stations for finding the stations within a radius of many sample
+    positions at once. Candidates are found on a sphere and then refined with the exact geodesic
+    distance, so results match geopy's geodesic distance.
+    """
+
+    default_radius_km = 5
+    # Account for DBO1.9 which moved but coordinates haven't been updated yet - see email from Shaun
+    # Also make exception for DBO4.1 (took this out since changing from 1 km to 3 km)
+    station_radius_exceptions_km = {'DBO1.9': 10.5}
+    # Sphere vs. ellipsoid distances differ by less than 0.5%, search a bit wider and let the geodesic decide
+    candidate_search_margin = 1.01
+    # Number of nearest stations to refine when looking for the closest station
+    closest_candidates = 3
+
+    def __init__(self, station_lat_lon_ref_dict: dict):
+
+        self.station_names = np.array(list(station_lat_lon_ref_dict.keys()), dtype=object)
+        self.station_lats = np.array([float(coords['lat']) for coords in station_lat_lon_ref_dict.values()])
+        self.station_lons = np.array([float(coords['lon']) for coords in station_lat_lon_ref_dict.values()])
+        self.station_radii_km = np.array([self.station_radius_km(station) for station in self.station_names])
+        self.tree = cKDTree(lat_lon_to_unit_vectors(self.station_lats, self.station_lons))
+
+    def station_radius_km(self, station_name: str) -> float:
+        return self.station_radius_exceptions_km.get(station_name, self.default_radius_km)
+
+    def _geodesic_km(self, lat: float, lon: float, station_positions) -> np.ndarray:
+        return np.array([geodesic((lat, lon), (self.station_lats[pos], self.station_lons[pos])).kilometers
+                         for pos in station_positions])
+
+    def query(self, lat, lon) -> pd.DataFrame:
+        """
+        For each lat/lon returns a row with:
+            stations_within - ' | ' joined stations within their radius sorted by distance ('' if none)
+            station_distances_km - the distances of those stations in the same order
+            closest_station/closest_station_distance_km - the nearest station, whether or not it is within its radius
+        Rows with a missing lat or lon are all NaN. Each distinct position is only looked up once.
+        """
+        positions = pd.DataFrame({'lat': pd.Series(lat).to_numpy(dtype=float),
+                                  'lon': pd.Series(lon).to_numpy(dtype=float)})
+        valid = positions.notna().all(axis=1)
+        unique_positions = positions[valid].drop_duplicates().reset_index(drop=True)
+
+        results = []
+        if len(unique_positions) > 0 and len(self.station_names) > 0:
+            points = lat_lon_to_unit_vectors(unique_positions['lat'], unique_positions['lon'])
+            search_chord = km_to_chord(self.station_radii_km.max() * self.candidate_search_margin)
+            candidate_lists = self.tree.query_ball_point(points, r=search_chord)
+            k = min(self.closest_candidates, len(self.station_names))
+            _, nearest_lists = self.tree.query(points, k=k)
+            nearest_lists = np.asarray(nearest_lists).reshape(len(points), k)
+
+            for (lat_val, lon_val), candidates, nearest in zip(unique_positions.itertuples(index=False), candidate_lists, nearest_lists):
+                # sorted so ties keep the reference sheet order
+                candidates = np.sort(np.asarray(candidates, dtype=int))
+                distances = self._geodesic_km(lat_val, lon_val, candidates)
+                within = distances <= self.station_radii_km[candidates]
+                order = np.argsort(distances[within], kind='stable')
+                within_stations = self.station_names[candidates[within]][order]
+
+                nearest_distances = self._geodesic_km(lat_val, lon_val, nearest)
+                closest = int(np.argmin(nearest_distances))
+
+                results.append({
+                    'stations_within': ' | '.join(within_stations),
+                    'station_distances_km': list(distances[within][order]),
+                    'closest_station': self.station_names[nearest[closest]],
+                    'closest_station_distance_km': nearest_distances[closest],
+                })
+
+        result_cols = ['stations_within', 'station_distances_km', 'closest_station', 'closest_station_distance_km']
+        unique_results = pd.concat([unique_positions, pd.DataFrame(results, columns=result_cols)], axis=1)
+        return positions.merge(unique_results, on=['lat', 'lon'], how='left')[result_cols].set_axis(pd.Series(lat).index)
@@ -0,0 +1,154 @@
+from pathlib import Path
+from typing import List, Optional
+import hashlib
+import json
+import logging
+import os
+import pickle
+import pandas as pd
+from faire_mapping.utils import FAIRE_MAPPING_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+# Columns reset_index() adds (the row's old position). They change for every row after an inserted row, so they
+# aren't part of a row's fingerprint when rows are keyed by a column
+POSITIONAL_COLS = ('index', 'level_0')
+
+# One store per cache_dir for the life of the process
+_incremental_stores = {}
+
+
+def code_fingerprint() -> str:
+    """
+    Fingerprint of the faire_mapping source files (path, size and modification time), so stored results
+    are not reused after the mapper or rule code changes
+    """
+    file_stats = sorted((str(path.relative_to(PACKAGE_DIR)), path.stat().st_size, path.stat().st_mtime_ns)
+                        for path in PACKAGE_DIR.rglob('*.py'))
+    return hashlib.sha256(repr(file_stats).encode()).hexdigest()
+
+
+def rule_fingerprint(rule) -> str:
+    """
+    Fingerprint of a TransformationRule: its settings, the code of its transform and the simple values
+    the transform closes over (e.g. the pressure_cols passed to get_max_depth_with_pressure_fallback)
+    """
+    transform = rule.transform
+    code = getattr(transform, '__code__', None)
+    closure_values = []
+    for cell in getattr(transform, '__closure__', None) or ():
+        try:
+            value = cell.cell_contents
+        except ValueError: # empty cell
+            continue
+        if isinstance(value, (str, int, float, bool, list, tuple, type(None))):
+            closure_values.append(repr(value))
+    parts = [rule.name, rule.apply_mode, repr(rule.mapping_type), repr(sorted(rule.faire_cols or [])), repr(rule.metadata_pattern),
+             repr(rule.also_update_source), repr(rule.row_local), getattr(transform, '__qualname__', repr(transform)),
+             code.co_code.hex() if code is not None else '', repr(code.co_consts) if code is not None else '', *closure_values]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+def frame_fingerprint(df: Optional[pd.DataFrame]) -> str:
+    """
+    Fingerprint of a data frame's columns and values (e.g. a reference sheet), '' for None
+    """
+    if df is None:
+        return ''
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha256(json.dumps([str(col) for col in df.columns]).encode() + row_hashes.tobytes()).hexdigest()
+
+
+def pipeline_fingerprint(mapping_dict: dict, rules: List, source_columns, row_key_col: str = None, reference_fingerprint: str = None) -> str:
+    """
+    Fingerprint of everything other than the row values that decides a pipeline's output: the mapping dict,
+    the rules (in order), the source columns, the column rows are keyed by, the package code and the reference
+    data the rules look rows up in (reference_fingerprint, e.g. station sheet, vocabulary version, GEBCO grid)
+    """
+    parts = [json.dumps(mapping_dict, sort_keys=True, default=str), json.dumps([str(col) for col in source_columns]),
+             *[rule_fingerprint(rule) for rule in rules], code_fingerprint(), str(row_key_col), reference_fingerprint or '']
+    return hashlib.sha256('\x1e'.join(parts).encode()).hexdigest()
+
+
+def row_fingerprints(df: pd.DataFrame, key_col: str = None) -> Optional[pd.Series]:
+    """
+    One uint64 hash per source row, None if the values can't be hashed (e.g. lists). With key_col (e.g. samp_name)
+    a row is identified by its values (which include key_col) and not its index label or position, so adding or
+    removing a row doesn't change the fingerprints of the rows after it. Without key_col the index label is hashed too.
+    """
+    try:
+        if key_col is not None and key_col in df.columns:
+            return pd.util.hash_pandas_object(df.drop(columns=[col for col in POSITIONAL_COLS if col in df.columns and col != key_col]), index=False)
+        return pd.util.hash_pandas_object(df, index=True)
+    except TypeError as e:
+        logger.warning(f"Could not fingerprint the source rows ({e}), they will all be transformed")
+        return None
+
+
+class IncrementalResultStore:
+    """
+    Keeps the transformed output of a pipeline run on disk keyed by row fingerprint, so the next run with the
+    same mapping dict, rules, code and reference data only has to transform the rows that were added or changed. One pickle per
+    store_key (e.g. sample metadata file + pipeline name) and pipeline fingerprint.
+    """
+
+    def __init__(self, cache_dir: str = None):
+
+        self.cache_dir = Path(cache_dir) if cache_dir else FAIRE_MAPPING_CACHE_DIR / "incremental"
+
+    def _store_path(self, store_key: str, pipeline_key: str) -> Path:
+        store_hash = hashlib.sha256(str(store_key).encode()).hexdigest()[:16]
+        return self.cache_dir / f"{store_hash}_{pipeline_key[:16]}.pkl"
+
+    def load(self, store_key: str, pipeline_key: str) -> Optional[pd.DataFrame]:
+        """
+        Returns the stored results (indexed by row fingerprint) or None if there are none for this pipeline fingerprint
+        """
+        store_path = self._store_path(store_key, pipeline_key)
+        if not store_path.exists():
+            return None
+        try:
+            with open(store_path, 'rb') as f:
+                stored = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read stored transformation results {store_path} ({e}), transforming every row")
+            return None
+        if stored.get('pipeline_key') != pipeline_key:
+            return None
+        return stored['results']
+
+    def save(self, store_key: str, pipeline_key: str, results: pd.DataFrame) -> None:
+        """
+        Stores the results (indexed by row fingerprint), replacing the last results for the store_key
+        """
+        store_path = self._store_path(store_key, pipeline_key)
+        results = results[~results.index.duplicated()]
+        try:
+            store_path.parent.mkdir(parents=True, exist_ok=True)
+            store_hash = store_path.name.split('_')[0]
+            for old_path in store_path.parent.glob(f"{store_hash}_*.pkl"):
+                # results from older mapping dicts/rules/code can't be used again
+                if old_path != store_path:
+                    old_path.unlink()
+            tmp_path = store_path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'pipeline_key': pipeline_key, 'results': results}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, store_path)
+        except OSError as e:
+            # The store is only an optimization, the results are still returned
+            logger.warning(f"Could not write transformation results to {store_path}: {e}")
+
+    def clear(self) -> None:
+        for store_path in self.cache_dir.glob("*.pkl"):
+            store_path.unlink()
+
+
+def get_incremental_result_store(cache_dir: str = None) -> IncrementalResultStore:
+    """
+    Returns the process wide IncrementalResultStore for cache_dir, creating it on first use.
+    """
+    key = str(cache_dir)
+    if key not in _incremental_stores:
+        _incremental_stores[key] = IncrementalResultStore(cache_dir=cache_dir)
+    return _incremental_stores[key]
@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import pandas as pd
+from faire_mapping.utils import FAIRE_MAPPING_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Set to 1/true/yes to profile the transformation rules without changing the config file
+PROFILE_ENV_VAR = "FAIRE_MAPPING_PROFILE"
+# Set to 1/true/yes to also measure the peak memory of each rule (slows every allocation down while profiling)
+PROFILE_MEMORY_ENV_VAR = "FAIRE_MAPPING_PROFILE_MEMORY"
+# Reports are written here if the config doesn't set transformation_profile_file
+DEFAULT_PROFILE_DIR = FAIRE_MAPPING_CACHE_DIR / "profiles"
+
+# One profiler for the life of the process, so the sample, NC and extraction blank pipelines share a report
+_rule_profiler = None
+
+
+def profiling_enabled(config_file: dict = None) -> bool:
+    """
+    Profiling is on if the config has profile_transformations: true or FAIRE_MAPPING_PROFILE is set
+    """
+    if config_file and config_file.get('profile_transformations'):
+        return True
+    return os.environ.get(PROFILE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def memory_profiling_enabled(config_file: dict = None) -> bool:
+    """
+    Peak memory is measured if the config has profile_transformation_memory: true or FAIRE_MAPPING_PROFILE_MEMORY is set
+    """
+    if config_file and config_file.get('profile_transformation_memory'):
+        return True
+    return os.environ.get(PROFILE_MEMORY_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes')
+
+
+@dataclass
+class RuleProfile:
+    """
+    Measurements for one rule application
+    """
+    pipeline: str # Which pipeline ran the rule (e.g. samples, negative controls, extraction blanks)
+    rule_name: str
+    faire_col: str
+    apply_mode: str
+    rows: int # Rows in the source df
+    wall_time: float # Seconds
+    cpu_time: float # Seconds of CPU used by the thread that ran the rule (worker processes of parallel rules are not included)
+    peak_memory_delta: Optional[int] # Bytes allocated at the peak above what was allocated when the rule started (from tracemalloc, None if memory isn't traced)
+
+    @property
+    def rows_per_sec(self) -> Optional[float]:
+        return self.rows / self.wall_time if self.wall_time > 0 else None
+
+
+class RuleProfiler:
+    """
+    Records wall time, CPU time and rows (and peak memory if trace_memory is on) for every rule application
+    the pipelines run and aggregates them into a per rule report. Memory is tracked with tracemalloc, which is
+    process wide, so it is only started for the first rule profiled with trace_memory on and stopped again by
+    stop(). Peaks are approximate when rules run on the thread scheduler.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+
+        self.profiles: List[RuleProfile] = []
+        self.trace_memory = trace_memory
+        self._started_tracemalloc = False # Only stop tracemalloc if this profiler started it
+        self._lock = threading.Lock()
+
+    def _start_memory_tracing(self) -> None:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        """
+        Stops tracemalloc if this profiler started it (it is started again if another rule is profiled with trace_memory on)
+        """
+        with self._lock:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    @contextmanager
+    def profile(self, pipeline: str, rule_name: str, faire_col: str, apply_mode: str, rows: int):
+        """
+        Context manager that measures the rule application run inside it
+        """
+        if self.trace_memory:
+            self._start_memory_tracing()
+        trace_memory = self.trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            start_memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start_wall
+            cpu_time = time.thread_time() - start_cpu
+            peak_memory_delta = None
+            if trace_memory and tracemalloc.is_tracing():
+                _, peak_memory = tracemalloc.get_traced_memory()
+                peak_memory_delta = max(peak_memory - start_memory, 0)
+            profile = RuleProfile(pipeline=pipeline, rule_name=rule_name, faire_col=faire_col, apply_mode=apply_mode,
+                                  rows=rows, wall_time=wall_time, cpu_time=cpu_time, peak_memory_delta=peak_memory_delta)
+            with self._lock:
+                self.profiles.append(profile)
+
+    def applications_df(self) -> pd.DataFrame:
+        """
+        One row per rule application
+        """
+        columns = [field for field in RuleProfile.__dataclass_fields__] + ['rows_per_sec']
+        return pd.DataFrame([{**asdict(profile), 'rows_per_sec': profile.rows_per_sec} for profile in self.profiles],
+                            columns=columns).astype({'peak_memory_delta': float})
+
+    def report_df(self) -> pd.DataFrame:
+        """
+        Totals per pipeline and rule, slowest first
+        """
+        applications_df = self.applications_df()
+        report_df = applications_df.groupby(['pipeline', 'rule_name'], sort=False).agg(
+            applications=('faire_col', 'count'),
+            rows=('rows', 'sum'),
+            wall_time=('wall_time', 'sum'),
+            cpu_time=('cpu_time', 'sum'),
+            peak_memory_delta=('peak_memory_delta', 'max'))
+        report_df['rows_per_sec'] = report_df['rows'] / report_df['wall_time'].where(report_df['wall_time'] > 0)
+        report_df['share_of_wall_time'] = report_df['wall_time'] / report_df['wall_time'].sum()
+        return report_df.sort_values('wall_time', ascending=False)
+
+    def format_report(self) -> str:
+        if not self.profiles:
+            return "No transformation rules were profiled"
+        report_df = self.report_df()
+        peak_memory_delta = report_df.pop('peak_memory_delta')
+        if peak_memory_delta.notna().any():
+            report_df['peak_memory_mb'] = peak_memory_delta / 1e6
+        total_wall_time = report_df['wall_time'].sum()
+        table = report_df.to_string(float_format=lambda value: f"{value:,.3f}")
+        return f"Transformation rule profile ({len(self.profiles)} rule applications, {total_wall_time:.2f} s in rules)\n{table}"
+
+    def print_report(self) -> None:
+        print(f"\n{self.format_report()}\n")
+
+    def write_json(self, path: str = None) -> Path:
+        """
+        Writes the per application measurements and the per rule throughput (rows/sec) to a json file.
+        The throughput is what TransformationPipeline.plan reads to estimate costs.
+        """
+        path = Path(path) if path else DEFAULT_PROFILE_DIR / f"transformation_profile_{datetime.now().strftime('%Y%m%dT%H%M%S')}.json"
+        rule_totals = self.applications_df().groupby('rule_name').agg(rows=('rows', 'sum'), wall_time=('wall_time', 'sum'))
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            "applications": [{**asdict(profile), 'rows_per_sec': profile.rows_per_sec} for profile in self.profiles],
+            "rule_throughput": {rule_name: {'rows': int(totals['rows']), 'wall_time': float(totals['wall_time']),
+                                            'rows_per_sec': float(totals['rows'] / totals['wall_time']) if totals['wall_time'] > 0 else None}
+                                for rule_name, totals in rule_totals.iterrows()},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        logger.info(f"Wrote transformation rule profile to {path}")
+        return path
+
+    def clear(self) -> None:
+        with self._lock:
+            self.profiles = []
+
+
+def load_rule_throughput(path: str = None) -> Dict[str, float]:
+    """
+    Returns {rule_name: rows_per_sec} from a profile written by RuleProfiler.write_json (the configured
+    transformation_profile_file, or the newest one in the profiles cache dir if path is None), or {} if there isn't one
+    """
+    if path is not None and not Path(path).exists():
+        return {}
+    if path is None:
+        profile_paths = sorted(DEFAULT_PROFILE_DIR.glob("transformation_profile_*.json"), key=lambda profile_path: profile_path.stat().st_mtime)
+        if not profile_paths:
+            return {}
+        path = profile_paths[-1]
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read transformation rule profile {path}: {e}")
+        return {}
+    return {rule_name: totals['rows_per_sec'] for rule_name, totals in report.get('rule_throughput', {}).items()
+            if totals.get('rows_per_sec')}
+
+
+def get_rule_profiler(trace_memory: bool = False) -> RuleProfiler:
+    """
+    Returns the process wide RuleProfiler, creating it on first use. trace_memory turns on memory tracing
+    for the rules profiled from now on (it stays on until the profiler's trace_memory is set back to False).
+    """
+    global _rule_profiler
+    if _rule_profiler is None:
+        _rule_profiler = RuleProfiler()
+    if trace_memory:
+        _rule_profiler.trace_memory = True
+    return _rule_profiler
@@ -19,10 +19,7 @@ def get_neg_cont_type_from_ome_sample_name(mapper: FaireSampleMetadataMapper):
         return df[metadata_col].apply(mapper.add_neg_cont_type)
     return (
             TransformationBuilder('neg_cont_type_from_ome_sampe_name')
-            .when(lambda f, m, mt: (
-                f == 'neg_cont_type' and
-                mt == 'related'
-            ))
+            .for_faire_cols('neg_cont_type')
             .apply(
                 apply_neg_cont_type_deduction,
                 mode='direct'
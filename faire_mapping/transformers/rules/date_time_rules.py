@@ -12,15 +12,14 @@ def get_eventDate_iso8601_rule(mapper: FaireSampleMetadataMapper):
     """
     def apply_date_conversion(df, faire_col, metadata_col):
         """
-        Apply date conversion using the mapper's convert_date_to_iso8601 method
+        Apply date conversion using the mapper's convert_dates_to_iso8601 method
         """
-        return df[metadata_col].apply(mapper.convert_date_to_iso8601)
+        return mapper.convert_dates_to_iso8601(df[metadata_col])
     
     return (
         TransformationBuilder('eventDate_to_iso8601')
-        .when(lambda f, m, mt: 
-            f == 'eventDate' and 
-            mt == 'related')
+        .for_faire_cols('eventDate')
+        .reads()
         .apply(
             apply_date_conversion,
             mode='direct'
@@ -37,15 +36,14 @@ def get_date_ext_iso8601_rule(mapper: FaireSampleMetadataMapper):
     """
     def apply_date_conversion(df, faire_col, metadata_col):
         """
-        Apply date conversion using the mapper's convert_date_to_iso8601 method
+        Apply date conversion using the mapper's convert_dates_to_iso8601 method
         """
-        return df[metadata_col].apply(mapper.convert_date_to_iso8601)
+        return mapper.convert_dates_to_iso8601(df[metadata_col])
     
     return (
         TransformationBuilder('eventDate_to_iso8601')
-        .when(lambda f, m, mt: 
-            f == 'date_ext' and 
-            mt == 'related')
+        .for_faire_cols('date_ext')
+        .reads()
         .apply(
             apply_date_conversion,
             mode='direct'
@@ -62,7 +60,7 @@ def get_date_duration_rule(mapper: FaireSampleMetadataMapper):
     """
     def apply_duration_calculation(df, faire_col, metadata_col):
         """
-        Apply duration calculation using the mapper's calculate_date_duration method
+        Apply duration calculation using the mapper's calculate_date_durations method
         """
         date_cols = [col.strip() for col in metadata_col.split('|')]
 
@@ -73,24 +71,18 @@ def get_date_duration_rule(mapper: FaireSampleMetadataMapper):
         start_date_col = date_cols[0]
         end_date_col = date_cols[1]
 
-        # Apply the calculation to each row
-        return df.apply(
-            lambda row: mapper.calculate_date_duration(
-                metadata_row=row,
-                start_date_col=start_date_col,
-                end_date_col=end_date_col
-            ),
-            axis=1
+        return mapper.calculate_date_durations(
+            df=df,
+            start_date_col=start_date_col,
+            end_date_col=end_date_col
         )
     
     date_fields = ['prepped_samp_store_dur', 'eventDurationValue']
     return (
         TransformationBuilder('date_duration_calculation')
-        .when(lambda f, m, mt: (
-            f in date_fields and
-            '|' in m and
-            mt == 'related'
-        ))
+        .for_faire_cols(*date_fields)
+        .when_metadata_matches(r'\|')
+        .reads()
         .apply(
             apply_duration_calculation,
             mode='direct'
@@ -10,28 +10,20 @@ def get_well_number_from_well_field(mapper: FaireSampleMetadataMapper):
     Rule for getting the well number from a well field column that has a value like G1 -> 1
     Expects metadata_col to be 'well_col'
     """
-    def apply_well_number_deduction(df, faire_col, metadata_col):
+    def apply_well_number_deduction(columns, faire_col, metadata_col):
             """
-            Apply well number deduction using the mapper's get_well_number_from_well_field method.
+            Apply well number deduction using the mapper's get_well_numbers_from_well_field method
+            (get_well_number_from_well_field is the row version).
             """     
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.get_well_number_from_well_field(
-                  metadata_row=row,
-                  well_col=metadata_col
-                ),
-                axis=1
-            )
+            return mapper.get_well_numbers_from_well_field(wells=columns['wells'])
     
     return (
             TransformationBuilder('well_number_from_well_field')
-            .when(lambda f, m, mt: (
-                f == 'extract_well_number' and
-                mt == 'related'
-            ))
+            .for_faire_cols('extract_well_number')
             .apply(
                 apply_well_number_deduction,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'wells': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -42,28 +34,20 @@ def get_well_position_from_well_field(mapper: FaireSampleMetadataMapper):
     Rule for getting the well position from a well field column that has a value like G1 -> G
     Expects metadata_col to be 'well_col'
     """
-    def apply_well_position_deduction(df, faire_col, metadata_col):
+    def apply_well_position_deduction(columns, faire_col, metadata_col):
             """
-            Apply well postion deduction using the mapper's get_well_position_from_well_field method.
+            Apply well postion deduction using the mapper's get_well_positions_from_well_field method
+            (get_well_position_from_well_field is the row version).
             """     
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.get_well_position_from_well_field(
-                  metadata_row=row,
-                  well_col=metadata_col
-                ),
-                axis=1
-            )
+            return mapper.get_well_positions_from_well_field(wells=columns['wells'])
     
     return (
             TransformationBuilder('well_postion_from_well_field')
-            .when(lambda f, m, mt: (
-                f == 'extract_well_position' and
-                mt == 'related'
-            ))
+            .for_faire_cols('extract_well_position')
             .apply(
                 apply_well_position_deduction,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'wells': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -9,7 +9,7 @@ def get_exact_mappings_rule(mapper: FaireSampleMetadataMapper):
     """
     return (
         TransformationBuilder('exact_mapping')
-        .when(lambda f, m, mt: mt == 'exact')
+        .reads()
         .apply(
             lambda df, f, m: mapper.apply_exact_mappings(df, f, m),
             mode='direct'
@@ -24,7 +24,7 @@ def get_constant_mappings_rule(mapper: FaireSampleMetadataMapper):
     # Rule 2: constant_mappings
     return (
         TransformationBuilder('constant_mapping')
-        .when(lambda f, m, mt: mt == 'constant')
+        .reads(metadata_cols=False)
         .apply(
             lambda df, f, m: mapper.apply_static_mappings(df, f, m),
             mode='direct'
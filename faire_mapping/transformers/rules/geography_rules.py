@@ -13,25 +13,19 @@ def get_geo_loc_name_by_lat_lon_rule(mapper: FaireSampleMetadataMapper):
     """
     def apply_geo_loc(df, faire_col, metadata_col):
         """
-        Apply geo_loc transformation to each row. 
+        Apply geo_loc transformation to the whole lon/lat columns at once.
         This function captures metadta_col in its closure
         """
-        # Create lambda that has access to metadata_col
-        return df.apply(
-            lambda row: mapper.find_geo_loc_by_lat_lon(
-            metadata_row=row,
+        return mapper.find_geo_loc_by_lat_lon_for_df(
+            df=df,
             metadata_cols=metadata_col
-            ),
-            axis=1
         )
     
     return(
         TransformationBuilder('geo_loc_by_lat_lon')
-        .when(lambda f, m, mt: (
-        f == 'geo_loc_name' and
-        mt == 'related' and
-        '|' in m # Metadata column contains pipe separator
-        ))
+        .for_faire_cols('geo_loc_name')
+        .when_metadata_matches(r'\|')
+        .reads()
         .apply(
             apply_geo_loc,
             mode='direct'
@@ -61,10 +55,9 @@ def get_formatted_geo_loc_by_name(mapper: FaireSampleMetadataMapper):
     
     return (
             TransformationBuilder('geo_loc_name_by_name')
-            .when(lambda f, m, mt: (
-                f == 'geo_loc_name' and
-                mt == 'related'
-            ))
+            .for_faire_cols('geo_loc_name')
+            .reads()
+            .memoize()
             .apply(
                 apply_formatted_geo_loc_by_loc,
                 mode='direct'
@@ -109,11 +102,9 @@ def get_env_medium_for_coastal_waters_by_geo_loc_rule(mapper: FaireSampleMetadat
         )
     
     return (TransformationBuilder('env_medium_for_alaska_coastal_waters_by_geo_loc')
-            .when(lambda f, m, mt: (
-                f == 'env_medium' and
-                mt == 'related' and
-                '|' in m
-            ))
+            .for_faire_cols('env_medium')
+            .when_metadata_matches(r'\|')
+            .reads('geo_loc_name', metadata_cols=False)
             .apply(apply_env_medium,
                    mode='direct'
             )
@@ -126,21 +117,19 @@ def get_env_local_scale_by_depth(mapper: FaireSampleMetadataMapper):
     Rule for calculating the env_local_scale from the depth
     Expects metadata_col to be 'depth'.
     """
-    def apply_env_local_scale_calculation_from_depth(df, faire_col, metadata_col):
+    def apply_env_local_scale_calculation_from_depth(columns, faire_col, metadata_col):
             """
-            Apply env_local_scale calculation using the mapper's calculate_env_local_scale method.
+            Apply env_local_scale calculation using the mapper's calculate_env_local_scales method
+            (calculate_env_local_scale is the row version).
             """
-            # Apply the calculation to each row
-            return df[metadata_col].apply(mapper.calculate_env_local_scale)
+            return mapper.calculate_env_local_scales(depths=columns['depths'])
     return (
             TransformationBuilder('env_local_scale_from_depth')
-            .when(lambda f, m, mt: (
-                f == 'env_local_scale' and
-                mt == 'related'
-            ))
+            .for_faire_cols('env_local_scale')
             .apply(
                 apply_env_local_scale_calculation_from_depth,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'depths': metadata_col}
             )
             .for_mapping_type('related')
             .build()
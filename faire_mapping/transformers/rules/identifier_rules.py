@@ -11,30 +11,29 @@ def get_material_samp_id_by_cruisecode_cast_btlnum(mapper: FaireSampleMetadataMa
     Requires the metadata_col to be the cruise code (hardcoded) or the name of the column that has the cruise
     code. (the cast no and bottle no, will be taken from the config file)
     """
-    def apply_materialSampleID_by_cruise_code(df, faire_col, metadata_col):
+    def apply_materialSampleID_by_cruise_code(columns, faire_col, metadata_col):
             """
-            Apply materialSampleID concatenation using the mapper's add_material_sample_id method.
+            Apply materialSampleID concatenation using the mapper's add_material_sample_ids method
+            (add_material_sample_id is the row version).
             """
-            cruise_code = metadata_col
-            
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.add_material_sample_id(
-                    metadata_row=row,
-                    cruise_code=cruise_code
-                ),
-                axis=1
+            # cruise code can be a column with the cruise code or the cruise code hardcoded
+            cruise_code = columns['cruise_codes'] if 'cruise_codes' in columns else metadata_col
+
+            return mapper.add_material_sample_ids(
+                casts=columns['casts'],
+                bottles=columns['bottles'],
+                cruise_code=cruise_code
             )
     
     return (
             TransformationBuilder('materialSampleID_by_cruise_code')
-            .when(lambda f, m, mt: (
-                f == 'materialSampleID' and
-                mt == 'related'
-            ))
+            .for_faire_cols('materialSampleID')
             .apply(
                 apply_materialSampleID_by_cruise_code,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'casts': mapper.sample_metadata_cast_no_col_name,
+                                             'bottles': mapper.sample_metadata_bottle_no_col_name,
+                                             'cruise_codes': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -47,38 +46,35 @@ def get_pps_material_samp_id_by_code_prefix_and_cast(mapper: FaireSampleMetadata
     Expects metadata_col to be 'Cast_col. (or event col) | cruise_prefix'
     cruise_prefix can be hardcoded string or the name of the cruise_prefix column (OCNMS pps had various cruise prefixes)
     """
-    def apply_pps_materialSampleID_by_cast_and_cruise_prefix(df, faire_col, metadata_col):
-            """
-            Apply PPS materialSampleID concatenation using the mapper's add_material_samp_id_for_pps_samp method.
-            """
+    def pps_materialSampleID_inputs(metadata_col):
             metadata_cols = metadata_col.split(' | ')
 
             if len(metadata_cols) < 2: 
                 logger.error(f"Expected at 2 values related to creating the pps cruise code: 'Cast_col (or event col). | cruise_prefix' got: {metadata_col}")
                 raise ValueError(f"MaterialSammpleID requires format 'Cast_col. (or event col) | cruise_prefix'")
-                 
-            cast_col = metadata_cols[0]
-            cruise_prefix = metadata_cols[1]
-            
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.add_material_samp_id_for_pps_samp(
-                  metadata_row=row,
-                  cast_or_event_col=cast_col,
-                  prefix=cruise_prefix
-                ),
-                axis=1
+
+            return {'casts': metadata_cols[0], 'cruise_prefixes': metadata_cols[1]}
+
+    def apply_pps_materialSampleID_by_cast_and_cruise_prefix(columns, faire_col, metadata_col):
+            """
+            Apply PPS materialSampleID concatenation using the mapper's add_material_samp_ids_for_pps_samp method
+            (add_material_samp_id_for_pps_samp is the row version).
+            """
+            # Prefix can the the name of the metadata column or a hard coded prefix
+            cruise_prefix = columns['cruise_prefixes'] if 'cruise_prefixes' in columns else pps_materialSampleID_inputs(metadata_col)['cruise_prefixes']
+
+            return mapper.add_material_samp_ids_for_pps_samp(
+                casts_or_events=columns['casts'],
+                prefix=cruise_prefix
             )
     
     return (
             TransformationBuilder('pps_materialSampleID_by_cast_and_cruise_prefix')
-            .when(lambda f, m, mt: (
-                f == 'materialSampleID' and
-                mt == 'related'
-            ))
+            .for_faire_cols('materialSampleID')
             .apply(
                apply_pps_materialSampleID_by_cast_and_cruise_prefix,
-                mode='direct'
+                mode='vector',
+                inputs=pps_materialSampleID_inputs
             )
             .for_mapping_type('related')
             .build()
@@ -89,21 +85,19 @@ def get_aquamonitor_material_samp_id_by_station(mapper: FaireSampleMetadataMappe
     Rule for calculating getting the MaterialSampleID for a aquamonitor by station.
     Expects metadata_col to be 'station_col'.
     """
-    def apply_aquamonitor_matsampID(df, faire_col, metadata_col):
+    def apply_aquamonitor_matsampID(columns, faire_col, metadata_col):
         """
-        Apply Aquamonitor materialSampleID derivation using the mapper's add_material_samp_id_for_aquamonitor method.
+        Apply Aquamonitor materialSampleID derivation using the mapper's add_material_samp_ids_for_aquamonitor method
+        (add_material_samp_id_for_aquamonitor is the row version).
         """
-        # Apply the calculation to each row
-        return df[metadata_col].apply(mapper.add_material_samp_id_for_aquamonitor)
+        return mapper.add_material_samp_ids_for_aquamonitor(stations=columns['stations'])
     return (
             TransformationBuilder('aquamonitor_materialSampleID')
-            .when(lambda f, m, mt: (
-                f == 'materialSampleID' and
-                mt == 'related'
-            ))
+            .for_faire_cols('materialSampleID')
             .apply(
                 apply_aquamonitor_matsampID,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'stations': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -34,11 +34,10 @@ def get_depth_from_pressure(mapper: FaireSampleMetadataMapper):
         )
    return (
         TransformationBuilder('depth_from_pressure_and_lat')
-        .when(lambda f, m, mt: (
-            f == 'maximumDepthInMeters' and
-            '|' in m and
-            mt == 'related'
-        ))
+        .for_faire_cols('maximumDepthInMeters')
+        .when_metadata_matches(r'\|')
+        .reads()
+        .memoize()
         .apply(
             apply_depth_from_pressure_calculation,
             mode='direct'
@@ -55,27 +54,19 @@ def get_minimum_depth_from_max_minus_1m(mapper: FaireSampleMetadataMapper):
     maximumDepthInMeters col name. If relying on a calculationg for maximumDepthInMeters
     then use the faire_col maximumDepthInMeters for metadata_col in mapping file.
     """
-    def apply_mindepth_from_maxdepth_calculation(df, faire_col, metadata_col):
+    def apply_mindepth_from_maxdepth_calculation(columns, faire_col, metadata_col):
             """
-            Apply depth calculation using the mapper's convert_min_depth_from_minus_one_meter method.
+            Apply depth calculation using the mapper's convert_min_depths_from_minus_one_meter method
+            (convert_min_depth_from_minus_one_meter is the row version).
             """
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.convert_min_depth_from_minus_one_meter(
-                    metadata_row=row,
-                    max_depth_col_name=metadata_col
-                ),
-                axis=1
-            )
+            return mapper.convert_min_depths_from_minus_one_meter(max_depths=columns['max_depths'])
     return (
             TransformationBuilder('mindepth_from_maxdepth_minus_1m')
-            .when(lambda f, m, mt: (
-                f == 'minimumDepthInMeters' and
-                mt == 'related'
-            ))
+            .for_faire_cols('minimumDepthInMeters')
             .apply(
                 apply_mindepth_from_maxdepth_calculation,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'max_depths': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -88,38 +79,41 @@ def get_altitude_from_maxdepth_and_totdepthcol(mapper: FaireSampleMetadataMapper
     Where maximumDepthInMeters can be the name of the depth_col (old name or if created using FAIRe),
     or can be just an integer (for pps where depth is a constant)
     """
-    def apply_altitude_calculation_from_maxdepth_and_totdepth(df, faire_col, metadata_col):
-            """
-            Apply altitude calculation using the mapper's calculate_altitude method.
-            """
+    def altitude_inputs(metadata_col):
             metadata_cols = metadata_col.split(' | ')
 
             if len(metadata_cols) < 2 and len(metadata_cols) > 3: 
                 logger.error(f"Expected at least 2 altitude related columns separated by '|' for alatitude calculation in the format '|' with depth_col first, followed by tot_depth_water_col, followed by the optional exact altitude col, got: {metadata_col}")
                 raise ValueError(f"Altitude calculation requires format 'maximumDepthInMeters | tot_depth_water_col | [exact_altitude_col]")
-                 
+
             max_depth_col = metadata_cols[0]
             tot_depth_col = metadata_cols[1]
-            exact_col = metadata_cols[2] if len(metadata_cols) == 3 else None
-            
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.calculate_altitude(
-                    metadata_row=row,
-                    depth_col=max_depth_col,
-                    tot_depth_col=tot_depth_col
-                ),
-                axis=1
-            )
+
+            # max_depth_col can be a constant depth (for pps) instead of a column
+            try:
+                int(max_depth_col)
+                return {'tot_depths': tot_depth_col}
+            except ValueError:
+                return {'depths': max_depth_col, 'tot_depths': tot_depth_col}
+
+    def apply_altitude_calculation_from_maxdepth_and_totdepth(columns, faire_col, metadata_col):
+            """
+            Apply altitude calculation using the mapper's calculate_altitudes method (calculate_altitude is the row version).
+            """
+            # 'depth_col' can be the name of the depth_col or just an int (for PPS vals)
+            try:
+                depths = int(metadata_col.split(' | ')[0])
+            except ValueError:
+                depths = columns['depths']
+
+            return mapper.calculate_altitudes(depths=depths, tot_depths=columns['tot_depths'])
     return (
             TransformationBuilder('altitude_from_depth_and_tot_depth')
-            .when(lambda f, m, mt: (
-                f == 'altitude' and
-                mt == 'related'
-            ))
+            .for_faire_cols('altitude')
             .apply(
                 apply_altitude_calculation_from_maxdepth_and_totdepth,
-                mode='direct'
+                mode='vector',
+                inputs=altitude_inputs
             )
             .for_mapping_type('related')
             .update_source(True)
@@ -134,36 +128,38 @@ def get_dna_yield_from_conc_and_vol(mapper: FaireSampleMetadataMapper, extractio
     pipeline standardizes the extraction_conc col in the extraciton, builder, but
     this rule still asks that its placed in the metadata_col so it makes sense.
     """
-    def apply_dna_yield_calculation(df, faire_col, metadata_col):
-            """
-            Apply dna_yield calculation using the mapper's calculate_dna_yield method.
-            """
+    def dna_yield_inputs(metadata_col):
             metadata_cols = metadata_col.split(' | ')
 
             if len(metadata_cols) != 2: 
                 logger.error(f"Expected 2 dna_yield related columns separated by '|' for dna_yield calculation with extraction_conc column first, followed by samp_vol column second, got: {metadata_col}")
                 raise ValueError(f"dna_yield calculation requires format 'extraction_conc | samp_vol'")
-                 
-            samp_vol_col = metadata_cols[1]
-            
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.calculate_dna_yield(
-                    metadata_row=row,
-                    sample_vol_metadata_col=samp_vol_col,
-                    extraction_blank=extraction_blank
-                ),
-                axis=1
+
+            if extraction_blank: # common column created in extraction builder
+                samp_vol_col = mapper.extraction_metadata_builder.EXTRACT_BLANK_VOL_WE_DNA_EXT_COL
+            else: # for all other samples will be whatever col is sepcified.
+                samp_vol_col = metadata_cols[1]
+
+            return {'concentrations': mapper.extraction_metadata_builder.EXTRACT_CONC_COL,
+                    'sample_vols': samp_vol_col,
+                    'sample_names': mapper.faire_sample_name_col}
+
+    def apply_dna_yield_calculation(columns, faire_col, metadata_col):
+            """
+            Apply dna_yield calculation using the mapper's calculate_dna_yields method (calculate_dna_yield is the row version).
+            """
+            return mapper.calculate_dna_yields(
+                concentrations=columns['concentrations'],
+                sample_vols=columns['sample_vols'],
+                sample_names=columns['sample_names']
             )
     return (
             TransformationBuilder('dna_yield_from_conc_and_vol')
-            .when(lambda f, m, mt: (
-                f == 'dna_yield' and
-                mt == 'related'
-            ))
+            .for_faire_cols('dna_yield')
             .apply(
                 apply_dna_yield_calculation,
-                mode='direct'
+                mode='vector',
+                inputs=dna_yield_inputs
             )
             .for_mapping_type('related')
             .build()
@@ -177,7 +173,7 @@ def get_tot_depth_water_col_from_lat_lon_or_exact_col(mapper: FaireSampleMetadat
     """
     def apply_tot_depth_water_calculation(df, faire_col, metadata_col):
             """
-            Apply tot_depth_water_col calculation using the mapper's get_tot_depth_water_col_from_lat_lon method.
+            Apply tot_depth_water_col calculation using the mapper's get_tot_depth_water_col_for_df method.
             """
             metadata_cols = metadata_col.split(' | ')
 
@@ -189,22 +185,17 @@ def get_tot_depth_water_col_from_lat_lon_or_exact_col(mapper: FaireSampleMetadat
             lon_col = metadata_cols[1]
             exact_col = metadata_cols[2] if len(metadata_cols) == 3 else None
             
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.get_tot_depth_water_col_from_lat_lon(
-                    metadata_row=row,
-                    lat_col=lat_col,
-                    lon_col=lon_col,
-                    exact_map_col=exact_col
-                ),
-                axis=1
+            # Apply the calculation to the whole columns
+            return mapper.get_tot_depth_water_col_for_df(
+                df=df,
+                lat_col=lat_col,
+                lon_col=lon_col,
+                exact_map_col=exact_col
             )
     return (
             TransformationBuilder('tot_depth_water_col_from_lat_lon_and_exact')
-            .when(lambda f, m, mt: (
-                f == 'tot_depth_water_col' and
-                mt == 'related'
-            ))
+            .for_faire_cols('tot_depth_water_col')
+            .reads('verbatimLatitude', 'verbatimLongitude')
             .apply(
                 apply_tot_depth_water_calculation,
                 mode='direct'
@@ -219,21 +210,19 @@ def get_wind_direction_from_wind_degrees(mapper: FaireSampleMetadataMapper):
     Rule for calculating calculating the wind direction from degrees.
     Expects metadata_col to be 'wind_direction_in_degrees'.
     """
-    def apply_wind_direction_calculation(df, faire_col, metadata_col):
+    def apply_wind_direction_calculation(columns, faire_col, metadata_col):
         """
-        Apply wind_direction calculation using the mapper's convert_wind_degrees_to_direction method.
+        Apply wind_direction calculation using the mapper's convert_wind_degrees_to_directions method
+        (convert_wind_degrees_to_direction is the row version).
         """
-        # Apply the calculation to each row
-        return df[metadata_col].apply(mapper.convert_wind_degrees_to_direction)
+        return mapper.convert_wind_degrees_to_directions(wind_degrees=columns['wind_degrees'])
     return (
             TransformationBuilder('wind_direction_from_degrees')
-            .when(lambda f, m, mt: (
-                f == 'wind_direction' and
-                mt == 'related'
-            ))
+            .for_faire_cols('wind_direction')
             .apply(
                 apply_wind_direction_calculation,
-                mode='direct'
+                mode='vector',
+                inputs=lambda metadata_col: {'wind_degrees': metadata_col}
             )
             .for_mapping_type('related')
             .build()
@@ -45,10 +45,9 @@ def get_nucl_acid_ext_and_nucl_acid_ext_modify_by_word_in_extract_col(mapper: Fa
     
     return (
             TransformationBuilder('nucl_acid_ext_or_modify_from_word_in_notes')
-            .when(lambda f, m, mt: (
-                f in cols_applicable and
-                mt == 'related'
-            ))
+            .for_faire_cols(*cols_applicable)
+            .reads()
+            .memoize()
             .apply(
                 apply_constant_val_based_on_str_method,
                 mode='direct'
@@ -64,14 +63,11 @@ def get_fallback_col_mapping_rule(mapper: FaireSampleMetadataMapper, faire_field
      Can optionally include transform flag for date times 'fallback: primary_col | fallbackcol | transform:true'
      Calls the rule in the main.py file be specifying the faire_field_name it applies to (helps with ordering)
      """
-     def apply_fallback_mapping_rule(df, faire_col, metadata_col):
+     def parse_fallback_metadata_col(metadata_col):
         """
-        Apply fallback logic using the mapper's map_using_two_or_three_cols_if_one_is_na_use_other method.
+        Parse the metadata_col into the fallback columns and the transform flag
         """
         # Remove the 'fallback:' prefix
-        if not metadata_col.startswith('fallback:'):
-             return None
-        # Parse the metadata_col to extract column names and options
         columns_part = metadata_col.replace('fallback:', '').strip()
         parts = [part.strip() for part in columns_part.split('|')]
 
@@ -89,34 +85,48 @@ def get_fallback_col_mapping_rule(mapper: FaireSampleMetadataMapper, faire_field
         if len(columns) < 2:
              logger.error(f"Fallback mapping requires at least 2 columns separated by '|'")
              raise ValueError(f"Fallback mapping requires format 'primary_col | fallback_col1 | [fallback_col2] | [transform: ture/false]'")
-        
-        desired_col = columns[0]
-        use_if_na_col = columns[1] if len(columns) > 1 else None
-        use_if_second_na_col = columns[2] if len(columns) > 2 else None
 
-        # Apply the fallback logic to each row
-        return df.apply(
-             lambda row: mapper.map_using_two_or_three_cols_if_one_is_na_use_other(
-                metadata_row=row,
-                desired_col_name=desired_col,
-                use_if_na_col_name=use_if_na_col,
-                transform_use_col_to_date_format=transform_to_datetime,
-                use_if_second_col_is_na=use_if_second_na_col
-             ),
-             axis=1
+        return columns, transform_to_datetime
+
+     def fallback_inputs(metadata_col):
+        columns, _ = parse_fallback_metadata_col(metadata_col)
+        inputs = {'desired': columns[0], 'use_if_na': columns[1]}
+        if len(columns) > 2:
+             inputs['use_if_second_na'] = columns[2]
+        return inputs
+
+     def apply_fallback_mapping_rule(columns, faire_col, metadata_col):
+        """
+        Apply fallback logic using the mapper's map_using_fallback_cols method
+        (map_using_two_or_three_cols_if_one_is_na_use_other is the row version).
+        """
+        if not metadata_col.startswith('fallback:'):
+             return None
+        fallback_cols, transform_to_datetime = parse_fallback_metadata_col(metadata_col)
+
+        use_if_second_na_values = columns.get('use_if_second_na')
+        if len(fallback_cols) > 2 and use_if_second_na_values is None and transform_to_datetime:
+             # Dates need the third column if the first two are empty (the other mode just uses '')
+             has_desired = columns['desired'].notna() & (columns['desired'] != '')
+             has_use_if_na = columns['use_if_na'].notna() & (columns['use_if_na'] != '')
+             if not (has_desired | has_use_if_na).all():
+                  raise KeyError(f"Column '{fallback_cols[2]}' (use_if_second_na) is not in the source data frame")
+
+        return mapper.map_using_fallback_cols(
+             desired_values=columns['desired'],
+             use_if_na_values=columns['use_if_na'],
+             use_if_second_na_values=use_if_second_na_values,
+             transform_use_col_to_date_format=transform_to_datetime
         )
      
      return (
         TransformationBuilder('fallback_column_mapping')
-            .when(lambda f, m, mt: (
-                m.startswith('fallback:') and
-                f == faire_field_name and
-                '|' in m and # contains pipe separator indicating fallback
-                mt == 'related'
-                ))
+            .for_faire_cols(faire_field_name)
+            .when_metadata_matches(r'^fallback:.*\|') # contains pipe separator indicating fallback
             .apply(
                 apply_fallback_mapping_rule,
-                mode='direct'
+                mode='vector',
+                inputs=fallback_inputs
             )
             .for_mapping_type('related')
             .update_source(True)
@@ -166,12 +176,10 @@ def get_fallback_col_constant_mapping_rule(mapper: FaireSampleMetadataMapper, fa
      
     return (
         TransformationBuilder('fallback_constant_column_mapping')
-            .when(lambda f, m, mt: (
-                m.startswith('fallback_constant:') and
-                f == faire_field_name and
-                '|' in m and # contains pipe separator indicating fallback
-                mt == 'related'
-                ))
+            .for_faire_cols(faire_field_name)
+            .when_metadata_matches(r'^fallback_constant:.*\|') # contains pipe separator indicating fallback
+            .reads()
+            .memoize()
             .apply(
                 apply_fallback_constant_mapping_rule,
                 mode='direct'
@@ -235,10 +243,9 @@ def get_max_depth_with_pressure_fallback(mapper: FaireSampleMetadataMapper, pres
 
     return (
          TransformationBuilder('max_depth_with_pressure_fallback')
-         .when(lambda f, m, mt: (
-              f == 'maximumDepthInMeters' and 
-              mt == 'related'
-         ))
+         .for_faire_cols('maximumDepthInMeters')
+         .reads(*pressure_cols, lat_col, *depth_cols, metadata_cols=False)
+         .memoize()
          .apply(apply_compmlse_depth_calculated, mode='direct')
          .update_source(True)
          .for_mapping_type('related')
@@ -263,10 +270,7 @@ def get_condition_constant_rule(mapper: FaireSampleMetadataMapper, faire_col: st
      
     return (
           TransformationBuilder('conditional_consant_if_not_na')
-            .when(lambda f, m, mt: (
-                f == faire_col and 
-                mt == 'related'
-            ))
+            .for_faire_cols(faire_col)
             .apply(
                 apply_conditional_constant,
                 mode='direct'
@@ -289,10 +293,7 @@ def switch_sign_of_lat_or_lon_deg(mapper: FaireSampleMetadataMapper):
         return df[metadata_col].apply(mapper.switch_lat_lon_degree_to_neg)
     return (
             TransformationBuilder('switch_lat_or_lon')
-            .when(lambda f, m, mt: (
-                f in ['decimalLongitude', 'decimalLatitude'] and
-                mt == 'related'
-            ))
+            .for_faire_cols('decimalLongitude', 'decimalLatitude')
             .apply(
                 apply_lat_lon_sign_switch,
                 mode='direct'
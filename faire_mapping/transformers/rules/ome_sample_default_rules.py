@@ -27,10 +27,7 @@ def get_samp_category_rule(mapper: FaireSampleMetadataMapper):
     
     return(
         TransformationBuilder('samp_category')
-        .when(lambda f, m, mt: (
-        f == 'samp_category' and
-        mt == 'related' 
-        ))
+        .for_faire_cols('samp_category')
         .apply(
              apply_samp_category,
             mode='direct'
@@ -46,10 +43,8 @@ def get_biological_rep_relation_rule(mapper: FaireSampleMetadataMapper):
     """
     return (
             TransformationBuilder('biological_rep_relation')
-            .when(lambda f, m, mt: (
-                mt == 'related' and
-                f == 'biological_rep_relation'
-            ))
+            .for_faire_cols('biological_rep_relation')
+            .row_local(False) # replicates are looked up across all of the samples
             .apply(
                 lambda df, f, m: mapper.add_biological_replicates_column(df, f, m),
                 mode = 'direct'
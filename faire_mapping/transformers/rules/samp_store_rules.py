@@ -19,10 +19,7 @@ def get_samp_store_dur_from_samp_name(mapper: FaireSampleMetadataMapper):
         return df[metadata_col].apply(mapper.get_samp_store_dur)
     return (
             TransformationBuilder('samp_store_dur_from_samp_name')
-            .when(lambda f, m, mt: (
-                f == 'samp_store_dur' and
-                mt == 'related'
-            ))
+            .for_faire_cols('samp_store_dur')
             .apply(
                 apply_samp_store_dur,
                 mode='direct'
@@ -46,10 +43,7 @@ def get_samp_store_loc_from_samp_name(mapper: FaireSampleMetadataMapper):
         return df[metadata_col].apply(mapper.get_samp_store_loc_by_samp_store_dur)
     return (
             TransformationBuilder('samp_store_loc_from_samp_name')
-            .when(lambda f, m, mt: (
-                f == 'samp_store_loc' and
-                mt == 'related'
-            ))
+            .for_faire_cols('samp_store_loc')
             .apply(
                 apply_samp_store_loc,
                 mode='direct'
@@ -73,10 +67,7 @@ def get_samp_store_temp_from_samp_name(mapper: FaireSampleMetadataMapper):
         return df[metadata_col].apply(mapper.get_samp_store_temp_by_samp_store_dur)
     return (
             TransformationBuilder('samp_store_temp_from_samp_name')
-            .when(lambda f, m, mt: (
-                f == 'samp_store_temp' and
-                mt == 'related'
-            ))
+            .for_faire_cols('samp_store_temp')
             .apply(
                 apply_samp_store_temp,
                 mode='direct'
@@ -18,10 +18,9 @@ def get_line_id_from_standardized_station(mapper: FaireSampleMetadataMapper):
             return df[metadata_col].apply(mapper.get_line_id)
     return (
             TransformationBuilder('line_id_from_station')
-            .when(lambda f, m, mt: (
-                f == 'line_id' and
-                mt == 'related'
-            ))
+            .for_faire_cols('line_id')
+            .reads()
+            .memoize()
             .apply(
                 apply_line_id_from_station,
                 mode='direct'
@@ -40,22 +39,17 @@ def get_standardized_station_id_from_nonstandardized_station_name(mapper: FaireS
     
     def apply_station_id_deduction(df, faire_col, metadata_col):
             """
-            Apply the station_id deduction using the mapper's get_station_id_from_unstandardized_station_name method.
+            Apply the station_id deduction using the mapper's get_station_ids_from_unstandardized_station_names method.
             """
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.get_station_id_from_unstandardized_station_name(
-                  metadata_row=row,
-                  unstandardized_station_name_col=metadata_col
-                ),
-                axis=1
+            # Map the whole station column at once
+            return mapper.get_station_ids_from_unstandardized_station_names(
+                df=df,
+                unstandardized_station_name_col=metadata_col
             )
     return (
             TransformationBuilder('station_id_from_nonstandard_station_name')
-            .when(lambda f, m, mt: (
-                f == 'station_id' and
-                mt == 'related'
-            ))
+            .for_faire_cols('station_id')
+            .reads(mapper.sample_metadata_sample_name_column)
             .apply(
                 apply_station_id_deduction,
                 mode='direct'
@@ -76,7 +70,7 @@ def get_stations_within_5km_of_lat_lon(mapper: FaireSampleMetadataMapper):
     
     def apply_within_5km_station_deduction(df, faire_col, metadata_col):
             """
-            Apply the within 5 km stations deduction using the mapper's get_stations_within_5km method.
+            Apply the within 5 km stations deduction using the mapper's get_stations_within_5km_for_df method.
             """
             metadata_cols = metadata_col.split(' | ')
 
@@ -87,22 +81,18 @@ def get_stations_within_5km_of_lat_lon(mapper: FaireSampleMetadataMapper):
             station_col = metadata_cols[0]
             lat_col = metadata_cols[1]
             lon_col = metadata_cols[2] 
-            # Apply the calculation to each row
-            return df.apply(
-                lambda row: mapper.get_stations_within_5km(
-                  metadata_row=row,
-                  station_name_col=station_col,
-                  lat_col=lat_col,
-                  lon_col=lon_col
-                ),
-                axis=1
+            # Look up all of the samples at once, the other columns are QC diagnostics
+            stations_within_5km_df = mapper.get_stations_within_5km_for_df(
+                df=df,
+                station_name_col=station_col,
+                lat_col=lat_col,
+                lon_col=lon_col
             )
+            return stations_within_5km_df['station_ids_within_5km']
     return (
             TransformationBuilder('stations_within_5km')
-            .when(lambda f, m, mt: (
-                f == 'station_ids_within_5km_of_lat_lon' and
-                mt == 'related'
-            ))
+            .for_faire_cols('station_ids_within_5km_of_lat_lon')
+            .reads(mapper.sample_metadata_sample_name_column)
             .apply(
                 apply_within_5km_station_deduction,
                 mode='direct'
@@ -1,7 +1,9 @@
-from faire_mapping.transformers.transformation_pipeline import TransformationPipeline, TransformationBuilder, TransformationRule
+from faire_mapping.transformers.transformation_pipeline import TransformationPipeline, TransformationBuilder, TransformationRule, PipelinePlan
 from faire_mapping.transformers.rules import get_all_ome_default_rules
+from faire_mapping.transformers.rule_profiler import get_rule_profiler, profiling_enabled, memory_profiling_enabled
+from faire_mapping.transformers.incremental_store import get_incremental_result_store
 from faire_mapping.sample_metadata_mapper import FaireSampleMetadataMapper
-from typing import Dict, List
+from typing import Callable, Dict, List
 import pandas as pd
 import logging
 
@@ -14,29 +16,58 @@ class SampleMetadataTransformer:
     """
     Transformer for sample metadata using the transformation pipeline
     """
-    def __init__(self, sample_mapper: FaireSampleMetadataMapper, ome_auto_setup: bool = True, nc_transformer: bool = False, extract_blank_transformer: bool = False):
+    def __init__(self, sample_mapper: FaireSampleMetadataMapper, ome_auto_setup: bool = True, nc_transformer: bool = False, extract_blank_transformer: bool = False,
+                 process_initializer: Callable = None):
         """
-        Initialize the transformer
+        Initialize the transformer. process_initializer is called once in each worker process of the rules
+        built with parallel() (e.g. to warm up the GEBCO or IHO lookups), the mapper's process_initializer if None
         """
         self.mapper = sample_mapper
+        # Optional, runs independent rules on a thread pool (see TransformationPipeline._execute_concurrently)
+        max_workers = sample_mapper.config_file.get('transformation_max_workers')
+        # Optional, runs rules built with parallel() on a process pool (see TransformationPipeline._execute_in_processes)
+        process_workers = sample_mapper.config_file.get('transformation_process_workers')
+        if process_initializer is None:
+            process_initializer = sample_mapper.process_initializer
+        # Optional, measures every rule (profile_transformations in the config or the FAIRE_MAPPING_PROFILE env variable),
+        # peak memory too with profile_transformation_memory or FAIRE_MAPPING_PROFILE_MEMORY
+        profiler = get_rule_profiler(trace_memory=memory_profiling_enabled(sample_mapper.config_file)) if profiling_enabled(sample_mapper.config_file) else None
         # For regular sample df
         if not nc_transformer and not extract_blank_transformer:
             self.pipeline = TransformationPipeline(
                 source_df=sample_mapper.sample_metadata_df_builder.sample_metadata_df,
-                mapper=sample_mapper
+                mapper=sample_mapper,
+                max_workers=max_workers,
+                process_workers=process_workers,
+                process_initializer=process_initializer,
+                profiler=profiler,
+                name='samples',
+                row_key_col=sample_mapper.faire_sample_name_col
             )
             self.mapping_dict=self.mapper.sample_extract_mapping_builder.sample_mapping_dict
         # For nc_df
         elif nc_transformer:
             self.pipeline = TransformationPipeline(
                 source_df=sample_mapper.sample_metadata_df_builder.nc_metadata_df,
-                mapper=sample_mapper
+                mapper=sample_mapper,
+                max_workers=max_workers,
+                process_workers=process_workers,
+                process_initializer=process_initializer,
+                profiler=profiler,
+                name='negative controls',
+                row_key_col=sample_mapper.faire_sample_name_col
             )
             self.mapping_dict=self.mapper.nc_mapping_builder.nc_mapping_dict
         elif extract_blank_transformer:
             self.pipeline = TransformationPipeline(
                 source_df=sample_mapper.extraction_metadata_builder.extraction_blanks_df,
-                mapper=sample_mapper
+                mapper=sample_mapper,
+                max_workers=max_workers,
+                process_workers=process_workers,
+                process_initializer=process_initializer,
+                profiler=profiler,
+                name='extraction blanks',
+                row_key_col=sample_mapper.faire_sample_name_col
             )
             self.mapping_dict=self.mapper.extract_blank_mapping_builder.extraction_blanks_mapping_dict
 
@@ -114,8 +145,14 @@ class SampleMetadataTransformer:
         # Get the related mapping dictionary
         mapping = self.mapping_dict
 
-        # Execute the pipeline
-        self.pipeline.execute(mapping)
+        # Execute the pipeline (only on the rows that changed since the last run if incremental_remap is set in the config)
+        if self.mapper.config_file.get('incremental_remap'):
+            store = get_incremental_result_store(cache_dir=self.mapper.config_file.get('incremental_store_dir'))
+            store_key = f"{self.mapper.config_file.get('sample_metadata_file')}|{self.pipeline.name}"
+            self.pipeline.execute_incremental(mapping, store=store, store_key=store_key,
+                                              reference_fingerprint=self.mapper.reference_data_fingerprint())
+        else:
+            self.pipeline.execute(mapping)
 
         # Get results as DataFrame
         results_df = self.pipeline.get_results_df()
@@ -124,6 +161,15 @@ class SampleMetadataTransformer:
 
         return results_df
     
+    def plan(self) -> PipelinePlan:
+        """
+        Which rule each faire column will get and roughly how long it will take, without transforming anything
+        """
+        # Costs come from the configured transformation_profile_file if there is one (where report_rule_profile writes the profile)
+        pipeline_plan = self.pipeline.plan(self.mapping_dict, profile_file=self.mapper.config_file.get('transformation_profile_file'))
+        print(f"\nTransformation plan ({self.pipeline.name}):\n{pipeline_plan.format_plan()}\n")
+        return pipeline_plan
+
     def get_results_dict(self) -> Dict[str, pd.Series]:
         """
         Get results as a dictionary
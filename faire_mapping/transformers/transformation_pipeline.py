@@ -1,27 +1,89 @@
 from typing import Callable, Dict, List, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
 from dataclasses import dataclass
+import math
+import multiprocessing
+import re
+import threading
+import numpy as np
 import pandas as pd
 import logging
+from faire_mapping.transformers.incremental_store import pipeline_fingerprint, row_fingerprints
+from faire_mapping.transformers.rule_profiler import load_rule_throughput
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Transform used with apply_mode='vector'. Gets {input_name: source column Series} (only the inputs that are in
+# the source df), the faire_col and the metadata_col, and returns a Series aligned to the source df index.
+VectorTransform = Callable[[Dict[str, pd.Series], str, str], pd.Series]
+# Gets the metadata_col and returns the source columns a vector transform needs as {input_name: source_col}
+VectorInputs = Callable[[str], Dict[str, str]]
+
+# Rough rows/sec used by plan for rules that haven't been profiled yet
+DEFAULT_ROWS_PER_SEC = {'row': 5_000, 'direct': 20_000, 'vector': 1_000_000, 'column': 1_000_000}
+
+# Parallel rules with fewer source rows than this run in the main process (forking costs more than it saves)
+PARALLEL_MIN_ROWS = 200
+
+# Rule transforms close over the mapper and can't be pickled, so the process pool of a pipeline run is forked (when its
+# first parallel rule runs) after the run's rule applications are put here. The workers inherit them and only get
+# the position of the application and a chunk of the columns it reads; the results are pickled back. The pool is
+# kept until the end of the run, so the later parallel rules reuse the workers and what process_initializer set up
+# in them. One pipeline run uses a process pool at a time.
+_forked_rule_applications = []
+_forked_rule_lock = threading.Lock()
+
+def _init_rule_worker(initializer: Optional[Callable]) -> None:
+    # Runs once per worker process, e.g. to open the GEBCO grid or build the IHO index for the worker
+    if initializer is not None:
+        initializer()
+
+def _execute_rule_chunk(position: int, chunk_df: pd.DataFrame) -> pd.Series:
+    rule_application = _forked_rule_applications[position]
+    return rule_application.rule.execute(chunk_df, rule_application.faire_col, rule_application.metadata_col, rule_application.mapping_type)
+
 @dataclass
 class TransformationRule:
     """
     Represents a single transformation rule.
     """
     name: str # Human-readable identifier for the transformation rule
-    condition: Callable[[str, str], bool] # Function that determins if rule applies
+    condition: Optional[Callable[[str, str], bool]] # Function that determins if rule applies (None if only the selectors are used)
     transform: Callable # Functin that does the actual transformation
     mapping_type: Optional[str] # Which mapping type this rule applies to (exact, related, or constant)
-    apply_mode: str = 'row' # 'row', 'column', or 'direct' (direct on whole data frame, row is by row, column on entire column)
+    apply_mode: str = 'row' # 'row', 'column', 'direct' or 'vector' (direct on whole data frame, row is by row, column on entire column, vector on the input columns)
     also_update_source: bool = False # updates the original df, used if other rules depend on the output of a previous rule
+    faire_cols: Optional[frozenset] = None # Static selector: the only faire columns this rule can apply to (lets the pipeline index the rule)
+    metadata_pattern: Optional[str] = None # Static selector: regex that has to be found in the metadata column
+    reads: Optional[frozenset] = None # Source columns the transform reads (None if not declared, treated as reading every column)
+    reads_metadata_cols: bool = False # Whether the transform also reads the ' | ' separated columns named in metadata_col
+    vector_inputs: Optional[VectorInputs] = None # For apply_mode 'vector', the source columns the transform gets
+    memoize: bool = False # Run the transform once per distinct combination of the columns it reads and broadcast the results back
+    parallel: bool = False # Split the source rows into chunks and run the transform on them in a process pool
+    row_local: bool = True # Whether the result for a row only depends on that row (execute_incremental runs rules that aren't on every row)
+
+    def matches_selectors(self, faire_col: str, metadata_col: str, mapping_type) -> bool:
+        """
+        Check the static selectors (mapping type, faire columns, metadata pattern) of this rule.
+        """
+        if self.mapping_type is not None and mapping_type not in self.mapping_type:
+            return False
+        if self.faire_cols is not None and faire_col not in self.faire_cols:
+            return False
+        if self.metadata_pattern is not None and not re.search(self.metadata_pattern, str(metadata_col)):
+            return False
+        return True
 
     def matches(self, faire_col: str, metadata_col: str, mapping_type) -> bool:
         """
         Check if this rule applies to the given columns.
         """
+        if not self.matches_selectors(faire_col, metadata_col, mapping_type):
+            return False
+        if self.condition is None:
+            return True
         try:
             return self.condition(faire_col, metadata_col, mapping_type)
         except Exception as e:
@@ -37,12 +99,123 @@ class TransformationRule:
                 return df.apply(lambda row: self.transform(row), axis=1)
             elif self.apply_mode == 'column':
                 return self.transform()
+            elif self.apply_mode == 'vector':
+                return self.execute_vector(df, faire_col, metadata_col)
             else: # direct
                 return self.transform(df, faire_col, metadata_col)
         except Exception as e:
             logger.error(f"Error executing rule '{self.name}': {e}")
             raise
 
+    def vector_input_cols(self, metadata_col: str) -> Dict[str, str]:
+        return self.vector_inputs(metadata_col) if self.vector_inputs is not None else {}
+
+    def execute_vector(self, df: pd.DataFrame, faire_col: str, metadata_col: str) -> pd.Series:
+        """
+        Execute a vector transform. Only the input columns that are in the source df are passed to the transform
+        (optional inputs can be checked with 'name in columns'), and the result has to be aligned to the source df
+        index (arrays and scalars are turned into a Series on the index)
+        """
+        input_cols = self.vector_input_cols(metadata_col)
+        columns = {name: df[col] for name, col in input_cols.items() if col in df.columns}
+        try:
+            result = self.transform(columns, faire_col, metadata_col)
+        except KeyError as e:
+            # an input the transform needs isn't in the source df
+            if e.args and e.args[0] in input_cols and e.args[0] not in columns:
+                raise KeyError(f"Column '{input_cols[e.args[0]]}' ({e.args[0]}) is not in the source data frame") from e
+            raise
+
+        if not isinstance(result, pd.Series):
+            return pd.Series(result, index=df.index)
+        if not result.index.equals(df.index):
+            raise ValueError(f"Vector rule '{self.name}' returned a Series that is not aligned to the source index")
+        return result
+
+@dataclass
+class RuleApplication:
+    """
+    A rule matched to one mapping (what the pipeline runs for each faire column)
+    """
+    rule: TransformationRule
+    mapping_type: str
+    faire_col: str
+    metadata_col: str
+
+    @property
+    def source_reads(self) -> Optional[set]:
+        """
+        Source columns this application reads, None if the rule didn't declare them
+        """
+        if self.rule.reads is None:
+            if self.rule.apply_mode == 'vector':
+                # Vector transforms only get their input columns
+                return set(self.rule.vector_input_cols(self.metadata_col).values())
+            return None
+        reads = set(self.rule.reads)
+        if self.rule.reads_metadata_cols:
+            # e.g. 'fallback: primary_col | fallback_col' -> {'primary_col', 'fallback_col'}
+            for col in str(self.metadata_col).split('|'):
+                reads.add(col.split(':', 1)[-1].strip() if col.startswith('fallback') else col.strip())
+        return reads
+
+    @property
+    def source_writes(self) -> set:
+        """
+        Source columns this application writes (its faire column if the rule updates the source)
+        """
+        return {self.faire_col} if self.rule.also_update_source else set()
+
+    def depends_on(self, earlier: 'RuleApplication') -> bool:
+        """
+        Whether this application has to wait for an earlier one (it reads what the earlier one writes,
+        writes what the earlier one reads, or they write the same column). Undeclared reads overlap everything.
+        """
+        def overlaps(writes: set, reads: Optional[set]) -> bool:
+            return bool(writes) and (reads is None or bool(writes & reads))
+
+        return (overlaps(earlier.source_writes, self.source_reads) or
+                overlaps(self.source_writes, earlier.source_reads) or
+                bool(self.source_writes & earlier.source_writes))
+
+@dataclass
+class MemoStats:
+    """
+    How much work memoizing saved for one memoized rule application
+    """
+    rule_name: str
+    faire_col: str
+    rows: int # Rows in the source df
+    evaluations: int # Distinct inputs the transform was run on
+
+    @property
+    def hits(self) -> int:
+        return self.rows - self.evaluations
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.rows if self.rows else 0.0
+
+@dataclass
+class PipelinePlan:
+    """
+    What TransformationPipeline.execute would do for a mapping dict, without running anything
+    """
+    steps: pd.DataFrame # One row per rule application, in the order they run one at a time
+    unmapped: Dict[str, List[str]] # {mapping_type: faire columns no rule matched}
+
+    @property
+    def estimated_seconds(self) -> float:
+        return float(self.steps['estimated_seconds'].sum())
+
+    def format_plan(self) -> str:
+        lines = [f"{len(self.steps)} rule applications, estimated {self.estimated_seconds:.1f} s",
+                 self.steps.to_string(index=False) if not self.steps.empty else "No rules matched"]
+        for mapping_type, faire_cols in self.unmapped.items():
+            if faire_cols:
+                lines.append(f"Unmapped {mapping_type} columns: {', '.join(faire_cols)}")
+        return '\n'.join(lines)
+
 class TransformationBuilder:
     """
     Fluent builder for creating transformation rules
@@ -54,6 +227,14 @@ class TransformationBuilder:
         self._mapping_type = None
         self._apply_mode = 'row'
         self._also_update_source = False
+        self._faire_cols = None
+        self._metadata_pattern = None
+        self._reads = None
+        self._reads_metadata_cols = False
+        self._vector_inputs = None
+        self._memoize = False
+        self._parallel = False
+        self._row_local = True
 
     def when(self, condition: Callable[[str, str], bool]) -> 'TransformationBuilder':
         """
@@ -62,14 +243,69 @@ class TransformationBuilder:
         self._condition = condition
         return self
     
-    def apply(self, transform: Callable, mode: str = 'row') -> 'TransformationBuilder':
+    def for_faire_cols(self, *faire_cols: str) -> 'TransformationBuilder':
+        """
+        Restrict this rule to specific faire columns. Rules with faire columns are looked up
+        by column in the pipeline instead of being checked against every mapping
+        """
+        self._faire_cols = frozenset(faire_cols)
+        return self
+
+    def when_metadata_matches(self, pattern: str) -> 'TransformationBuilder':
         """
-        Set the transformation to apply
+        Restrict this rule to metadata columns the regex pattern is found in (e.g. re.escape('|') for the ' | ' separated columns)
+        """
+        self._metadata_pattern = pattern
+        return self
+
+    def reads(self, *source_cols: str, metadata_cols: bool = True) -> 'TransformationBuilder':
+        """
+        Declare the source columns the transform reads (by default the columns named in metadata_col plus source_cols).
+        Lets the pipeline run the rule at the same time as rules that don't write those columns
+        """
+        self._reads = frozenset(source_cols)
+        self._reads_metadata_cols = metadata_cols
+        return self
+
+    def apply(self, transform: Callable, mode: str = 'row', inputs: VectorInputs = None) -> 'TransformationBuilder':
+        """
+        Set the transformation to apply. mode='vector' also needs inputs, a function that takes the
+        metadata_col and returns the source columns the transform gets as {input_name: source_col}
         """
         self._transform = transform
         self._apply_mode = mode
+        self._vector_inputs = inputs
         return self
     
+    def memoize(self, memoize: bool = True) -> 'TransformationBuilder':
+        """
+        Run the transform once per distinct combination of the columns declared with reads() (e.g. once per
+        cast instead of once per bottle) and broadcast the results back to the rows. Only for transforms whose
+        result for a row depends on nothing but that row's values in those columns.
+        """
+        self._memoize = memoize
+        return self
+
+    def parallel(self, parallel: bool = True) -> 'TransformationBuilder':
+        """
+        Run the transform on chunks of the source rows in a process pool (see TransformationPipeline process_workers).
+        For CPU bound row by row transforms whose result for a row only depends on that row's values in the
+        columns declared with reads(); workers only get those columns. Not for transforms that use threads, locks
+        or open files of the mapper (they are forked). Runs in this process if the pipeline uses threads.
+        """
+        self._parallel = parallel
+        return self
+
+    def row_local(self, row_local: bool = True) -> 'TransformationBuilder':
+        """
+        Set whether the transform's result for a row only depends on that row (the default). Rules that also look at
+        other rows (e.g. biological replicates) should be row_local(False), so execute_incremental runs them on every
+        row instead of only the changed rows. Lookups in reference data (station sheet, vocabulary, GEBCO, IHO regions)
+        are row local, changes to that data are caught by the reference fingerprint passed to execute_incremental.
+        """
+        self._row_local = row_local
+        return self
+
     def update_source(self, update: bool = True) -> 'TransformationBuilder':
         """
         Set whether to update the source dataframe
@@ -88,8 +324,16 @@ class TransformationBuilder:
         """
         Build the transformation rule
         """
-        if self._condition is None or self._transform is None:
+        if self._transform is None:
             raise ValueError(f"Rule '{self.name}': Both condition and transform must be set")
+        if self._apply_mode == 'vector' and self._vector_inputs is None:
+            raise ValueError(f"Rule '{self.name}': Vector rules need inputs (the source columns the transform gets)")
+        if self._memoize and (self._apply_mode == 'column' or (self._reads is None and self._apply_mode != 'vector')):
+            raise ValueError(f"Rule '{self.name}': Memoized rules need to declare the columns they read (reads) and can't use apply mode 'column'")
+        if self._parallel and (self._apply_mode == 'column' or (self._reads is None and self._apply_mode != 'vector')):
+            raise ValueError(f"Rule '{self.name}': Parallel rules need to declare the columns they read (reads) and can't use apply mode 'column'")
+        if self._condition is None and self._faire_cols is None and self._metadata_pattern is None and self._mapping_type is None:
+            raise ValueError(f"Rule '{self.name}': A condition (when) or a selector (for_faire_cols, when_metadata_matches, for_mapping_type) must be set")
         
         return TransformationRule(
             name=self.name,
@@ -97,19 +341,37 @@ class TransformationBuilder:
             transform=self._transform,
             mapping_type=self._mapping_type,
             apply_mode=self._apply_mode,
-            also_update_source=self._also_update_source
+            also_update_source=self._also_update_source,
+            faire_cols=self._faire_cols,
+            metadata_pattern=self._metadata_pattern,
+            reads=self._reads,
+            reads_metadata_cols=self._reads_metadata_cols,
+            vector_inputs=self._vector_inputs,
+            memoize=self._memoize,
+            parallel=self._parallel,
+            row_local=self._row_local
         )
     
 class TransformationPipeline:
     """
     Manages and executes data transformations based on column mappings
     """
-    def __init__(self, source_df: pd.DataFrame, mapper: Any):
+    def __init__(self, source_df: pd.DataFrame, mapper: Any, max_workers: int = None, process_workers: int = None,
+                 process_initializer: Callable = None, profiler: Any = None, name: str = 'pipeline', row_key_col: str = None):
 
         self.source_df = source_df
         self.mapper = mapper
+        self.max_workers = max_workers # Run rules that don't depend on each other on this many threads (None or 1 runs them one at a time)
+        self.process_workers = process_workers # Run rules built with parallel() on this many processes (None or 1 runs them in this process)
+        self.process_initializer = process_initializer # Called once in each worker process (the workers are kept for every parallel rule of a run)
+        self.profiler = profiler # Optional RuleProfiler that measures every rule application
+        self.name = name # Used in logs and profiling reports
+        self.row_key_col = row_key_col # Source column that identifies a row between runs of execute_incremental (e.g. samp_name), the index label if None
         self.rules: List[TransformationRule] = []
         self.results: Dict[str, pd.Series] = {}
+        self.memo_stats: Dict[str, MemoStats] = {} # faire_col: MemoStats for the memoized rules
+        self._run_applications: Optional[List[RuleApplication]] = None # The rule applications of the run in progress
+        self._process_pool: Optional[ProcessPoolExecutor] = None # Forked by the run's first parallel rule, shut down at the end of the run
 
     def register_rule(self, rule: TransformationRule) -> 'TransformationPipeline':
         """
@@ -134,34 +396,11 @@ class TransformationPipeline:
         """
         logger.info(f"Executing pipeline with {len(self.rules)} rules")
 
-        processed_columns = set()
-
-        # Iterate through rules in registration order
-        for rule in self.rules:
-            logger.debug(f"Checking rule: {rule.name}")
-
-            # For each rule, check all mappings to find matches
-            for mapping_type, mappings in mapping_dict.items():
-                # skip if rule doesn't apply to this mapping type
-                if rule.mapping_type is not None and mapping_type not in rule.mapping_type:
-                    continue
-                for faire_col, metadata_col in mappings.items():
-                    # Skip if already processed
-                    if faire_col in processed_columns:
-                        continue
-    
-                    # Check if rule matches this column
-                    if rule.matches(faire_col, metadata_col, mapping_type):
-                        logger.info(f"Applying rule '{rule.name}' to column '{faire_col}'")
-
-                        result = rule.execute(self.source_df, faire_col, metadata_col, mapping_type)
-                        self.results[faire_col] = result
-
-                        # Update source column
-                        if rule.also_update_source:
-                            self.source_df[faire_col] = result
+        rule_applications = self.match_rules(mapping_dict)
+        with self._pipeline_run(rule_applications):
+            self._execute_rule_applications(rule_applications)
 
-                        processed_columns.add(faire_col)
+        processed_columns = {rule_application.faire_col for rule_application in rule_applications}
 
         # Check for unprocess columns
         if 'related' in mapping_dict:
@@ -176,6 +415,397 @@ class TransformationPipeline:
 
         logger.info(f"Pipeline exectuion complete. {len(self.results)} columns transformed.")
         return self.results
+
+    def _execute_rule_applications(self, rule_applications: List[RuleApplication]) -> None:
+        """
+        Runs the rule applications (on the thread scheduler if max_workers is set) and adds their results
+        in the order they would run one at a time
+        """
+        if self.max_workers is not None and self.max_workers > 1 and len(rule_applications) > 1:
+            results = self._execute_concurrently(rule_applications)
+            for rule_application in rule_applications:
+                self.results[rule_application.faire_col] = results[rule_application.faire_col]
+        else:
+            for rule_application in rule_applications:
+                result = self._execute_rule_application(rule_application)
+                self.results[rule_application.faire_col] = result
+                self._update_source(rule_application, result)
+
+    def execute_incremental(self, mapping_dict: Dict[str, str], store: Any, store_key: str, reference_fingerprint: str = None) -> Dict[str, pd.Series]:
+        """
+        Like execute, but the row local rules only transform the source rows whose fingerprint (row_key_col and the
+        row's values) isn't in the IncrementalResultStore from the last run with the same mapping dict, rules, code
+        and reference data (reference_fingerprint, e.g. from the mapper's reference_data_fingerprint). Their other
+        rows are filled in from the store. Rules built with row_local(False), and the rules that depend on them,
+        run on every row.
+        """
+        pipeline_key = pipeline_fingerprint(mapping_dict, self.rules, self.source_df.columns, row_key_col=self.row_key_col,
+                                            reference_fingerprint=reference_fingerprint)
+        row_keys = row_fingerprints(self.source_df, key_col=self.row_key_col)
+        stored_results = store.load(store_key, pipeline_key) if row_keys is not None else None
+
+        if stored_results is None:
+            results = self.execute(mapping_dict)
+        else:
+            rule_applications = self.match_rules(mapping_dict)
+            row_local_applications, every_row_applications = self.split_row_local(rule_applications)
+            is_changed = ~row_keys.isin(stored_results.index).to_numpy()
+            logger.info(f"Incremental run of '{self.name}': transforming {is_changed.sum()} of {len(is_changed)} rows, the rest are from the last run "
+                        f"({len(every_row_applications)} rules that aren't row local run on every row)")
+            with self._pipeline_run(rule_applications):
+                self._execute_changed_rows(row_local_applications, is_changed, stored_results.reindex(row_keys[~is_changed]))
+                self._execute_rule_applications(every_row_applications)
+            results = self.results = {rule_application.faire_col: self.results[rule_application.faire_col] for rule_application in rule_applications}
+
+        if row_keys is not None:
+            store.save(store_key, pipeline_key, self.get_results_df().set_axis(row_keys.to_numpy()))
+        return results
+
+    @staticmethod
+    def split_row_local(rule_applications: List[RuleApplication]) -> tuple:
+        """
+        Splits the rule applications into (row local, every row) for execute_incremental. Rules built with
+        row_local(False) run on every row, and so does every application that depends on one of those (see
+        RuleApplication.depends_on), so the row local ones can all run before them.
+        """
+        row_local_applications, every_row_applications = [], []
+        for rule_application in rule_applications:
+            if not rule_application.rule.row_local or any(rule_application.depends_on(earlier) for earlier in every_row_applications):
+                every_row_applications.append(rule_application)
+            else:
+                row_local_applications.append(rule_application)
+        return row_local_applications, every_row_applications
+
+    def _execute_changed_rows(self, rule_applications: List[RuleApplication], is_changed: np.ndarray, unchanged_results: pd.DataFrame) -> None:
+        """
+        Runs the rule applications on the changed rows only and merges the results with the stored results of the
+        unchanged rows (in source row order). Columns the rules write to the source are merged the same way.
+        """
+        full_source_df = self.source_df
+        faire_cols = [rule_application.faire_col for rule_application in rule_applications]
+
+        self.results = {}
+        if is_changed.any():
+            self.source_df = full_source_df[is_changed].copy()
+            try:
+                self._execute_rule_applications(rule_applications)
+                changed_results = pd.DataFrame(self.results, index=self.source_df.index, columns=faire_cols)
+            finally:
+                self.source_df = full_source_df
+        else:
+            changed_results = pd.DataFrame(index=full_source_df.index[:0])
+
+        # Stored rows first, then the changed rows, then back to source order (by position, labels can repeat)
+        positions = np.concatenate([np.flatnonzero(~is_changed), np.flatnonzero(is_changed)])
+        merged = pd.concat([unchanged_results.reindex(columns=faire_cols).set_axis(full_source_df.index[~is_changed]), changed_results])
+        merged = merged.iloc[np.argsort(positions, kind='stable')]
+
+        self.results = {faire_col: merged[faire_col] for faire_col in faire_cols}
+        for rule_application in rule_applications:
+            self._update_source(rule_application, self.results[rule_application.faire_col])
+
+    def plan(self, mapping_dict: Dict[str, str], rule_throughput: Dict[str, float] = None, profile_file: str = None) -> PipelinePlan:
+        """
+        Does the matching pass of execute without running any rules. Reports which rule each faire column gets,
+        its apply mode, the source columns it reads and writes, the earlier steps it has to wait for and an
+        estimated run time (source rows / rows per sec). rule_throughput is {rule_name: rows_per_sec}, by default
+        from profile_file (the transformation_profile_file profiles are written to) or else the newest profile in the
+        profiles cache dir (see rule_profiler), with DEFAULT_ROWS_PER_SEC by apply mode for rules that haven't been profiled.
+        """
+        if rule_throughput is None:
+            rule_throughput = load_rule_throughput(profile_file)
+        rule_applications = self.match_rules(mapping_dict)
+        rows = len(self.source_df)
+
+        steps = []
+        for i, rule_application in enumerate(rule_applications):
+            rule = rule_application.rule
+            source_reads = rule_application.source_reads
+            if rule.name in rule_throughput:
+                rows_per_sec, estimate_from = rule_throughput[rule.name], 'profile'
+            else:
+                rows_per_sec, estimate_from = DEFAULT_ROWS_PER_SEC.get(rule.apply_mode, DEFAULT_ROWS_PER_SEC['row']), 'default'
+            steps.append({
+                'step': i,
+                'faire_col': rule_application.faire_col,
+                'mapping_type': rule_application.mapping_type,
+                'metadata_col': rule_application.metadata_col,
+                'rule_name': rule.name,
+                'apply_mode': rule.apply_mode,
+                'memoize': rule.memoize,
+                'parallel': rule.parallel,
+                'reads': 'all' if source_reads is None else ', '.join(sorted(map(str, source_reads))),
+                'writes_source': rule.also_update_source,
+                'depends_on': ', '.join(earlier.faire_col for earlier in rule_applications[:i] if rule_application.depends_on(earlier)),
+                'rows': rows,
+                'rows_per_sec': rows_per_sec,
+                'estimated_seconds': rows / rows_per_sec if rows_per_sec else 0.0,
+                'estimate_from': estimate_from,
+            })
+
+        processed_columns = {rule_application.faire_col for rule_application in rule_applications}
+        unmapped = {mapping_type: [faire_col for faire_col in mappings if faire_col not in processed_columns]
+                    for mapping_type, mappings in mapping_dict.items()}
+
+        return PipelinePlan(steps=pd.DataFrame(steps, columns=['step', 'faire_col', 'mapping_type', 'metadata_col', 'rule_name', 'apply_mode',
+                                                               'memoize', 'parallel', 'reads', 'writes_source', 'depends_on', 'rows',
+                                                               'rows_per_sec', 'estimated_seconds', 'estimate_from']),
+                            unmapped=unmapped)
+
+    def match_rules(self, mapping_dict: Dict[str, str]) -> List[RuleApplication]:
+        """
+        Matches the rules to the mappings. Rules are checked in registration order and the first rule that
+        matches a faire column is the one applied to it. Returned in the order the rules run one at a time.
+        """
+        processed_columns = set()
+        rule_applications = []
+        dispatch_table = self.build_dispatch_table(mapping_dict)
+
+        # Iterate through rules in registration order
+        for rule in self.rules:
+            logger.debug(f"Checking rule: {rule.name}")
+
+            # For each rule, check the mappings it could apply to, in mapping_dict order
+            for mapping_type, faire_col, metadata_col in self.candidate_mappings(rule, mapping_dict, dispatch_table):
+                # Skip if already processed
+                if faire_col in processed_columns:
+                    continue
+
+                # Check if rule matches this column
+                if rule.matches(faire_col, metadata_col, mapping_type):
+                    rule_applications.append(RuleApplication(rule=rule, mapping_type=mapping_type, faire_col=faire_col, metadata_col=metadata_col))
+                    processed_columns.add(faire_col)
+
+        return rule_applications
+
+    def _execute_rule_application(self, rule_application: RuleApplication) -> pd.Series:
+        logger.info(f"Applying rule '{rule_application.rule.name}' to column '{rule_application.faire_col}'")
+        if self.profiler is None:
+            return self._execute_rule_application_unprofiled(rule_application)
+        with self.profiler.profile(pipeline=self.name, rule_name=rule_application.rule.name, faire_col=rule_application.faire_col,
+                                   apply_mode=rule_application.rule.apply_mode, rows=len(self.source_df)):
+            return self._execute_rule_application_unprofiled(rule_application)
+
+    def _execute_rule_application_unprofiled(self, rule_application: RuleApplication) -> pd.Series:
+        if rule_application.rule.memoize:
+            return self._execute_memoized(rule_application)
+        return self._run_rule(rule_application, self.source_df)
+
+    def _run_rule(self, rule_application: RuleApplication, df: pd.DataFrame) -> pd.Series:
+        if rule_application.rule.parallel and self._can_run_in_processes(df):
+            return self._execute_in_processes(rule_application, df)
+        return rule_application.rule.execute(df, rule_application.faire_col, rule_application.metadata_col, rule_application.mapping_type)
+
+    def _can_run_in_processes(self, df: pd.DataFrame) -> bool:
+        # Workers are forked, which isn't available on Windows and isn't safe while other threads are running
+        # (the thread scheduler, or a caller that runs this pipeline on a thread pool), so it's only done from the main thread
+        return (self.process_workers is not None and self.process_workers > 1 and len(df) >= PARALLEL_MIN_ROWS and
+                (self.max_workers is None or self.max_workers <= 1) and
+                threading.current_thread() is threading.main_thread() and
+                'fork' in multiprocessing.get_all_start_methods())
+
+    @contextmanager
+    def _pipeline_run(self, rule_applications: List[RuleApplication]):
+        """
+        Scope of one pipeline run: the parallel rules in it share one process pool, which is shut down at the end
+        """
+        if self._run_applications is not None:
+            yield
+            return
+        self._run_applications = rule_applications
+        try:
+            yield
+        finally:
+            self._run_applications = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+                _forked_rule_applications.clear()
+                _forked_rule_lock.release()
+
+    def _get_process_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        The run's process pool, forked with the run's rule applications the first time it's needed. None if another
+        pipeline run is using its process pool (the parallel rule then runs in this process).
+        """
+        if self._process_pool is None:
+            if not _forked_rule_lock.acquire(blocking=False):
+                return None
+            _forked_rule_applications[:] = self._run_applications
+            # fork pools start all their workers on the first submit, so they all inherit the applications
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers, mp_context=multiprocessing.get_context('fork'),
+                                                     initializer=_init_rule_worker, initargs=(self.process_initializer,))
+            logger.info(f"Started {self.process_workers} worker processes for the parallel rules of '{self.name}'")
+        return self._process_pool
+
+    def _execute_in_processes(self, rule_application: RuleApplication, df: pd.DataFrame) -> pd.Series:
+        """
+        Splits the rows into one chunk per worker, runs the rule on the chunks in the run's process pool and
+        puts the results back together in row order
+        """
+        if self._run_applications is None:
+            with self._pipeline_run([rule_application]):
+                return self._execute_in_processes(rule_application, df)
+
+        rule = rule_application.rule
+        process_pool = self._get_process_pool()
+        if process_pool is None:
+            return rule.execute(df, rule_application.faire_col, rule_application.metadata_col, rule_application.mapping_type)
+
+        position = next(i for i, run_application in enumerate(self._run_applications) if run_application is rule_application)
+        needed_df = df[[col for col in df.columns if col in rule_application.source_reads]]
+        chunk_size = math.ceil(len(df) / self.process_workers)
+        chunk_bounds = [(start, min(start + chunk_size, len(df))) for start in range(0, len(df), chunk_size)]
+        logger.info(f"Running rule '{rule.name}' on {len(chunk_bounds)} chunks of {len(df)} rows in {self.process_workers} processes")
+
+        chunk_results = list(process_pool.map(_execute_rule_chunk, [position] * len(chunk_bounds),
+                                              [needed_df.iloc[start:stop] for start, stop in chunk_bounds]))
+        chunk_results = [result if isinstance(result, pd.Series) else pd.Series(result, index=df.index[start:stop])
+                         for result, (start, stop) in zip(chunk_results, chunk_bounds)]
+        return pd.concat(chunk_results).set_axis(df.index)
+
+    def _execute_memoized(self, rule_application: RuleApplication) -> pd.Series:
+        """
+        Runs the rule on the first row of each distinct combination of the columns it reads and broadcasts
+        the results back to the rows that share it
+        """
+        rule = rule_application.rule
+        df = self.source_df
+        key_cols = [col for col in df.columns if col in rule_application.source_reads]
+
+        try:
+            if key_cols:
+                group_ids = df.groupby(key_cols, dropna=False, sort=False).ngroup().to_numpy()
+            else:
+                group_ids = np.zeros(len(df), dtype=np.int64)
+        except TypeError as e:
+            # Unhashable values (e.g. lists) can't be grouped
+            logger.warning(f"Can't memoize rule '{rule.name}' on {key_cols} ({e}), running it on every row")
+            group_ids = None
+
+        if group_ids is None or df.empty:
+            result = self._run_rule(rule_application, df)
+            self.memo_stats[rule_application.faire_col] = MemoStats(rule_name=rule.name, faire_col=rule_application.faire_col, rows=len(df), evaluations=len(df))
+            return result
+
+        # ngroup numbers the groups in order of first appearance, so group i's first row is first_positions[i]
+        _, first_positions = np.unique(group_ids, return_index=True)
+        unique_df = df.iloc[first_positions]
+        unique_result = self._run_rule(rule_application, unique_df)
+        if not isinstance(unique_result, pd.Series):
+            unique_result = pd.Series(unique_result, index=unique_df.index)
+        if len(unique_result) != len(unique_df):
+            raise ValueError(f"Memoized rule '{rule.name}' returned {len(unique_result)} values for {len(unique_df)} distinct inputs")
+
+        stats = MemoStats(rule_name=rule.name, faire_col=rule_application.faire_col, rows=len(df), evaluations=len(unique_df))
+        self.memo_stats[rule_application.faire_col] = stats
+        logger.info(f"Rule '{rule.name}' ran on {stats.evaluations} distinct inputs for {stats.rows} rows ({stats.hit_ratio:.0%} memo hits)")
+
+        return unique_result.iloc[group_ids].set_axis(df.index)
+
+    def _update_source(self, rule_application: RuleApplication, result: pd.Series) -> None:
+        # Update source column
+        if rule_application.rule.also_update_source:
+            self.source_df[rule_application.faire_col] = result
+
+    def _execute_concurrently(self, rule_applications: List[RuleApplication]) -> Dict[str, pd.Series]:
+        """
+        Runs the rule applications on a thread pool, starting each one as soon as the earlier ones it depends on
+        (see RuleApplication.depends_on) are done. Source columns are only written while nothing is running, so
+        rules never see the source_df change under them. If a rule fails, the rules before it still run and the first
+        failure in serial order is raised.
+        """
+        waiting_on = {i: {j for j in range(i) if rule_applications[i].depends_on(rule_applications[j])}
+                      for i in range(len(rule_applications))}
+        results = {}
+        errors = {}
+        running = {}
+        pending_source_updates = []
+
+        source_columns = list(self.source_df.columns)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while waiting_on or running or pending_source_updates:
+                # Source updates wait until nothing is reading the source_df
+                if pending_source_updates and not running:
+                    for i in sorted(pending_source_updates):
+                        self._update_source(rule_applications[i], results[rule_applications[i].faire_col])
+                        for deps in waiting_on.values():
+                            deps.discard(i)
+                    pending_source_updates = []
+
+                if not pending_source_updates:
+                    # After a failure only the rules that would have run before it (one at a time) are started
+                    last_to_run = min(errors) if errors else len(rule_applications)
+                    for i in [i for i, deps in waiting_on.items() if not deps and i < last_to_run]:
+                        running[executor.submit(self._execute_rule_application, rule_applications[i])] = i
+                        del waiting_on[i]
+
+                if not running:
+                    if not pending_source_updates:
+                        break
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    try:
+                        results[rule_applications[i].faire_col] = future.result()
+                    except Exception as e:
+                        errors[i] = e
+                        continue
+                    if rule_applications[i].source_writes:
+                        pending_source_updates.append(i)
+                    else:
+                        for deps in waiting_on.values():
+                            deps.discard(i)
+
+        # New source columns go in the order they would have been added one at a time
+        new_columns = [col for col in dict.fromkeys(rule_application.faire_col for rule_application in rule_applications)
+                       if col in self.source_df.columns and col not in source_columns]
+        if list(self.source_df.columns) != source_columns + new_columns:
+            for col in new_columns:
+                self.source_df[col] = self.source_df.pop(col)
+
+        if errors:
+            raise errors[min(errors)]
+        return results
+
+    @staticmethod
+    def build_dispatch_table(mapping_dict: Dict[str, str]) -> Dict[tuple, tuple]:
+        """
+        Index the mappings by (mapping_type, faire_col). Values are (position in mapping_dict, metadata_col) so
+        rules that are looked up by faire column still see their mappings in mapping_dict order.
+        """
+        dispatch_table = {}
+        position = 0
+        for mapping_type, mappings in mapping_dict.items():
+            for faire_col, metadata_col in mappings.items():
+                dispatch_table[(mapping_type, faire_col)] = (position, metadata_col)
+                position += 1
+        return dispatch_table
+
+    @staticmethod
+    def candidate_mappings(rule: TransformationRule, mapping_dict: Dict[str, str], dispatch_table: Dict[tuple, tuple]) -> List[tuple]:
+        """
+        Returns the (mapping_type, faire_col, metadata_col) mappings a rule could apply to. Rules with faire_cols are
+        looked up in the dispatch table, rules without them (opaque conditions) are checked against every mapping.
+        """
+        mapping_types = [mapping_type for mapping_type in mapping_dict
+                         if rule.mapping_type is None or mapping_type in rule.mapping_type]
+
+        if rule.faire_cols is None:
+            return [(mapping_type, faire_col, metadata_col)
+                    for mapping_type in mapping_types
+                    for faire_col, metadata_col in mapping_dict[mapping_type].items()]
+
+        candidates = []
+        for mapping_type in mapping_types:
+            for faire_col in rule.faire_cols:
+                if (mapping_type, faire_col) in dispatch_table:
+                    position, metadata_col = dispatch_table[(mapping_type, faire_col)]
+                    candidates.append((position, mapping_type, faire_col, metadata_col))
+        return [candidate[1:] for candidate in sorted(candidates)]
                 
     
     def get_results_df(self) -> pd.DataFrame:
@@ -184,11 +814,23 @@ class TransformationPipeline:
         """
         return pd.DataFrame(self.results)
     
+    def get_memo_stats_df(self) -> pd.DataFrame:
+        """
+        Memoization stats per memoized rule (rows, distinct inputs evaluated, hits and hit ratio)
+        """
+        stats_df = pd.DataFrame([{'rule_name': stats.rule_name, 'rows': stats.rows, 'evaluations': stats.evaluations}
+                                 for stats in self.memo_stats.values()], columns=['rule_name', 'rows', 'evaluations'])
+        stats_df = stats_df.groupby('rule_name', sort=False).sum()
+        stats_df['hits'] = stats_df['rows'] - stats_df['evaluations']
+        stats_df['hit_ratio'] = (stats_df['hits'] / stats_df['rows']).fillna(0.0)
+        return stats_df
+
     def clear_results(self) -> 'TransformationPipeline':
         """
         Clear stored results
         """
         self.results = {}
+        self.memo_stats = {}
         return self
     
     def get_rule_names(self) -> List[str]:
@@ -1,31 +1,37 @@
 import pandas as pd
-import gspread #library that makes it easy for us to interact with the sheet
-from google.oauth2.service_account import Credentials
 from datetime import datetime
+from typing import Dict
 import re
+import os
+from pathlib import Path
 import numpy as np
+from faire_mapping.google_sheets_session import get_google_sheets_session
+from faire_mapping.google_sheet_snapshots import get_google_sheet_snapshot_store
+from faire_mapping.sample_name_rewrites import ome_samp_name_rewriter
+
+# Local cache for things that are expensive to fetch or parse (INSDC vocabulary, compiled FAIRe template sheets, etc.)
+FAIRE_MAPPING_CACHE_DIR = Path(os.environ.get("FAIRE_MAPPING_CACHE_DIR", Path.home() / ".cache" / "faire_mapping"))
+# Parquet snapshots of the Google Sheets, only downloaded again when the sheet changes (see google_sheet_snapshots)
+GOOGLE_SHEET_SNAPSHOT_DIR = FAIRE_MAPPING_CACHE_DIR / "sheet_snapshots"
 
 # TODO: outline keys that need to be present in the google_sheet_json_cred (see credentials.json to speicify how it should look)
 def load_google_sheet_as_df(google_sheet_id: str, sheet_name: str, header: int, google_sheet_json_cred: str) -> pd.DataFrame:
         """
         Load a google sheet as a data frame. The google_sheet_json_cred is the path to the credentials.json file 
-        with credentials for acessing google sheets programatically."""
+        with credentials for acessing google sheets programatically. Uses the shared session for the credentials
+        (see google_sheets_session), so the client and spreadsheet are only set up once per process."""
 
-        scopes = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+        return load_google_sheets_as_dfs(google_sheet_id=google_sheet_id, sheet_headers={sheet_name: header},
+                                         google_sheet_json_cred=google_sheet_json_cred)[sheet_name]
 
-        creds = Credentials.from_service_account_file(google_sheet_json_cred, scopes=scopes)
-        client = gspread.authorize(creds)
+def load_google_sheets_as_dfs(google_sheet_id: str, sheet_headers: Dict[str, int], google_sheet_json_cred: str) -> Dict[str, pd.DataFrame]:
+        """
+        Load several sheets of the same google sheet as data frames in one request. sheet_headers is {sheet_name: header}.
+        Returns {sheet_name: df}. Sheets that haven't changed since they were last downloaded are read from the local
+        snapshots, and in offline mode (FAIRE_MAPPING_OFFLINE) only the snapshots are used."""
 
-        sheet = client.open_by_key(google_sheet_id)
-        worksheet = sheet.worksheet(sheet_name)
-        
-        # Get all values
-        values = worksheet.get_all_values()
-        headers = values[header]
-        data_rows = values[header+1:]
-        df = pd.DataFrame(data_rows, columns=headers)
-        
-        return df
+        return get_google_sheet_snapshot_store(GOOGLE_SHEET_SNAPSHOT_DIR).load_sheets_as_dfs(
+                session=get_google_sheets_session(google_sheet_json_cred), google_sheet_id=google_sheet_id, sheet_headers=sheet_headers)
 
 def load_csv_as_df(file_path: str, header=0, sep=',') -> pd. DataFrame:
         # Load csv files as a data frame
@@ -50,7 +56,8 @@ def fix_cruise_code_in_samp_names(df: pd.DataFrame, unwanted_cruise_code: str, d
             df[sample_name_col].str.replace(r'\.[^.]*$', desired_cruise_code, regex=True),
             df[sample_name_col])  
         elif not unwanted_cruise_code: # If not unwanted cruise code, just append desired cruise code onto saple name
-             df[sample_name_col] = df[sample_name_col].apply(lambda x: x if str(x).endswith(desired_cruise_code) else str(x) + desired_cruise_code)
+             samp_names = df[sample_name_col].astype(str)
+             df[sample_name_col] = df[sample_name_col].where(samp_names.str.endswith(desired_cruise_code), samp_names + desired_cruise_code)
         else: # everything else just replaces with the desired cruise code
                 df[sample_name_col] = df[sample_name_col].str.replace(unwanted_cruise_code, desired_cruise_code)
 
@@ -60,45 +67,15 @@ def str_replace_for_samps(samp_name: pd.Series) -> str:
         """
         Fixes sample names - specific to OME with sample name mismatches
         if sample is part of the DY2012 cruise, will replace any str of DY20 with DY2012
+        The rewrites are in sample_name_rewrites.OME_SAMP_NAME_REWRITES.
         """
-        samp_name = str(samp_name)
-        if '_' in samp_name and 'pool' not in samp_name: # osu samp names have _ that needs to be . For example, E62_1B_DY20. Pooled samples keep the underscore
-            samp_name = samp_name.replace('_', '.')
-        if '.DY20' in samp_name:
-           samp_name = samp_name.replace('.DY20', '.DY20-12')
-        if '(P10 D2)' in samp_name:
-            samp_name = samp_name.replace(' (P10 D2)', '') # for E1875.OC0723 (P10 D2) in Run2
-        if '.IB.NO20' in samp_name: # for E265.1B.NO20 sample - in metadata was E265.1B.NO20
-            return samp_name.replace('.IB.NO20', '.1B.NO20-01')
-        if 'E.2139.' in samp_name:
-            return samp_name.replace('E.2139.', 'E2139.') # For E239 QiavacTest, had a . between E and number in metadata
-        if 'E687' in samp_name and '.WCOA21' not in samp_name:
-            return samp_name.replace('E687', 'E687.WCOA21')
-        if '.NC' in samp_name: # If an E was put in front of an NC sample (this happends in some of the extractions e.g. the SKQ21 extractions), will remove the E
-            samp_name = samp_name.replace('E.', '')
-        if '*' in samp_name:
-            samp_name = samp_name.replace('*','')
-        if '.SKQ2021' in samp_name:
-            samp_name = samp_name.replace('.SKQ2021', '.SKQ21-15S')
-        if '.NO20' in samp_name and '.NO20-01' not in samp_name:
-            samp_name = samp_name.replace('.NO20', '.NO20-01')
-        if 'Mid.NC.SKQ21' in samp_name:
-            samp_name = samp_name.replace('Mid.NC.SKQ21', 'MID.NC.SKQ21-15S')
-        if '.DY2206' in samp_name:
-            samp_name = samp_name.replace('.DY2206', '.DY22-06')
-        if '.DY2209' in samp_name:
-            samp_name =  samp_name.replace('.DY2209', '.DY22-09')
-        if '.DY2306' in samp_name:
-            samp_name =  samp_name.replace('.DY2306', '.DY23-06')
-        if 'E2030.NC' == samp_name:
-            samp_name = 'E2030.NC.SKQ23-12S'
-        if 'Blank1C.QiavacTest' == samp_name:
-             samp_name = 'Blank1C.QIAvacTest'
-        if 'Blank3Q.QiavacTest' == samp_name:
-             samp_name ='Blank3Q.QIAvacTest'
-             
-
-        return samp_name
+        return ome_samp_name_rewriter.rewrite(str(samp_name))
+
+def str_replace_for_samps_series(samp_names: pd.Series) -> pd.Series:
+        """
+        str_replace_for_samps for a whole Series of sample names, rewriting each unique name once.
+        """
+        return ome_samp_name_rewriter.rewrite_series(samp_names.astype(str))
 
 def convert_mdy_date_to_iso8061(date_string: str) -> str:
         """
@@ -155,4 +132,40 @@ def convert_mdy_date_to_iso8061(date_string: str) -> str:
         except Exception as e:
                 # Print the error for debugging
                 print(f"Error converting {date_string}: {str(e)}!")
-                return date_string
\ No newline at end of file
+                return date_string
+
+def values_to_ints(values: pd.Series) -> pd.Series:
+        """
+        Converts a column to ints the same way int() converts each value (floats are truncated,
+        NaN and values that aren't numbers raise a ValueError)
+        """
+        if pd.api.types.is_numeric_dtype(values):
+            if values.isna().any():
+                raise ValueError("cannot convert float NaN to integer")
+            return values.astype(np.int64)
+        return values.map(int)
+
+def values_to_floats(values: pd.Series) -> tuple:
+        """
+        Converts a column to floats the same way float() converts each value. Returns (floats, parsed) where
+        parsed is False for the values float() couldn't convert (those are NaN in floats). Each distinct value
+        is only converted once.
+        """
+        def to_float(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        converted = {value: to_float(value) for value in values.unique()}
+        parsed = values.map({value: float_val is not None for value, float_val in converted.items()}).astype(bool)
+        floats = values.map({value: np.nan if float_val is None else float_val for value, float_val in converted.items()}).astype(float)
+        return floats, parsed
+
+def round_floats(values: pd.Series, decimals: int) -> pd.Series:
+        """
+        Rounds a float column the same way round() rounds a python float (Series.round can be off in the last
+        decimal, e.g. 11.345 -> 11.34 instead of 11.35). Each distinct value is only rounded once.
+        """
+        rounded = {value: round(float(value), decimals) for value in values.unique() if pd.notna(value)}
+        return values.map(rounded).astype(float)
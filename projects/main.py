@@ -1,15 +1,19 @@
 import argparse
 import pandas as pd
 from faire_mapping.project_mapper import ProjectMapper
+from faire_mapping.google_sheet_snapshots import set_offline_mode
 
 def main() -> None:
 
     parser = argparse.ArgumentParser(description='Process project configuration path for FAIRe mapping of projects for GBIF/OBIS')
     parser.add_argument('project_config_path', type=str, help='Path to the project configuration file.') 
     parser.add_argument('gh_token', type=str, help='Github personal access token') 
+    parser.add_argument('--offline', action='store_true', help='Only use the local snapshots of the Google Sheets (no Google API requests).')
 
 
     args = parser.parse_args()
+    if args.offline:
+        set_offline_mode()
 
     project_creator = ProjectMapper(config_yaml=args.project_config_path, gh_token=args.gh_token)
     project_creator.process_whole_project_and_save_to_excel()
@@ -3,6 +3,7 @@ import pandas as pd
 import sys
 sys.path.append("..")
 from faire_mapping.experiment_run_metadata_mapper import ExperimentRunMetadataMapper
+from faire_mapping.google_sheet_snapshots import set_offline_mode
 
 def create_exp_run_metadata(config_yaml: str) -> pd.DataFrame:
 
@@ -23,8 +24,11 @@ def main() -> None:
 
     parser = argparse.ArgumentParser(description='Process experiment run configuration path for FAIRe mapping of sequencing runs')
     parser.add_argument('experiment_run_config_path', type=str, help='Path to the experiment run configuration file.') 
+    parser.add_argument('--offline', action='store_true', help='Only use the local snapshots of the Google Sheets (no Google API requests).')
 
     args = parser.parse_args()
+    if args.offline:
+        set_offline_mode()
 
     faire_exp_run_metadata_df = create_exp_run_metadata(config_yaml=args.experiment_run_config_path)
     print(faire_exp_run_metadata_df)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+"""
+Cut the GEBCO grid into the regional tiles FaireSampleMetadataMapper looks tot_depth_water_col up in.
+Run from anywhere in the repo, e.g.:
+    python scripts/build_gebco_tiles/build_gebco_tiles.py --sample_metadata_csvs path/to/cruise_samples.csv
+or from this directory with ./build_gebco_tiles.py (see --help for the GEBCO file, tile dir and columns)
+"""
+import argparse
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2])) # repo root, so faire_mapping imports without setting PYTHONPATH
+import pandas as pd
+from faire_mapping.sample_metadata_mapper import FaireSampleMetadataMapper
+from faire_mapping.spatial import build_gebco_tile_cache, bounding_box_from_lat_lon, DEFAULT_GEBCO_REGIONS
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description='Cut the GEBCO grid into regional int16 tiles so tot_depth_water_col lookups do not have to open the full netCDF')
+    parser.add_argument('--gebco_file', type=str, default=FaireSampleMetadataMapper.gebco_file, help='Path to the full GEBCO netCDF.')
+    parser.add_argument('--cache_dir', type=str, default=FaireSampleMetadataMapper.gebco_tile_cache_dir, help='Directory to write the tiles and index.json to.')
+    parser.add_argument('--sample_metadata_csvs', type=str, nargs='*', default=[], help='Cruise sample metadata csvs, one tile is cut around the lat/lon bounding box of each. If none are given the default Bering/Chukchi, Gulf of Alaska and California Current regions are used.')
+    parser.add_argument('--lat_col', type=str, default='decimalLatitude', help='Latitude column in the sample metadata csvs.')
+    parser.add_argument('--lon_col', type=str, default='decimalLongitude', help='Longitude column in the sample metadata csvs.')
+    parser.add_argument('--pad', type=float, default=0.5, help='Degrees to pad each cruise bounding box by.')
+
+    args = parser.parse_args()
+
+    regions = {}
+    for csv_path in args.sample_metadata_csvs:
+        samp_df = pd.read_csv(csv_path)
+        regions[Path(csv_path).stem] = bounding_box_from_lat_lon(lat=pd.to_numeric(samp_df[args.lat_col], errors='coerce'),
+                                                                 lon=pd.to_numeric(samp_df[args.lon_col], errors='coerce'),
+                                                                 pad=args.pad)
+
+    index = build_gebco_tile_cache(gebco_file=args.gebco_file, cache_dir=args.cache_dir, regions=regions or DEFAULT_GEBCO_REGIONS)
+    print(f"Wrote {len(index['tiles'])} GEBCO tiles to {args.cache_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import math
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from faire_mapping.sample_metadata_mapper import FaireSampleMetadataMapper
+
+# The column (vector) versions of the mapper functions have to return what applying the row version to every row
+# returns, including for mixed types, NaN, None and ''
+
+
+def make_mapper() -> FaireSampleMetadataMapper:
+    # The functions tested here only need these attributes, so the mapper is not set up from a config (no google sheets)
+    mapper = FaireSampleMetadataMapper.__new__(FaireSampleMetadataMapper)
+    mapper.faire_sample_name_col = 'samp_name'
+    mapper.sample_metadata_cast_no_col_name = 'cast'
+    mapper.sample_metadata_bottle_no_col_name = 'btl'
+    mapper.extraction_metadata_builder = SimpleNamespace(EXTRACT_CONC_COL='extraction_conc',
+                                                         EXTRACT_BLANK_VOL_WE_DNA_EXT_COL='extraction_blank_vol')
+    return mapper
+
+
+def is_nan(value) -> bool:
+    return isinstance(value, (float, np.floating)) and math.isnan(value)
+
+
+def assert_same_values(vector_values: pd.Series, row_values: list):
+    # None and NaN are different here, so the vector version can't turn the row version's None into NaN
+    vector_values = vector_values.tolist()
+    assert len(vector_values) == len(row_values)
+    for i, (vector_value, row_value) in enumerate(zip(vector_values, row_values)):
+        if row_value is None:
+            assert vector_value is None, f"row {i}: {vector_value!r} is not None"
+        elif is_nan(row_value):
+            assert is_nan(vector_value), f"row {i}: {vector_value!r} is not NaN"
+        else:
+            assert vector_value == row_value, f"row {i}: {vector_value!r} != {row_value!r}"
+
+
+def test_calculate_dna_yields():
+    mapper = make_mapper()
+    df = pd.DataFrame({
+        'extraction_conc': ['1.5', 2, np.nan, '', 'abc', '3', 'x', None, 4.25, '0.11345'],
+        'samp_vol': ['~100', 50, 10, 10, 10, '0', 'abc', 10, '1000', 1],
+        'extraction_blank_vol': [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        'samp_name': ['E1.1B.DY20', 'E2', 'E3', 'E4', 'E5.NC.DY20', 'E6', 'E7.nc', 'E8', 'E9', 'E10'],
+    }, index=[5, 5, 2, 0, 1, 7, 9, 8, 3, 4])
+
+    row_values = [mapper.calculate_dna_yield(metadata_row=row, sample_vol_metadata_col='samp_vol') for _, row in df.iterrows()]
+    vector_values = mapper.calculate_dna_yields(concentrations=df['extraction_conc'], sample_vols=df['samp_vol'],
+                                                sample_names=df['samp_name'])
+    assert_same_values(vector_values, row_values)
+
+    # extraction blanks use the extraction blank volume column
+    row_values = [mapper.calculate_dna_yield(metadata_row=row, sample_vol_metadata_col='samp_vol', extraction_blank=True) for _, row in df.iterrows()]
+    vector_values = mapper.calculate_dna_yields(concentrations=df['extraction_conc'], sample_vols=df['extraction_blank_vol'],
+                                                sample_names=df['samp_name'])
+    assert_same_values(vector_values, row_values)
+
+
+def test_calculate_altitudes():
+    mapper = make_mapper()
+    df = pd.DataFrame({'depth': [10.123, np.nan, 0, 55.555, 3],
+                       'tot_depth_water_col': [100.456, 20, np.nan, 55.555, 2.001]})
+
+    row_values = [mapper.calculate_altitude(metadata_row=row, depth_col='depth', tot_depth_col='tot_depth_water_col') for _, row in df.iterrows()]
+    assert_same_values(mapper.calculate_altitudes(depths=df['depth'], tot_depths=df['tot_depth_water_col']), row_values)
+
+    # PPS samples have a constant depth
+    row_values = [mapper.calculate_altitude(metadata_row=row, depth_col='5', tot_depth_col='tot_depth_water_col') for _, row in df.iterrows()]
+    assert_same_values(mapper.calculate_altitudes(depths=5, tot_depths=df['tot_depth_water_col']), row_values)
+
+
+def test_convert_wind_degrees_to_directions():
+    mapper = make_mapper()
+    for wind_degrees in [pd.Series([0, 11.25, 11.26, 359, np.nan, 180.4, 348.75, 720]),
+                         pd.Series([90, None, np.nan, 270.0], dtype=object),
+                         pd.Series([np.nan, np.nan])]:
+        row_values = [mapper.convert_wind_degrees_to_direction(degree) for degree in wind_degrees]
+        assert_same_values(mapper.convert_wind_degrees_to_directions(wind_degrees), row_values)
+
+
+def test_convert_min_depths_from_minus_one_meter():
+    mapper = make_mapper()
+    df = pd.DataFrame({'max_depth': ['5', 0.5, -1, 0, np.nan, '12.345', 1, '0.999']})
+
+    row_values = [mapper.convert_min_depth_from_minus_one_meter(metadata_row=row, max_depth_col_name='max_depth') for _, row in df.iterrows()]
+    assert_same_values(mapper.convert_min_depths_from_minus_one_meter(df['max_depth']), row_values)
+
+
+def test_calculate_env_local_scales():
+    mapper = make_mapper()
+    depths = pd.Series(['200', 200.1, np.nan, 10, '1000', 0, -3])
+
+    row_values = [mapper.calculate_env_local_scale(depth) for depth in depths]
+    assert_same_values(mapper.calculate_env_local_scales(depths), row_values)
+
+
+def test_add_material_sample_ids():
+    mapper = make_mapper()
+    df = pd.DataFrame({'cast': [1, '2', 3.0, '12', 100],
+                       'btl': [5, 10.0, '7', 1, '24'],
+                       'cruise': ['DY20-12', 'DY20-12', 'SKQ21-15S', 'SKQ21-15S', 'DY23-06']})
+
+    # cruise code column
+    row_values = [mapper.add_material_sample_id(metadata_row=row, cruise_code='cruise') for _, row in df.iterrows()]
+    assert_same_values(mapper.add_material_sample_ids(casts=df['cast'], bottles=df['btl'], cruise_code=df['cruise']), row_values)
+
+    # hardcoded cruise code
+    row_values = [mapper.add_material_sample_id(metadata_row=row, cruise_code='DY22-06') for _, row in df.iterrows()]
+    assert_same_values(mapper.add_material_sample_ids(casts=df['cast'], bottles=df['btl'], cruise_code='DY22-06'), row_values)
+
+    # the row version can't make an id without a cast number, neither can the column version
+    for version in [lambda: [mapper.add_material_sample_id(metadata_row=row, cruise_code='DY22-06') for _, row in df.assign(cast=np.nan).iterrows()],
+                    lambda: mapper.add_material_sample_ids(casts=df['cast'].where(df.index != 1), bottles=df['btl'], cruise_code='DY22-06')]:
+        try:
+            version()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Expected a ValueError for a missing cast number")
+
+
+def test_add_material_samp_ids_for_pps_samp():
+    mapper = make_mapper()
+    df = pd.DataFrame({'event': ['Event1', ' Event2 ', 3, '4.0', 5.7, 'Event12'],
+                       'prefix': ['M2-PPS-0423', 'M2-PPS-0423', None, np.nan, 5, 'M4-PPS-0923']},
+                      index=[3, 3, 0, 1, 2, 9], dtype=object)
+
+    # prefix column
+    row_values = [mapper.add_material_samp_id_for_pps_samp(metadata_row=row, cast_or_event_col='event', prefix='prefix') for _, row in df.iterrows()]
+    assert_same_values(mapper.add_material_samp_ids_for_pps_samp(casts_or_events=df['event'], prefix=df['prefix']), row_values)
+
+    # hardcoded prefix (not a column of the metadata)
+    row_values = [mapper.add_material_samp_id_for_pps_samp(metadata_row=row, cast_or_event_col='event', prefix='M2-PPS-0423') for _, row in df.iterrows()]
+    assert_same_values(mapper.add_material_samp_ids_for_pps_samp(casts_or_events=df['event'], prefix='M2-PPS-0423'), row_values)
+
+    # the row version can't make an id without a cast or event number, neither can the column version
+    for missing in [np.nan, None, '']:
+        casts = df['event'].where(df['event'] != 3, missing)
+        for version in [lambda: [mapper.add_material_samp_id_for_pps_samp(metadata_row=row, cast_or_event_col='event', prefix='M2-PPS-0423') for _, row in df.assign(event=casts).iterrows()],
+                        lambda: mapper.add_material_samp_ids_for_pps_samp(casts_or_events=casts, prefix='M2-PPS-0423')]:
+            try:
+                version()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Expected a ValueError for a missing cast or event number ({missing!r})")
+
+
+def test_add_material_samp_ids_for_aquamonitor():
+    mapper = make_mapper()
+    for stations in [pd.Series(['M18', ' M2', np.nan, None, 18, 18.0, ''], index=[4, 4, 0, 1, 2, 3, 9], dtype=object),
+                     pd.Series([np.nan, np.nan]),
+                     pd.Series([1, 2])]:
+        row_values = [mapper.add_material_samp_id_for_aquamonitor(station) for station in stations]
+        assert_same_values(mapper.add_material_samp_ids_for_aquamonitor(stations), row_values)
+
+
+def test_well_numbers_and_positions():
+    mapper = make_mapper()
+    for wells in [pd.Series(['G1', None, np.nan, '', 3, 'A12', 'H9'], index=[4, 4, 0, 1, 2, 3, 9], dtype=object),
+                  pd.Series([np.nan, np.nan]),
+                  pd.Series([1, 2])]:
+        df = wells.to_frame('well')
+        row_numbers = [mapper.get_well_number_from_well_field(metadata_row=row, well_col='well') for _, row in df.iterrows()]
+        row_positions = [mapper.get_well_position_from_well_field(metadata_row=row, well_col='well') for _, row in df.iterrows()]
+        assert_same_values(mapper.get_well_numbers_from_well_field(wells), row_numbers)
+        assert_same_values(mapper.get_well_positions_from_well_field(wells), row_positions)
+
+
+def test_map_using_fallback_cols():
+    mapper = make_mapper()
+    df = pd.DataFrame({
+        'desired': ['a', np.nan, '', None, np.nan, '', 'b'],
+        'use_if_na': ['x', 'b', np.nan, 'c', '', None, ''],
+        'use_if_second_na': ['y', 'z', 'w', np.nan, None, '', 'v'],
+    }, dtype=object)
+
+    for third_col in ['use_if_second_na', None]:
+        row_values = [mapper.map_using_two_or_three_cols_if_one_is_na_use_other(
+            metadata_row=row, desired_col_name='desired', use_if_na_col_name='use_if_na', use_if_second_col_is_na=third_col)
+            for _, row in df.iterrows()]
+        vector_values = mapper.map_using_fallback_cols(
+            desired_values=df['desired'], use_if_na_values=df['use_if_na'],
+            use_if_second_na_values=df[third_col] if third_col is not None else None)
+        assert_same_values(vector_values, row_values)
+
+
+def test_map_using_fallback_cols_dates():
+    mapper = make_mapper()
+    df = pd.DataFrame({
+        'desired': ['2021/11/08 00:00:00', np.nan, '', None, np.nan, ''],
+        'use_if_na': ['5/1/2024', '2024-05-01', np.nan, '2022-10-03T12:30:00', '', None],
+        'use_if_second_na': ['5/1/2024', '2024-05-01', '11/30/2023', np.nan, None, ''],
+    }, dtype=object)
+
+    for third_col in ['use_if_second_na', None]:
+        row_values = [mapper.map_using_two_or_three_cols_if_one_is_na_use_other(
+            metadata_row=row, desired_col_name='desired', use_if_na_col_name='use_if_na',
+            transform_use_col_to_date_format=True, use_if_second_col_is_na=third_col)
+            for _, row in df.iterrows()]
+        vector_values = mapper.map_using_fallback_cols(
+            desired_values=df['desired'], use_if_na_values=df['use_if_na'],
+            use_if_second_na_values=df[third_col] if third_col is not None else None, transform_use_col_to_date_format=True)
+        assert_same_values(vector_values, row_values)
+
+
+if __name__ == "__main__":
+    test_calculate_dna_yields()
+    test_calculate_altitudes()
+    test_convert_wind_degrees_to_directions()
+    test_convert_min_depths_from_minus_one_meter()
+    test_calculate_env_local_scales()
+    test_add_material_sample_ids()
+    test_add_material_samp_ids_for_pps_samp()
+    test_add_material_samp_ids_for_aquamonitor()
+    test_well_numbers_and_positions()
+    test_map_using_fallback_cols()
+    test_map_using_fallback_cols_dates()
+    print("All column versions match the row versions")
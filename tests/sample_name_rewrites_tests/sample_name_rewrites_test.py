@@ -0,0 +1,126 @@
+import pandas as pd
+from faire_mapping.utils import str_replace_for_samps, str_replace_for_samps_series
+from faire_mapping.sample_name_rewrites import (sample_metadata_samp_name_rewriter, asv_samp_name_rewriter,
+                                                raw_data_lookup_samp_name_rewriter, cruise_code_rewriter)
+
+# Golden sample names: (sample name, rewritten sample name) as rewritten by the sequential str.replace
+# implementations the rewrite tables replaced (including their quirks, e.g. .DY2012 -> .DY20-1212)
+
+STR_REPLACE_FOR_SAMPS_GOLDEN = [
+    ('E62_1B_DY20', 'E62.1B.DY20-12'),
+    ('E62.1B.DY20', 'E62.1B.DY20-12'),
+    ('E1_pool_DY20', 'E1_pool_DY20'),
+    ('E1875.OC0723 (P10 D2)', 'E1875.OC0723'),
+    ('E265.IB.NO20', 'E265.1B.NO20-01'),
+    ('E.2139.QiavacTest', 'E2139.QiavacTest'),
+    ('E687', 'E687.WCOA21'),
+    ('E687.WCOA21', 'E687.WCOA21'),
+    ('E.E1020.NC.SKQ21', 'E1020.NC.SKQ21'),
+    ('E1020.1B*.SKQ2021', 'E1020.1B.SKQ21-15S'),
+    ('E33.2A.NO20', 'E33.2A.NO20-01'),
+    ('E33.2A.NO20-01', 'E33.2A.NO20-01'),
+    ('Mid.NC.SKQ21', 'MID.NC.SKQ21-15S'),
+    ('E1.1B.DY2206', 'E1.1B.DY22-06'),
+    ('E1.1B.DY2209', 'E1.1B.DY22-09'),
+    ('E1.1B.DY2306', 'E1.1B.DY23-06'),
+    ('E2030.NC', 'E2030.NC.SKQ23-12S'),
+    ('Blank1C.QiavacTest', 'Blank1C.QIAvacTest'),
+    ('Blank3Q.QiavacTest', 'Blank3Q.QIAvacTest'),
+    ('E2030.NC.SKQ23-12S', 'E2030.NC.SKQ23-12S'),
+    ('E1.1B.OC0723', 'E1.1B.OC0723'),
+    ('Extraction Blank 1', 'Extraction Blank 1'),
+]
+
+SAMPLE_METADATA_SAMP_NAMES_GOLDEN = [
+    ('E2030_1B_SKQ23-12S', 'E2030-1B-SKQ23-12S'),
+    ('E1820.1B.DY23-06', 'E1820.1B.DY2306'),
+    ('E1820_1B_DY23-06', 'E1820-1B-DY23-06'),
+    ('E1.1B.SKQ2021', 'E1.1B.SKQ21-15S'),
+    ('E1.1B.DY2206', 'E1.1B.DY2206'),
+]
+
+ASV_SAMP_NAMES_GOLDEN = [
+    ('MP_E62_1B_DY20', 'E62.1B.DY20-12'),
+    ('MP_E1020_1B_SKQ2021', 'E1020.1B.SKQ21-15S-15S'),
+    ('MP_Mid_NC_SKQ21', 'MID.NC.SKQ21-15S'),
+    ('MP_E2030_NC_SKQ23_12S', 'E2030.NC.SKQ23-12S'),
+    ('MP_E1_1B_DY2306', 'E1.1B.DY23-06'),
+    ('MP_E1_1B_DY2209', 'E1.1B.DY22-09'),
+    ('MP_E1_1B_DY2206', 'E1.1B.DY22-06'),
+    ('MP_E2_1B_OC1021', 'E2.1B.TH042-PPS-0821'),
+    ('MP_E5_1B_Chaba22', 'E5.1B.TN409'),
+    ('MP_E5_1B_L018', 'E5.1B.LO18'),
+    ('MP_E1_1B_DY2012', 'E1.1B.DY20-1212'),
+    ('MP_E1_1B_NO20', 'E1.1B.NO20-01'),
+]
+
+RAW_DATA_LOOKUP_GOLDEN = [
+    ('E62.1B.DY20-12', 'E62.1B.DY20'),
+    ('E687.WCOA21', 'E687'),
+    ('E1020.1B.SKQ21-15S', 'E1020.1B.SKQ2021'),
+    ('E2.1B.TH042-PPS-0821', 'E2.1B.OC1021'),
+    ('E2.1B.CE042-PPS-0821', 'E2.1B.OC1021'),
+    ('E5.1B.TN409', 'E5.1B.Chaba22'),
+    ('E5.1B.LO18', 'E5.1B.L018'),
+    ('E1.1B.DY22-06', 'E1.1B.DY2206'),
+    ('E33.2A.NO20-01', 'E33.2A.NO20'),
+    ('E1.1B.TH042-PPS-0623', 'E1.1B.OC0723'),
+]
+
+ASV_LOOKUP_CRUISE_CODES_GOLDEN = [
+    ('E62.1B.DY20', 'E62.1B.DY20-12'),
+    ('E1.1B.DY2012', 'E1.1B.DY20-1212'),
+    ('E33.2A.NO20', 'E33.2A.NO20-01'),
+    ('E1.1B.OC0722', 'E1.1B.TH042-PPS-0622'),
+    ('E1.1B.SKQ21', 'E1.1B.SKQ21-15S'),
+    ('E5.1B.L018', 'E5.1B.LO18'),
+    ('E2.1B.OC1021_ce', 'E2.1B.TH042-PPS-0821_ce'),
+]
+
+
+def check_golden(rewrite_one, rewrite_series, golden: list):
+    samp_names = [samp_name for samp_name, _ in golden]
+    expected = [rewritten for _, rewritten in golden]
+    assert [rewrite_one(samp_name) for samp_name in samp_names] == expected
+    # twice, so the memoized names are checked too
+    for _ in range(2):
+        assert rewrite_series(pd.Series(samp_names * 2)).tolist() == expected * 2
+
+
+def test_str_replace_for_samps():
+    check_golden(str_replace_for_samps, str_replace_for_samps_series, STR_REPLACE_FOR_SAMPS_GOLDEN)
+
+
+def test_sample_metadata_samp_names():
+    check_golden(sample_metadata_samp_name_rewriter.rewrite, sample_metadata_samp_name_rewriter.rewrite_series, SAMPLE_METADATA_SAMP_NAMES_GOLDEN)
+
+
+def test_asv_samp_names():
+    check_golden(asv_samp_name_rewriter.rewrite, asv_samp_name_rewriter.rewrite_series, ASV_SAMP_NAMES_GOLDEN)
+
+
+def test_raw_data_lookup_samp_names():
+    check_golden(raw_data_lookup_samp_name_rewriter.rewrite, raw_data_lookup_samp_name_rewriter.rewrite_series, RAW_DATA_LOOKUP_GOLDEN)
+
+
+def test_asv_lookup_cruise_codes():
+    check_golden(cruise_code_rewriter.rewrite, cruise_code_rewriter.rewrite_series, ASV_LOOKUP_CRUISE_CODES_GOLDEN)
+
+
+def test_non_string_samp_names():
+    # str_replace_for_samps works on str() of the value, the rewriters leave values that aren't strings as they are
+    samp_names = pd.Series(['E62_1B_DY20', None, float('nan'), 'E2030.NC'], index=[3, 3, 1, 0])
+    assert str_replace_for_samps_series(samp_names).tolist() == [str_replace_for_samps(samp_name) for samp_name in samp_names]
+    rewritten = asv_samp_name_rewriter.rewrite_series(samp_names)
+    assert rewritten.index.tolist() == [3, 3, 1, 0]
+    assert rewritten[1] != rewritten[1] and rewritten.iloc[1] is None
+
+
+if __name__ == "__main__":
+    test_str_replace_for_samps()
+    test_sample_metadata_samp_names()
+    test_asv_samp_names()
+    test_raw_data_lookup_samp_names()
+    test_asv_lookup_cruise_codes()
+    test_non_string_samp_names()
+    print("All golden sample names match")
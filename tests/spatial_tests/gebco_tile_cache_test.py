@@ -0,0 +1,64 @@
+import tempfile
+from pathlib import Path
+import numpy as np
+import xarray as xr
+from faire_mapping.spatial import GebcoBathymetry, build_gebco_tile_cache, bounding_box_from_lat_lon, split_at_antimeridian, DEFAULT_GEBCO_REGIONS
+
+# GEBCO tiles for cruises that cross the antimeridian, cut from a small made up grid (no GEBCO download needed)
+
+# Stations of a Bering Sea cruise on both sides of the antimeridian
+CRUISE_LAT = [58.1, 60.6, 62.1, 59.3, np.nan]
+CRUISE_LON = [178.6, 179.9, -179.6, -176.1, -177.0]
+
+
+def write_grid(gebco_file: Path) -> xr.Dataset:
+    # Half degree cells centred like GEBCO's, elevation encodes the cell so every cell has its own value (in int16)
+    lat = np.arange(50.25, 70.0, 0.5)
+    lon = np.arange(-179.75, 180.0, 0.5)
+    elevation = (-(np.arange(len(lat))[:, None] * len(lon) + np.arange(len(lon))[None, :])).astype(np.int16)
+    ds = xr.Dataset({'elevation': (('lat', 'lon'), elevation)}, coords={'lat': lat, 'lon': lon})
+    ds.to_netcdf(gebco_file)
+    return ds
+
+
+def test_bounding_box_crosses_the_antimeridian():
+    assert bounding_box_from_lat_lon([58.0, 60.5, 62.0, np.nan], [178.5, 179.75, -179.5, -176.0], pad=0.5) == (57.5, 62.5, 178.0, -175.5)
+    # a cruise that doesn't cross it keeps the usual box
+    assert bounding_box_from_lat_lon([55.0, 57.0], [-160.0, -150.0], pad=0.5) == (54.5, 57.5, -160.5, -149.5)
+    # a box that doesn't cross the antimeridian is clamped to it, one that does is padded on both sides of it
+    assert bounding_box_from_lat_lon([58.0, 59.0], [-179.75, -170.0], pad=0.5) == (57.5, 59.5, -180.0, -169.5)
+    assert bounding_box_from_lat_lon([58.0, 59.0, 59.0], [-179.75, -170.0, 175.0], pad=0.5) == (57.5, 59.5, 174.5, -169.5)
+
+
+def test_split_at_antimeridian():
+    regions = split_at_antimeridian(DEFAULT_GEBCO_REGIONS)
+    assert regions['bering_chukchi_west'] == (50.0, 75.0, 160.0, 180.0)
+    assert regions['bering_chukchi_east'] == (50.0, 75.0, -180.0, -155.0)
+    assert 'bering_chukchi' not in regions
+    assert regions['gulf_of_alaska'] == DEFAULT_GEBCO_REGIONS['gulf_of_alaska']
+
+
+def test_cruise_tiles_on_both_sides_of_the_antimeridian():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gebco_file = Path(tmp_dir) / 'gebco.nc'
+        ds = write_grid(gebco_file)
+        index = build_gebco_tile_cache(gebco_file=gebco_file, cache_dir=Path(tmp_dir) / 'tiles',
+                                       regions={'dy2209': bounding_box_from_lat_lon(CRUISE_LAT, CRUISE_LON)})
+
+        # two narrow tiles instead of one spanning almost every longitude
+        assert sorted(index['tiles']) == ['dy2209_east', 'dy2209_west']
+        assert all(tile['shape'][1] < 20 for tile in index['tiles'].values())
+
+        bathymetry = GebcoBathymetry(gebco_file=str(gebco_file), tile_cache_dir=str(Path(tmp_dir) / 'tiles'))
+        elevations = bathymetry.elevation_at(CRUISE_LAT, CRUISE_LON)
+        expected = [float(ds['elevation'].sel(lat=lat, lon=lon, method='nearest')) for lat, lon in zip(CRUISE_LAT[:-1], CRUISE_LON[:-1])]
+        assert elevations[:-1].tolist() == expected and np.isnan(elevations[-1])
+        # every station was in a tile, so the full grid was never opened
+        assert bathymetry._ds is None
+
+
+if __name__ == "__main__":
+    test_bounding_box_crosses_the_antimeridian()
+    test_split_at_antimeridian()
+    test_cruise_tiles_on_both_sides_of_the_antimeridian()
+    print("All GEBCO tile cache tests passed")
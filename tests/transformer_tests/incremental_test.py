@@ -0,0 +1,131 @@
+import tempfile
+from types import SimpleNamespace
+import pandas as pd
+from faire_mapping.transformers.rules.measurement_calculation_rules import get_tot_depth_water_col_from_lat_lon_or_exact_col
+from faire_mapping.transformers.incremental_store import IncrementalResultStore
+from faire_mapping.transformers.transformation_pipeline import TransformationPipeline, TransformationBuilder
+
+MAPPING_DICT = {'related': {'depth_x2': 'depth', 'replicates': 'cast', 'replicate_label': 'replicates'}}
+
+
+def make_rules(transformed_rows: list) -> list:
+    def double_depth(columns, faire_col, metadata_col):
+        transformed_rows.extend(columns['depth'].index)
+        return columns['depth'] * 2
+
+    def count_replicates(df, faire_col, metadata_col):
+        # needs every row of the cast, not just the changed ones
+        return df.groupby(metadata_col)[metadata_col].transform('size')
+
+    return [
+        TransformationBuilder('depth_x2').for_faire_cols('depth_x2')
+            .apply(double_depth, mode='vector', inputs=lambda metadata_col: {'depth': metadata_col}).build(),
+        TransformationBuilder('replicates').for_faire_cols('replicates')
+            .reads().row_local(False).update_source(True)
+            .apply(count_replicates, mode='direct').build(),
+        # row local, but reads the output of a rule that isn't
+        TransformationBuilder('replicate_label').for_faire_cols('replicate_label')
+            .apply(lambda columns, faire_col, metadata_col: 'n=' + columns['replicates'].astype(str), mode='vector',
+                   inputs=lambda metadata_col: {'replicates': metadata_col}).build(),
+    ]
+
+
+def make_source_df(samp_names: list) -> pd.DataFrame:
+    # reset_index() adds the old position as an 'index' column, like SampleMetadataBuilder
+    samples = {'E1': (1, 10.0), 'E2': (1, 20.0), 'E3': (2, 30.0), 'E4': (2, 40.0), 'E5': (1, 50.0)}
+    return pd.DataFrame({'samp_name': samp_names,
+                         'cast': [samples[samp_name][0] for samp_name in samp_names],
+                         'depth': [samples[samp_name][1] for samp_name in samp_names]}).reset_index()
+
+
+def run(source_df: pd.DataFrame, store: IncrementalResultStore, reference_fingerprint: str = None) -> tuple:
+    transformed_rows = []
+    pipeline = TransformationPipeline(source_df=source_df, mapper=None, name='samples', row_key_col='samp_name')
+    pipeline.register_rules(make_rules(transformed_rows))
+    pipeline.execute_incremental(MAPPING_DICT, store=store, store_key='test', reference_fingerprint=reference_fingerprint)
+    return pipeline.get_results_df(), transformed_rows
+
+
+def expected_results(source_df: pd.DataFrame) -> pd.DataFrame:
+    pipeline = TransformationPipeline(source_df=source_df, mapper=None).register_rules(make_rules([]))
+    pipeline.execute(MAPPING_DICT)
+    return pipeline.get_results_df()
+
+
+def test_inserted_row_is_the_only_one_transformed():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = IncrementalResultStore(cache_dir=tmp_dir)
+        results, transformed_rows = run(make_source_df(['E1', 'E2', 'E3', 'E4']), store)
+        assert len(transformed_rows) == 4
+
+        # E5 is inserted at the top of a RangeIndex sheet, so every other row's label and 'index' value changes
+        source_df = make_source_df(['E5', 'E1', 'E2', 'E3', 'E4'])
+        results, transformed_rows = run(source_df, store)
+        assert transformed_rows == [0]
+        pd.testing.assert_frame_equal(results, expected_results(make_source_df(['E5', 'E1', 'E2', 'E3', 'E4'])), check_dtype=False)
+        # the rules that aren't row local (and the ones reading their output) see the new replicate in cast 1
+        assert results['replicates'].tolist() == [3, 3, 3, 2, 2]
+        assert results['replicate_label'].tolist() == ['n=3', 'n=3', 'n=3', 'n=2', 'n=2']
+
+
+def test_changed_reference_data_transforms_every_row():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = IncrementalResultStore(cache_dir=tmp_dir)
+        run(make_source_df(['E1', 'E2', 'E3']), store, reference_fingerprint='stations v1')
+
+        _, transformed_rows = run(make_source_df(['E1', 'E2', 'E3']), store, reference_fingerprint='stations v1')
+        assert transformed_rows == []
+        _, transformed_rows = run(make_source_df(['E1', 'E2', 'E3']), store, reference_fingerprint='stations v2')
+        assert len(transformed_rows) == 3
+
+
+def test_reference_lookups_are_not_rerun_on_unchanged_rows():
+    # tot_depth_water_col is looked up in GEBCO for each row on its own, like the station and geo_loc_name lookups
+    looked_up_rows = []
+
+    def get_tot_depth_water_col_for_df(df, lat_col, lon_col, exact_map_col=None):
+        looked_up_rows.extend(df['samp_name'])
+        return (df[lat_col] * 100 + df[lon_col]).rename('tot_depth_water_col')
+
+    mapper = SimpleNamespace(get_tot_depth_water_col_for_df=get_tot_depth_water_col_for_df)
+    mapping_dict = {'related': {'tot_depth_water_col': 'lat | lon'}}
+    positions = {'E1': (57.1, -170.2), 'E2': (58.3, -169.9), 'E3': (60.0, -168.5)}
+
+    def run_lookup(samp_names: list, reference_fingerprint: str) -> pd.DataFrame:
+        source_df = pd.DataFrame({'samp_name': samp_names,
+                                  'lat': [positions[samp_name][0] for samp_name in samp_names],
+                                  'lon': [positions[samp_name][1] for samp_name in samp_names]}).reset_index()
+        pipeline = TransformationPipeline(source_df=source_df, mapper=mapper, name='samples', row_key_col='samp_name')
+        pipeline.register_rules([get_tot_depth_water_col_from_lat_lon_or_exact_col(mapper)])
+        pipeline.execute_incremental(mapping_dict, store=store, store_key='test', reference_fingerprint=reference_fingerprint)
+        return pipeline.get_results_df()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = IncrementalResultStore(cache_dir=tmp_dir)
+        run_lookup(['E1', 'E2'], reference_fingerprint='gebco v1')
+        assert looked_up_rows == ['E1', 'E2']
+
+        looked_up_rows.clear()
+        results = run_lookup(['E3', 'E1', 'E2'], reference_fingerprint='gebco v1')
+        assert looked_up_rows == ['E3']
+        assert results['tot_depth_water_col'].round(1).tolist() == [5831.5, 5539.8, 5660.1]
+
+        # a new GEBCO grid looks every row up again
+        looked_up_rows.clear()
+        run_lookup(['E3', 'E1', 'E2'], reference_fingerprint='gebco v2')
+        assert sorted(looked_up_rows) == ['E1', 'E2', 'E3']
+
+
+def test_split_row_local():
+    rule_applications = TransformationPipeline(source_df=make_source_df(['E1']), mapper=None).register_rules(make_rules([])).match_rules(MAPPING_DICT)
+    row_local_applications, every_row_applications = TransformationPipeline.split_row_local(rule_applications)
+    assert [rule_application.faire_col for rule_application in row_local_applications] == ['depth_x2']
+    assert [rule_application.faire_col for rule_application in every_row_applications] == ['replicates', 'replicate_label']
+
+
+if __name__ == "__main__":
+    test_inserted_row_is_the_only_one_transformed()
+    test_changed_reference_data_transforms_every_row()
+    test_reference_lookups_are_not_rerun_on_unchanged_rows()
+    test_split_row_local()
+    print("All incremental tests passed")
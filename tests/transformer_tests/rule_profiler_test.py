@@ -0,0 +1,65 @@
+import tempfile
+import tracemalloc
+from pathlib import Path
+import pandas as pd
+from faire_mapping.transformers.rule_profiler import RuleProfiler, load_rule_throughput
+from faire_mapping.transformers.transformation_pipeline import TransformationPipeline, TransformationBuilder
+
+
+def make_pipeline(profiler: RuleProfiler = None) -> TransformationPipeline:
+    rule = (TransformationBuilder('depth_x2').for_faire_cols('depth_x2')
+            .apply(lambda columns, faire_col, metadata_col: columns['depth'] * 2, mode='vector', inputs=lambda metadata_col: {'depth': metadata_col})
+            .build())
+    return TransformationPipeline(source_df=pd.DataFrame({'depth': [1.0, 2.0, 3.0]}), mapper=None, profiler=profiler).register_rule(rule)
+
+
+def test_memory_is_only_traced_when_asked_for():
+    assert not tracemalloc.is_tracing()
+    profiler = RuleProfiler()
+    make_pipeline(profiler).execute({'related': {'depth_x2': 'depth'}})
+    assert not tracemalloc.is_tracing()
+    assert profiler.profiles[0].peak_memory_delta is None
+    assert 'peak_memory_mb' not in profiler.format_report()
+
+    profiler = RuleProfiler(trace_memory=True)
+    make_pipeline(profiler).execute({'related': {'depth_x2': 'depth'}})
+    assert tracemalloc.is_tracing()
+    assert profiler.profiles[0].peak_memory_delta >= 0
+    assert 'peak_memory_mb' in profiler.format_report()
+    profiler.stop()
+    assert not tracemalloc.is_tracing()
+
+
+def test_stop_leaves_tracemalloc_started_elsewhere_running():
+    tracemalloc.start()
+    try:
+        profiler = RuleProfiler(trace_memory=True)
+        make_pipeline(profiler).execute({'related': {'depth_x2': 'depth'}})
+        profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_plan_reads_the_configured_profile_file():
+    profiler = RuleProfiler()
+    pipeline = make_pipeline(profiler)
+    pipeline.execute({'related': {'depth_x2': 'depth'}})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profile_file = Path(tmp_dir) / 'profile.json'
+        assert load_rule_throughput(profile_file) == {}
+        profiler.write_json(profile_file)
+
+        rule_throughput = load_rule_throughput(profile_file)
+        assert list(rule_throughput) == ['depth_x2']
+        steps = pipeline.plan({'related': {'depth_x2': 'depth'}}, profile_file=profile_file).steps
+        assert steps['estimate_from'].tolist() == ['profile']
+        assert steps['rows_per_sec'].tolist() == [rule_throughput['depth_x2']]
+
+
+if __name__ == "__main__":
+    test_memory_is_only_traced_when_asked_for()
+    test_stop_leaves_tracemalloc_started_elsewhere_running()
+    test_plan_reads_the_configured_profile_file()
+    print("All profiler tests passed")
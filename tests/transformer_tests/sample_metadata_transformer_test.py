@@ -0,0 +1,84 @@
+import os
+import multiprocessing
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from faire_mapping.sample_metadata_mapper import FaireSampleMetadataMapper
+from faire_mapping.transformers.sample_metadata_transformer import SampleMetadataTransformer
+from faire_mapping.transformers.transformation_pipeline import TransformationBuilder, PARALLEL_MIN_ROWS
+
+# Project rules (additional_rules of the mapper) built with parallel(), run end to end through SampleMetadataTransformer
+
+MAPPING_DICT = {'related': {'depth_m': 'depth_cm', 'depth_ft': 'depth_m', 'worker': 'depth_cm'}}
+
+# pids of the processes the process_initializer ran in and the rules that ran in the process (each worker only sees its own)
+worker_setups = []
+worker_rules = []
+
+
+def set_up_worker():
+    worker_setups.append(os.getpid())
+
+
+def to_metres(row):
+    worker_rules.append('depth_m')
+    return row['depth_cm'] / 100
+
+
+def to_feet(row):
+    worker_rules.append('depth_ft')
+    return row['depth_m'] * 3.28084
+
+
+def describe_worker(row):
+    return os.getpid(), tuple(worker_setups), frozenset(worker_rules)
+
+
+def make_mapper(source_df: pd.DataFrame) -> FaireSampleMetadataMapper:
+    # The transformer only needs these attributes, so the mapper is not set up from a config (no google sheets)
+    mapper = FaireSampleMetadataMapper.__new__(FaireSampleMetadataMapper)
+    mapper.config_file = {'transformation_process_workers': 3}
+    mapper.faire_sample_name_col = 'samp_name'
+    mapper.process_initializer = set_up_worker
+    mapper.sample_metadata_df_builder = SimpleNamespace(sample_metadata_df=source_df)
+    mapper.sample_extract_mapping_builder = SimpleNamespace(sample_mapping_dict=MAPPING_DICT)
+    return mapper
+
+
+def get_project_rules(mapper: FaireSampleMetadataMapper) -> list:
+    # depth_ft reads the depth_m that the first rule writes to the source after the workers were started
+    return [
+        TransformationBuilder('depth_m').for_faire_cols('depth_m').reads().parallel().update_source(True)
+            .apply(to_metres),
+        TransformationBuilder('depth_ft').for_faire_cols('depth_ft').reads().parallel()
+            .apply(to_feet),
+        TransformationBuilder('worker').for_faire_cols('worker').reads().parallel()
+            .apply(describe_worker),
+    ]
+
+
+def test_parallel_project_rules_share_the_worker_processes():
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return
+    rows = PARALLEL_MIN_ROWS * 2 + 1
+    source_df = pd.DataFrame({'samp_name': [f'E{i}' for i in range(rows)], 'depth_cm': np.arange(rows, dtype=float) * 10})
+    mapper = make_mapper(source_df)
+    transformer = SampleMetadataTransformer(sample_mapper=mapper, ome_auto_setup=False)
+    transformer.add_custom_rules(get_project_rules(mapper))
+
+    results = transformer.transform()
+
+    assert results['depth_m'].tolist() == (source_df['depth_cm'] / 100).tolist()
+    assert results['depth_ft'].tolist() == (source_df['depth_cm'] / 100 * 3.28084).tolist()
+    # the rules ran in the 3 workers of one pool, which still had what the earlier rules did in them, and the
+    # process_initializer ran once in each worker
+    pids = {pid for pid, _, _ in results['worker']}
+    assert os.getpid() not in pids and len(pids) <= 3
+    assert all(setups == (pid,) for pid, setups, _ in results['worker'])
+    assert set().union(*(rules for _, _, rules in results['worker'])) == {'depth_m', 'depth_ft'}
+    assert worker_setups == [] and worker_rules == [] and transformer.pipeline._process_pool is None
+
+
+if __name__ == "__main__":
+    test_parallel_project_rules_share_the_worker_processes()
+    print("All sample metadata transformer tests passed")
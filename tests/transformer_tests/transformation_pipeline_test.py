@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+from faire_mapping.transformers.transformation_pipeline import TransformationPipeline, TransformationBuilder, PARALLEL_MIN_ROWS
+
+# Behavior of the TransformationPipeline scheduling options on small data frames (no mapper or google sheets needed)
+
+
+def make_source_df() -> pd.DataFrame:
+    return pd.DataFrame({'depth': [1.0, 2.0, 2.0, 5.0, None, 1.0],
+                         'station': ['A', 'B', 'B', 'C', 'A', None]},
+                        index=[3, 3, 0, 1, 2, 5])
+
+
+def make_concurrent_rules() -> list:
+    # depth_x2, depth_x4 and station_copy write the source. depth_x4 reads depth_x2 so has to wait for the slow
+    # depth_x2, while station_copy doesn't and is written to the source before depth_x4 on a thread pool
+    def slow_double(columns, faire_col, metadata_col):
+        time.sleep(0.2)
+        return columns['depth'] * 2
+
+    return [
+        TransformationBuilder('depth_x2').for_faire_cols('depth_x2')
+            .apply(slow_double, mode='vector', inputs=lambda metadata_col: {'depth': metadata_col})
+            .update_source(True).build(),
+        TransformationBuilder('depth_x4').for_faire_cols('depth_x4')
+            .apply(lambda columns, faire_col, metadata_col: columns['depth_x2'] * 2, mode='vector', inputs=lambda metadata_col: {'depth_x2': metadata_col})
+            .update_source(True).build(),
+        TransformationBuilder('station_copy').for_faire_cols('station_copy')
+            .apply(lambda columns, faire_col, metadata_col: columns['station'], mode='vector', inputs=lambda metadata_col: {'station': metadata_col})
+            .update_source(True).build(),
+        TransformationBuilder('station_upper').for_faire_cols('station_upper')
+            .reads()
+            .apply(lambda row: row['station'].upper() if isinstance(row['station'], str) else row['station'])
+            .build(),
+    ]
+
+
+CONCURRENT_MAPPING_DICT = {'related': {'depth_x2': 'depth', 'depth_x4': 'depth_x2', 'station_copy': 'station', 'station_upper': 'station'}}
+
+
+def test_concurrent_execute_matches_serial():
+    serial = TransformationPipeline(source_df=make_source_df(), mapper=None).register_rules(make_concurrent_rules())
+    concurrent = TransformationPipeline(source_df=make_source_df(), mapper=None, max_workers=4).register_rules(make_concurrent_rules())
+
+    serial_results = serial.execute(CONCURRENT_MAPPING_DICT)
+    concurrent_results = concurrent.execute(CONCURRENT_MAPPING_DICT)
+
+    assert list(concurrent_results) == list(serial_results) == ['depth_x2', 'depth_x4', 'station_copy', 'station_upper']
+    pd.testing.assert_frame_equal(concurrent.get_results_df(), serial.get_results_df())
+    # also_update_source columns are added to the source in the order they would be one at a time
+    assert list(concurrent.source_df.columns) == list(serial.source_df.columns) == ['depth', 'station', 'depth_x2', 'depth_x4', 'station_copy']
+    pd.testing.assert_frame_equal(concurrent.source_df, serial.source_df)
+
+
+def test_concurrent_execute_raises_first_serial_error():
+    def fail(columns, faire_col, metadata_col):
+        raise ValueError(faire_col)
+
+    rules = make_concurrent_rules()
+    rules.insert(2, TransformationBuilder('fail').for_faire_cols('station_upper')
+                 .apply(fail, mode='vector', inputs=lambda metadata_col: {'station': metadata_col}).build())
+    pipeline = TransformationPipeline(source_df=make_source_df(), mapper=None, max_workers=4).register_rules(rules)
+    try:
+        pipeline.execute(CONCURRENT_MAPPING_DICT)
+    except ValueError as e:
+        assert str(e) == 'station_upper'
+    else:
+        raise AssertionError("Expected the failing rule's error")
+
+
+def test_memoized_rule_broadcasts_results():
+    calls = []
+
+    def station_label(row):
+        calls.append(row['station'])
+        return f"{row['station']}_{row['depth']}"
+
+    def make_pipeline(memoize: bool) -> TransformationPipeline:
+        rule = (TransformationBuilder('station_label').for_faire_cols('station_label')
+                .reads('station', 'depth', metadata_cols=False).memoize(memoize).apply(station_label).build())
+        return TransformationPipeline(source_df=make_source_df(), mapper=None).register_rule(rule)
+
+    expected = make_pipeline(memoize=False).execute({'related': {'station_label': 'station'}})['station_label']
+    calls.clear()
+    memoized_pipeline = make_pipeline(memoize=True)
+    result = memoized_pipeline.execute({'related': {'station_label': 'station'}})['station_label']
+
+    # The repeated (B, 2.0) key is run once, the keys with a NaN or None still get their own row's result
+    pd.testing.assert_series_equal(result, expected)
+    assert result.index.tolist() == [3, 3, 0, 1, 2, 5]
+    assert len(calls) == 5
+    stats = memoized_pipeline.memo_stats['station_label']
+    assert (stats.rows, stats.evaluations, stats.hits) == (6, 5, 1)
+    assert memoized_pipeline.get_memo_stats_df().loc['station_label', 'hits'] == 1
+
+
+def test_memoized_vector_rule_with_nan_keys():
+    evaluated = []
+
+    def depth_category(columns, faire_col, metadata_col):
+        evaluated.append(len(columns['depth']))
+        return columns['depth'].map(lambda depth: 'deep' if depth > 1 else 'shallow' if depth <= 1 else 'missing')
+
+    rule = (TransformationBuilder('depth_category').for_faire_cols('depth_category').memoize()
+            .apply(depth_category, mode='vector', inputs=lambda metadata_col: {'depth': metadata_col}).build())
+    source_df = pd.DataFrame({'depth': [1.0, None, 2.0, None, 1.0, 2.0, 2.0]}, index=[0, 0, 1, 1, 2, 2, 3])
+    pipeline = TransformationPipeline(source_df=source_df, mapper=None).register_rule(rule)
+    result = pipeline.execute({'related': {'depth_category': 'depth'}})['depth_category']
+
+    assert result.tolist() == ['shallow', 'missing', 'deep', 'missing', 'shallow', 'deep', 'deep']
+    assert result.index.tolist() == [0, 0, 1, 1, 2, 2, 3]
+    # all the NaN depths are one distinct input
+    assert evaluated == [3]
+    stats = pipeline.memo_stats['depth_category']
+    assert (stats.rows, stats.evaluations, stats.hits) == (7, 3, 4)
+    assert abs(stats.hit_ratio - 4 / 7) < 1e-9
+
+
+def make_parallel_pipeline(max_workers: int = None) -> TransformationPipeline:
+    # Enough rows to be split into chunks, with repeated index labels that aren't in order
+    rows = PARALLEL_MIN_ROWS * 2 + 1
+    source_df = pd.DataFrame({'depth': np.arange(rows, dtype=float), 'unused': 'x'}, index=np.arange(rows) % 7)
+    rule = (TransformationBuilder('depth_and_pid').for_faire_cols('depth_and_pid')
+            .reads('depth', metadata_cols=False).parallel()
+            .apply(lambda row: (row['depth'], os.getpid()))
+            .build())
+    return TransformationPipeline(source_df=source_df, mapper=None, max_workers=max_workers, process_workers=3).register_rule(rule)
+
+
+def test_parallel_chunks_are_reassembled_in_source_order():
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return
+    pipeline = make_parallel_pipeline()
+    result = pipeline.execute({'related': {'depth_and_pid': 'depth'}})['depth_and_pid']
+
+    assert result.index.equals(pipeline.source_df.index)
+    assert [depth for depth, _ in result] == pipeline.source_df['depth'].tolist()
+    pids = {pid for _, pid in result}
+    assert os.getpid() not in pids and len(pids) == 3
+
+
+def test_parallel_rules_do_not_fork_from_threads():
+    # With the thread scheduler on, or when the pipeline itself runs on a thread, parallel rules run in this process
+    pipeline = make_parallel_pipeline(max_workers=2)
+    result = pipeline.execute({'related': {'depth_and_pid': 'depth'}})['depth_and_pid']
+    assert {pid for _, pid in result} == {os.getpid()}
+
+    pipeline = make_parallel_pipeline()
+    thread_results = {}
+    thread = threading.Thread(target=lambda: thread_results.update(pipeline.execute({'related': {'depth_and_pid': 'depth'}})))
+    thread.start()
+    thread.join()
+    assert {pid for _, pid in thread_results['depth_and_pid']} == {os.getpid()}
+    assert [depth for depth, _ in thread_results['depth_and_pid']] == pipeline.source_df['depth'].tolist()
+
+
+def test_plan_reports_rules_reads_and_dependencies():
+    pipeline = TransformationPipeline(source_df=make_source_df(), mapper=None).register_rules(make_concurrent_rules())
+    mapping_dict = {'related': dict(CONCURRENT_MAPPING_DICT['related'], not_mapped='nothing')}
+    pipeline_plan = pipeline.plan(mapping_dict, rule_throughput={'depth_x2': 3.0})
+    steps = pipeline_plan.steps.set_index('faire_col')
+
+    assert steps.index.tolist() == ['depth_x2', 'depth_x4', 'station_copy', 'station_upper']
+    assert steps['rule_name'].tolist() == ['depth_x2', 'depth_x4', 'station_copy', 'station_upper']
+    assert steps['apply_mode'].tolist() == ['vector', 'vector', 'vector', 'row']
+    assert steps['reads'].tolist() == ['depth', 'depth_x2', 'station', 'station']
+    assert steps['writes_source'].tolist() == [True, True, True, False]
+    assert steps['depends_on'].tolist() == ['', 'depth_x2', '', '']
+    assert steps.loc['depth_x2', 'estimate_from'] == 'profile'
+    assert steps.loc['depth_x2', 'estimated_seconds'] == 2.0
+    assert steps.loc['station_upper', 'estimate_from'] == 'default'
+    assert pipeline_plan.unmapped == {'related': ['not_mapped']}
+    # nothing was run
+    assert pipeline.results == {} and list(pipeline.source_df.columns) == ['depth', 'station']
+
+
+if __name__ == "__main__":
+    test_concurrent_execute_matches_serial()
+    test_concurrent_execute_raises_first_serial_error()
+    test_memoized_rule_broadcasts_results()
+    test_memoized_vector_rule_with_nan_keys()
+    test_parallel_chunks_are_reassembled_in_source_order()
+    test_parallel_rules_do_not_fork_from_threads()
+    test_plan_reports_rules_reads_and_dependencies()
+    print("All pipeline tests passed")